@@ -12,7 +12,7 @@ class YouTubeVideoSearchResponse(BaseModel):
     note: str = Field(default="", description="Additional notes")
 
 
-def fetch_youtube_videos(
+async def fetch_youtube_videos(
     search_query: str, tool_context: ToolContext
 ) -> YouTubeVideoSearchResponse:
     """
@@ -24,7 +24,7 @@ def fetch_youtube_videos(
     try:
         duration_filter = "medium"
 
-        videos = search_youtube_videos(
+        videos = await search_youtube_videos(
             query=search_query,
             max_results=3,
             duration_filter=duration_filter,
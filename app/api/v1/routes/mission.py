@@ -13,7 +13,7 @@ router = APIRouter()
 
 
 @router.post("/enrollment", status_code=status.HTTP_201_CREATED)
-async def create_mission_with_enrollment(
+def create_mission_with_enrollment(
     mission_data: MissionCreate,
     db=Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -48,7 +48,7 @@ async def create_mission_with_enrollment(
 
 
 @router.get("/{mission_id}", response_model=Mission)
-async def get_mission(
+def get_mission(
     mission_id: str,
     db=Depends(get_db),
 ):
@@ -69,7 +69,7 @@ async def get_mission(
 
 
 @router.patch("/{mission_id}", response_model=Mission)
-async def update_mission(
+def update_mission(
     mission_id: str,
     mission_update: MissionUpdate,
     db=Depends(get_db),
@@ -5,6 +5,7 @@ import json
 import logging
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
 from firebase_admin import auth
 
 from app.models.websocket_messages import (
@@ -18,6 +19,7 @@ from app.models.websocket_messages import (
     UserMessage,
 )
 from app.services.user_service import UserService
+from app.utils.auth_tokens import bearer_token
 
 from .mission_ally_helpers.agent_processor import AgentProcessor
 from .mission_ally_helpers.connection_manager import ConnectionManager, get_manager
@@ -42,7 +44,7 @@ class WebSocketHandler:
         token = (
             self.websocket.query_params.get("token")
             or self.websocket.cookies.get("session")
-            or (self.websocket.headers.get("authorization") or "").replace("Bearer ", "")
+            or bearer_token(self.websocket.headers.get("authorization"))
         )
 
         if not token:
@@ -80,7 +82,7 @@ class WebSocketHandler:
         if not email:
             raise ValueError("Token does not contain email claim")
 
-        user = user_service.get_user_by_email(email)
+        user = await run_in_threadpool(user_service.get_user_by_email, email)
         return user.id
 
     async def initialize_session(self, db, user_id: str):
@@ -1,7 +1,10 @@
 """Session context management for WebSocket connections"""
 
+import asyncio
 import logging
 
+from fastapi.concurrency import run_in_threadpool
+
 from app.models.enrollment import Enrollment
 from app.models.enrollment_session_log import EnrollmentSessionLog
 from app.models.mission import Mission
@@ -45,10 +48,13 @@ class SessionContext:
         if self._initialized:
             raise ValueError("SessionContext already initialized")
 
-        await self._fetch_user()
-        await self._fetch_mission()
-        await self._fetch_enrollment()
-        await self._fetch_enrolled_mission()
+        # Independent reads run concurrently; the session log lookup needs the enrollment
+        await asyncio.gather(
+            self._fetch_user(),
+            self._fetch_mission(),
+            self._fetch_enrollment(),
+            self._fetch_enrolled_mission(),
+        )
         await self._fetch_enrollment_session_log()
 
         is_completed = self._enrollment_session_log.status == "completed"
@@ -57,8 +63,9 @@ class SessionContext:
         if not is_completed:
             was_started = self._enrollment_session_log.status == "started"
             if self._enrollment_session_log.status == "created":
-                self.enrollment_session_log_service.mark_session_started(
-                    self._enrollment_session_log.id
+                await run_in_threadpool(
+                    self.enrollment_session_log_service.mark_session_started,
+                    self._enrollment_session_log.id,
                 )
 
         initial_state = self._build_initial_state()
@@ -122,7 +129,7 @@ class SessionContext:
     async def _fetch_user(self):
         """Fetch and cache user"""
         try:
-            self._user = self.user_service.get_user(self.user_id)
+            self._user = await run_in_threadpool(self.user_service.get_user, self.user_id)
         except Exception as e:
             logger.error(f"Failed to retrieve user {self.user_id}: {e}", exc_info=True)
             raise ValueError(f"User not found: {self.user_id}") from e
@@ -132,7 +139,9 @@ class SessionContext:
         from fastapi import HTTPException
 
         try:
-            self._mission = self.mission_service.get_mission(self.mission_id)
+            self._mission = await run_in_threadpool(
+                self.mission_service.get_mission, self.mission_id
+            )
         except HTTPException as e:
             if e.status_code == 404:
                 raise ValueError(f"Mission not found: {self.mission_id}") from e
@@ -146,7 +155,9 @@ class SessionContext:
         from fastapi import HTTPException
 
         try:
-            self._enrollment = self.enrollment_service.get_enrollment(self.user_id, self.mission_id)
+            self._enrollment = await run_in_threadpool(
+                self.enrollment_service.get_enrollment, self.user_id, self.mission_id
+            )
         except HTTPException as e:
             if e.status_code == 404:
                 raise ValueError(f"Enrollment not found for user {self.user_id}") from e
@@ -158,8 +169,8 @@ class SessionContext:
     async def _fetch_enrolled_mission(self):
         """Fetch and cache enrolled mission"""
         try:
-            self._enrolled_mission = self.user_service.get_enrolled_mission(
-                self.user_id, self.mission_id
+            self._enrolled_mission = await run_in_threadpool(
+                self.user_service.get_enrolled_mission, self.user_id, self.mission_id
             )
         except Exception as e:
             logger.error(f"Failed to retrieve enrolled mission: {e}", exc_info=True)
@@ -168,7 +179,8 @@ class SessionContext:
     async def _fetch_enrollment_session_log(self):
         """Fetch and cache enrollment session log"""
         try:
-            self._enrollment_session_log = self.enrollment_session_log_service.get_session_log_by_user_and_enrollment_and_mission(
+            self._enrollment_session_log = await run_in_threadpool(
+                self.enrollment_session_log_service.get_session_log_by_user_and_enrollment_and_mission,
                 user_id=self.user_id,
                 enrollment_id=self._enrollment.id,
                 mission_id=self.mission_id,
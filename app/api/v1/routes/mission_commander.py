@@ -4,6 +4,7 @@ import json
 import logging
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
 from firebase_admin import auth
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService, Session
@@ -26,6 +27,7 @@ from app.models.websocket_messages import MissionCommanderServerMessage as Serve
 from app.services.mission_service import MissionService
 from app.services.session_log_service import SessionLogService
 from app.services.user_service import UserService
+from app.utils.auth_tokens import bearer_token
 
 
 logger = logging.getLogger(__name__)
@@ -107,7 +109,7 @@ async def validate_session_and_authenticate(
     token = (
         websocket.query_params.get("token")
         or websocket.cookies.get("session")
-        or (websocket.headers.get("authorization") or "").replace("Bearer ", "")
+        or bearer_token(websocket.headers.get("authorization"))
     )
 
     if not token:
@@ -179,7 +181,7 @@ async def validate_session_and_authenticate(
                 pass  # Connection already closed
             return None
 
-        user = user_service.get_user_by_email(email)
+        user = await run_in_threadpool(user_service.get_user_by_email, email)
 
         if not user:
             logger.warning(f"User not found for email: {email}")
@@ -237,10 +239,16 @@ async def validate_session_and_authenticate(
         return None
 
 
-async def handle_disconnect(session_id: str, user_id: str, session_log_service: SessionLogService):
+async def handle_disconnect(
+    session_id: str,
+    user_id: str,
+    session_log_service: SessionLogService,
+    connection_manager: ConnectionManager | None = None,
+):
     """Mark incomplete sessions as abandoned on disconnect"""
+    connection_manager = connection_manager or manager
     try:
-        updated_session = await manager.session_service.get_session(
+        updated_session = await connection_manager.session_service.get_session(
             app_name="mission-commander", user_id=user_id, session_id=session_id
         )
 
@@ -250,7 +258,7 @@ async def handle_disconnect(session_id: str, user_id: str, session_log_service:
     except Exception as e:
         logger.error(f"Error handling disconnect for {session_id}: {e}")
     finally:
-        manager.disconnect(session_id)
+        connection_manager.disconnect(session_id)
 
 
 async def process_agent_flow(
@@ -10,7 +10,7 @@ router = APIRouter()
 
 
 @router.get("/profile", response_model=User)
-async def get_profile(
+def get_profile(
     current_user: User = Depends(get_current_user),
     db=Depends(get_db),
     limit: int = 100,
@@ -30,7 +30,7 @@ async def get_profile(
 
 
 @router.get("/enrolled-missions", response_model=list[UserEnrolledMission])
-async def get_user_enrolled_missions(
+def get_user_enrolled_missions(
     db=Depends(get_db),
     current_user: User = Depends(get_current_user),
     limit: int = 100,
@@ -49,7 +49,7 @@ async def get_user_enrolled_missions(
 
 
 @router.put("/update", response_model=User)
-async def update_user(
+def update_user(
     user_update: UserUpdate,
     db=Depends(get_db),
     current_user: User = Depends(get_current_user),
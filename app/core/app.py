@@ -4,12 +4,15 @@ from contextlib import asynccontextmanager
 import os
 
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from google.adk.cli.fast_api import get_fast_api_app
 
 from app.core.config import settings
 from app.core.initializer import startup_handler
+from app.core.set_exception_handlers import setup_exception_handlers
 from app.core.set_middleware import setup_middleware
 from app.core.set_routes import setup_routes
+from app.services.mission_service import flush_pending_propagations
 
 
 @asynccontextmanager
@@ -17,6 +20,8 @@ async def lifespan(app: FastAPI):
     """Manage application lifespan"""
     await startup_handler(app)
     yield
+    # Debounced mission propagations only live in memory; write them before exiting
+    await run_in_threadpool(flush_pending_propagations)
 
 
 def create_app() -> FastAPI:
@@ -36,6 +41,9 @@ def create_app() -> FastAPI:
     app.title = settings.APP_TITLE
     app.description = settings.APP_DESCRIPTION
 
+    # Setup exception handlers
+    setup_exception_handlers(app)
+
     # Setup middleware
     setup_middleware(app)
 
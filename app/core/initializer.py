@@ -6,7 +6,7 @@ from fastapi import FastAPI
 
 from app.initializers.cloud_logging import setup_logging
 from app.initializers.firebase import initialize_firebase
-from app.initializers.firestore import initialize_firestore
+from app.initializers.firestore import initialize_firestore_pool, set_db_pool
 
 
 async def startup_handler(app: FastAPI):
@@ -25,5 +25,5 @@ async def startup_handler(app: FastAPI):
                 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = tf.name
 
     initialize_firebase()
-    app.state.db = initialize_firestore()
+    set_db_pool(app.state, initialize_firestore_pool())
     setup_logging()
@@ -0,0 +1,30 @@
+"""Exception handler registration"""
+
+import logging
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from google.api_core.exceptions import GoogleAPICallError, RetryError
+
+
+logger = logging.getLogger(__name__)
+
+
+async def internal_error_handler(request: Request, exc: Exception) -> JSONResponse:
+    """Log an unexpected error and return a generic 500 that doesn't expose its details"""
+    logger.error(
+        "Unhandled error on %s %s: %s", request.method, request.url.path, exc, exc_info=exc
+    )
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": "Internal server error"},
+    )
+
+
+def setup_exception_handlers(app: FastAPI) -> None:
+    """Register all application exception handlers"""
+    # Firestore RPC failures raised from services
+    app.add_exception_handler(GoogleAPICallError, internal_error_handler)
+    app.add_exception_handler(RetryError, internal_error_handler)
+    # Anything else that escapes a route, as the old per-service decorator did
+    app.add_exception_handler(Exception, internal_error_handler)
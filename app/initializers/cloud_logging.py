@@ -6,6 +6,10 @@ from google.cloud import logging as gcp_logging
 
 def setup_logging():
     """Setup logging with Cloud Logging fallback to console"""
+    # Thread and process info isn't used by either handler; skip collecting it per record
+    logging.logThreads = False
+    logging.logProcesses = False
+
     try:
         # Try to setup Google Cloud Logging
         client = gcp_logging.Client()
@@ -1,3 +1,4 @@
+from itertools import cycle
 import json
 import os
 
@@ -41,6 +42,29 @@ def initialize_firestore():
     return db
 
 
+def initialize_firestore_pool():
+    """Initializes a small pool of Firestore clients
+
+    Each client has its own gRPC channel, so spreading requests over a few of them
+    avoids queueing every RPC behind one connection. Pool size is read from
+    FIRESTORE_CLIENT_POOL_SIZE (default 4).
+    """
+    size = max(1, int(os.getenv("FIRESTORE_CLIENT_POOL_SIZE", "4")))
+    return [initialize_firestore() for _ in range(size)]
+
+
 def get_db(request: Request):
-    """FastAPI dependency to get Firestore database from app state"""
-    return request.app.state.db
+    """FastAPI dependency to get Firestore database from app state
+
+    Hands out pooled clients round-robin when a pool is configured.
+    """
+    db_cycle = getattr(request.app.state, "db_cycle", None)
+    if db_cycle is None:
+        return request.app.state.db
+    return next(db_cycle)
+
+
+def set_db_pool(state, clients: list) -> None:
+    """Store the client pool on app state; app.state.db stays the first client."""
+    state.db = clients[0]
+    state.db_cycle = cycle(clients)
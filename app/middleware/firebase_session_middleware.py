@@ -2,6 +2,7 @@
 
 from datetime import timedelta
 import re
+import time
 
 from fastapi import Request
 from firebase_admin import auth
@@ -13,11 +14,19 @@ from firebase_admin.auth import (
     RevokedIdTokenError,
     RevokedSessionCookieError,
 )
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 
+from app.initializers.firestore import get_db
 from app.models.user import User, UserCreate
 from app.services.user_service import UserService
+from app.utils.auth_tokens import (
+    bearer_token,
+    cache_claims,
+    get_cached_claims,
+    unverified_claims,
+)
 
 
 EXCLUDED_PATHS = {
@@ -30,6 +39,90 @@ EXCLUDED_PATHS = {
 }
 
 
+# Session cookies are issued by session.firebase.google.com, ID tokens by securetoken
+SESSION_COOKIE_ISSUER = "session.firebase.google.com"
+
+# Checked in order, so the expired/revoked errors come before the invalid ones they subclass
+_AUTH_ERROR_RESPONSES = (
+    (ExpiredSessionCookieError, "Session expired", "SESSION_EXPIRED"),
+    (RevokedSessionCookieError, "Session revoked", "SESSION_REVOKED"),
+    (InvalidSessionCookieError, "Invalid session", "SESSION_INVALID"),
+    (ExpiredIdTokenError, "ID token expired", "TOKEN_EXPIRED"),
+    (RevokedIdTokenError, "ID token revoked", "TOKEN_REVOKED"),
+    (InvalidIdTokenError, "Invalid ID token", "TOKEN_INVALID"),
+)
+_AUTH_ERRORS = tuple(error_type for error_type, _, _ in _AUTH_ERROR_RESPONSES)
+
+
+def _unauthorized(detail: str, error_code: str) -> JSONResponse:
+    return JSONResponse(status_code=401, content={"detail": detail, "error_code": error_code})
+
+
+def _auth_error_response(error: Exception) -> JSONResponse:
+    """401 for a Firebase verification error."""
+    detail, error_code = next(
+        (detail, error_code)
+        for error_type, detail, error_code in _AUTH_ERROR_RESPONSES
+        if isinstance(error, error_type)
+    )
+    return _unauthorized(detail, error_code)
+
+
+def _expired_token_response(token: str) -> JSONResponse:
+    """401 for a token whose own `exp` has passed, by the kind of token it is."""
+    claims = unverified_claims(token) or {}
+    if SESSION_COOKIE_ISSUER in str(claims.get("iss", "")):
+        return _unauthorized("Session expired", "SESSION_EXPIRED")
+    return _unauthorized("ID token expired", "TOKEN_EXPIRED")
+
+
+def _is_issuer_error(session_error: Exception) -> bool:
+    """Whether verify_session_cookie failed because the token is an ID token."""
+    error_str = str(session_error).lower()
+    return (
+        "iss" in error_str
+        and "issuer" in error_str
+        and ("securetoken.google.com" in error_str or "session.firebase.google.com" in error_str)
+    )
+
+
+def _resolve_claims(token: str) -> dict | None:
+    """Verified claims for the token, served from the claims cache when possible.
+
+    Returns None for a token whose own `exp` has already passed, without paying for
+    signature checks. Verification failures raise the Firebase auth error.
+    """
+    claims = get_cached_claims(token)
+    if claims is not None:
+        return claims
+
+    unverified = unverified_claims(token)
+    exp = unverified.get("exp") if unverified else None
+    if isinstance(exp, int | float) and exp < time.time():
+        return None
+
+    try:
+        claims = auth.verify_session_cookie(token, check_revoked=True)
+    except (
+        ExpiredSessionCookieError,
+        RevokedSessionCookieError,
+        InvalidSessionCookieError,
+    ) as session_error:
+        if not _is_issuer_error(session_error):
+            raise
+        try:
+            claims = auth.verify_id_token(token, check_revoked=True)
+        except _AUTH_ERRORS:
+            raise
+        except Exception as id_token_error:
+            raise InvalidIdTokenError(
+                f"Invalid authentication token: {str(id_token_error)}", cause=id_token_error
+            ) from id_token_error
+
+    cache_claims(token, claims)
+    return claims
+
+
 class FirebaseSessionMiddleware(BaseHTTPMiddleware):
     COOKIE_NAME = "session"
     SESSION_DURATION = timedelta(days=2)
@@ -41,12 +134,9 @@ class FirebaseSessionMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
 
         # Try to get token from cookie or Authorization header
-        token = request.cookies.get(self.COOKIE_NAME)
-        if not token:
-            # Check Authorization header
-            auth_header = request.headers.get("authorization", "")
-            if auth_header.startswith("Bearer "):
-                token = auth_header.replace("Bearer ", "")
+        token = request.cookies.get(self.COOKIE_NAME) or bearer_token(
+            request.headers.get("authorization")
+        )
 
         if not token:
             return JSONResponse(
@@ -58,73 +148,9 @@ class FirebaseSessionMiddleware(BaseHTTPMiddleware):
             )
 
         try:
-            decoded_claims = auth.verify_session_cookie(token, check_revoked=True)
-        except (
-            ExpiredSessionCookieError,
-            RevokedSessionCookieError,
-            InvalidSessionCookieError,
-        ) as session_error:
-            error_str = str(session_error).lower()
-            is_issuer_error = (
-                "iss" in error_str
-                and "issuer" in error_str
-                and (
-                    "securetoken.google.com" in error_str
-                    or "session.firebase.google.com" in error_str
-                )
-            )
-
-            if is_issuer_error:
-                try:
-                    decoded_claims = auth.verify_id_token(token, check_revoked=True)
-                except ExpiredIdTokenError:
-                    return JSONResponse(
-                        status_code=401,
-                        content={"detail": "ID token expired", "error_code": "TOKEN_EXPIRED"},
-                    )
-                except RevokedIdTokenError:
-                    return JSONResponse(
-                        status_code=401,
-                        content={"detail": "ID token revoked", "error_code": "TOKEN_REVOKED"},
-                    )
-                except InvalidIdTokenError:
-                    return JSONResponse(
-                        status_code=401,
-                        content={"detail": "Invalid ID token", "error_code": "TOKEN_INVALID"},
-                    )
-                except Exception as id_token_error:
-                    return JSONResponse(
-                        status_code=401,
-                        content={
-                            "detail": f"Invalid authentication token: {str(id_token_error)}",
-                            "error_code": "TOKEN_INVALID",
-                        },
-                    )
-            else:
-                # Re-raise session cookie errors
-                if isinstance(session_error, ExpiredSessionCookieError):
-                    return JSONResponse(
-                        status_code=401,
-                        content={"detail": "Session expired", "error_code": "SESSION_EXPIRED"},
-                    )
-                elif isinstance(session_error, RevokedSessionCookieError):
-                    return JSONResponse(
-                        status_code=401,
-                        content={"detail": "Session revoked", "error_code": "SESSION_REVOKED"},
-                    )
-                elif isinstance(session_error, InvalidSessionCookieError):
-                    return JSONResponse(
-                        status_code=401,
-                        content={"detail": "Invalid session", "error_code": "SESSION_INVALID"},
-                    )
-                else:
-                    return JSONResponse(
-                        status_code=401,
-                        content={
-                            "detail": f"Invalid authentication token: {str(session_error)}",
-                            "error_code": "AUTH_INVALID",
-                        },
-                    )
+            decoded_claims = _resolve_claims(token)
+        except _AUTH_ERRORS as auth_error:
+            return _auth_error_response(auth_error)
         except Exception as e:
             return JSONResponse(
                 status_code=500,
@@ -133,6 +159,8 @@ class FirebaseSessionMiddleware(BaseHTTPMiddleware):
                     "error_code": "INTERNAL_ERROR",
                 },
             )
+        if decoded_claims is None:
+            return _expired_token_response(token)
 
         # Create user from decoded claims
         user_create_object = UserCreate(
@@ -142,8 +170,9 @@ class FirebaseSessionMiddleware(BaseHTTPMiddleware):
             picture=decoded_claims.get("picture"),
         )
 
-        user_service = UserService(request.app.state.db)
-        user: User = user_service.get_or_create_user(user_create_object)
+        user_service = UserService(get_db(request))
+        # UserService uses the blocking Firestore client; keep it off the event loop
+        user: User = await run_in_threadpool(user_service.get_or_create_user, user_create_object)
 
         request.state.current_user = user
 
@@ -1,16 +1,24 @@
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
 
 from fastapi import HTTPException, status
+from google.cloud import firestore
+from google.cloud.firestore import DELETE_FIELD, ArrayRemove, ArrayUnion
 from google.cloud.firestore_v1.base_query import FieldFilter
+from pydantic import TypeAdapter
 
 from app.models.enrollment import Enrollment, EnrollmentCreate, EnrollmentUpdate
 from app.models.user import UserEnrolledMissionCreate, UserEnrolledMissionUpdate
-from app.utils.firestore_exception import handle_firestore_exceptions
 
 
 logger = logging.getLogger(__name__)
 
+_ENROLLMENT_LIST = TypeAdapter(list[Enrollment])
+
+# Firestore arrays top out around 20k elements; past this the mission's enrolled_user_ids
+# field is dropped and propagation falls back to querying enrollments
+_ENROLLED_USER_IDS_LIMIT = 20_000
+
 
 class EnrollmentService:
     def __init__(self, db, user_service=None):
@@ -27,11 +35,49 @@ class EnrollmentService:
         else:
             self.user_service = user_service
 
-    def _generate_enrollment_id(self, user_id: str, mission_id: str) -> str:
+    @staticmethod
+    def _generate_enrollment_id(user_id: str, mission_id: str) -> str:
         """Generate composite key for enrollment."""
         return f"{user_id}_{mission_id}"
 
-    @handle_firestore_exceptions
+    def _enrolled_user_ids_update(self, mission_data: dict, user_id: str, enrolled: bool) -> dict:
+        """Build the mission update that keeps enrolled_user_ids in sync, if it is tracked.
+
+        Missions created before the field existed don't have it and are left alone, since an
+        incomplete list would make propagation skip users.
+        """
+        enrolled_user_ids = mission_data.get("enrolled_user_ids")
+        if enrolled_user_ids is None:
+            return {}
+        if not enrolled:
+            return {"enrolled_user_ids": ArrayRemove([user_id])}
+        if len(enrolled_user_ids) >= _ENROLLED_USER_IDS_LIMIT:
+            return {"enrolled_user_ids": DELETE_FIELD}
+        return {"enrolled_user_ids": ArrayUnion([user_id])}
+
+    def _delete_enrollment_and_untrack(self, enrollment_ref, user_id: str, mission_id: str) -> None:
+        """Delete an enrollment and drop the user from the mission's enrolled_user_ids.
+
+        The mission is read in the same transaction: an ArrayRemove on a field that was
+        dropped at the cap would recreate it as a partial list.
+        """
+        mission_ref = self.missions_collection.document(mission_id)
+
+        @firestore.transactional
+        def delete_in_transaction(transaction):
+            mission_doc = mission_ref.get(
+                field_paths=["enrolled_user_ids"], transaction=transaction
+            )
+            transaction.delete(enrollment_ref)
+            if mission_doc.exists:
+                mission_update = self._enrolled_user_ids_update(
+                    mission_doc.to_dict(), user_id, False
+                )
+                if mission_update:
+                    transaction.update(mission_ref, mission_update)
+
+        delete_in_transaction(self.db.transaction())
+
     def create_enrollment(self, data: EnrollmentCreate) -> Enrollment:
         # Verify user exists
         user_doc = self.users_collection.document(data.user_id).get()
@@ -41,35 +87,47 @@ class EnrollmentService:
                 detail=f"User with ID '{data.user_id}' not found.",
             )
 
-        # Verify mission exists and get mission data for denormalization
-        mission_doc = self.missions_collection.document(data.mission_id).get()
-        if not mission_doc.exists:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Mission with ID '{data.mission_id}' not found.",
-            )
-
-        mission_data = mission_doc.to_dict()
-
-        # Check if enrollment already exists
         enrollment_id = self._generate_enrollment_id(data.user_id, data.mission_id)
-        existing_doc = self.collection.document(enrollment_id).get()
-        if existing_doc.exists:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User is already enrolled in this mission.",
-            )
+        mission_ref = self.missions_collection.document(data.mission_id)
 
+        now = datetime.now(timezone.utc)
         enrollment_data = data.model_dump()
         enrollment_data["id"] = enrollment_id
-        enrollment_data["enrolled_at"] = datetime.today()
-        enrollment_data["last_accessed_at"] = datetime.today()
+        enrollment_data["enrolled_at"] = now
+        enrollment_data["last_accessed_at"] = now
         enrollment_data["completed"] = False
-        enrollment_data["created_at"] = datetime.today()
-        enrollment_data["updated_at"] = datetime.today()
+        enrollment_data["created_at"] = now
+        enrollment_data["updated_at"] = now
+
+        @firestore.transactional
+        def create_in_transaction(transaction):
+            # Verify mission exists and get mission data for denormalization. Reading it in
+            # the transaction makes a concurrent enrollment retry instead of basing its
+            # enrolled_user_ids update on a stale list.
+            mission_doc = mission_ref.get(transaction=transaction)
+            if not mission_doc.exists:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Mission with ID '{data.mission_id}' not found.",
+                )
 
-        # Create in global enrollments collection
-        self.collection.document(enrollment_id).set(enrollment_data)
+            # Check if enrollment already exists
+            enrollment_ref = self.collection.document(enrollment_id)
+            if enrollment_ref.get(transaction=transaction).exists:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="User is already enrolled in this mission.",
+                )
+
+            # Create in global enrollments collection and track the user on the mission
+            mission_data = mission_doc.to_dict()
+            transaction.set(enrollment_ref, enrollment_data)
+            mission_update = self._enrolled_user_ids_update(mission_data, data.user_id, True)
+            if mission_update:
+                transaction.update(mission_ref, mission_update)
+            return mission_data
+
+        mission_data = create_in_transaction(self.db.transaction())
 
         # Create in user's enrolled_missions subcollection (denormalized)
         user_enrolled_create = UserEnrolledMissionCreate(
@@ -90,17 +148,25 @@ class EnrollmentService:
                 user_id=data.user_id, data=user_enrolled_create
             )
             logger.info(
-                f"Successfully created enrollment '{enrollment_id}' for user '{data.user_id}' "
-                f"in mission '{data.mission_id}' (dual-write to global and user subcollection)"
+                "Successfully created enrollment '%s' for user '%s' "
+                "in mission '%s' (dual-write to global and user subcollection)",
+                enrollment_id,
+                data.user_id,
+                data.mission_id,
             )
         except Exception as e:
             logger.error(
-                f"Failed to create enrolled mission in user subcollection for user '{data.user_id}' "
-                f"and mission '{data.mission_id}'. Global enrollment created but user subcollection failed: {str(e)}",
+                "Failed to create enrolled mission in user subcollection for user '%s' "
+                "and mission '%s'. Global enrollment created but user subcollection failed: %s",
+                data.user_id,
+                data.mission_id,
+                e,
                 exc_info=True,
             )
             # Roll back global enrollment
-            self.collection.document(enrollment_id).delete()
+            self._delete_enrollment_and_untrack(
+                self.collection.document(enrollment_id), data.user_id, data.mission_id
+            )
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to create enrollment: {str(e)}",
@@ -108,7 +174,6 @@ class EnrollmentService:
 
         return Enrollment(**enrollment_data)
 
-    @handle_firestore_exceptions
     def get_enrollment(self, user_id: str, mission_id: str) -> Enrollment:
         enrollment_id = self._generate_enrollment_id(user_id, mission_id)
         doc = self.collection.document(enrollment_id).get()
@@ -121,7 +186,6 @@ class EnrollmentService:
 
         return Enrollment(**doc.to_dict())
 
-    @handle_firestore_exceptions
     def get_enrollment_by_id(self, enrollment_id: str) -> Enrollment:
         doc = self.collection.document(enrollment_id).get()
 
@@ -133,7 +197,6 @@ class EnrollmentService:
 
         return Enrollment(**doc.to_dict())
 
-    @handle_firestore_exceptions
     def update_enrollment(
         self, user_id: str, mission_id: str, data: EnrollmentUpdate
     ) -> Enrollment:
@@ -147,12 +210,12 @@ class EnrollmentService:
                 detail=f"Enrollment not found for user '{user_id}' in mission '{mission_id}'.",
             )
 
-        update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+        update_data = data.model_dump(exclude_none=True)
         if update_data:
             # Always update updated_at and last_accessed_at when updating enrollment
-            update_data["updated_at"] = datetime.today()
-            if "last_accessed_at" not in update_data:
-                update_data["last_accessed_at"] = datetime.today()
+            now = datetime.now(timezone.utc)
+            update_data["updated_at"] = now
+            update_data.setdefault("last_accessed_at", now)
 
             # Update global enrollments collection
             doc_ref.update(update_data)
@@ -170,20 +233,24 @@ class EnrollmentService:
                     user_id=user_id, mission_id=mission_id, data=user_enrolled_update
                 )
                 logger.info(
-                    f"Successfully updated enrollment for user '{user_id}' in mission '{mission_id}' "
-                    f"(dual-write to global and user subcollection)"
+                    "Successfully updated enrollment for user '%s' in mission '%s' "
+                    "(dual-write to global and user subcollection)",
+                    user_id,
+                    mission_id,
                 )
             except Exception as e:
                 logger.error(
-                    f"Failed to update enrolled mission in user subcollection for user '{user_id}' "
-                    f"and mission '{mission_id}'. Global enrollment updated but user subcollection failed: {str(e)}",
+                    "Failed to update enrolled mission in user subcollection for user '%s' "
+                    "and mission '%s'. Global enrollment updated but user subcollection failed: %s",
+                    user_id,
+                    mission_id,
+                    e,
                     exc_info=True,
                 )
 
         updated_doc = doc_ref.get()
         return Enrollment(**updated_doc.to_dict())
 
-    @handle_firestore_exceptions
     def delete_enrollment(self, user_id: str, mission_id: str) -> dict:
         enrollment_id = self._generate_enrollment_id(user_id, mission_id)
         doc_ref = self.collection.document(enrollment_id)
@@ -195,32 +262,36 @@ class EnrollmentService:
                 detail=f"Enrollment not found for user '{user_id}' in mission '{mission_id}'.",
             )
 
-        # Delete from global enrollments collection
-        doc_ref.delete()
+        # Delete from global enrollments collection and untrack the user on the mission
+        self._delete_enrollment_and_untrack(doc_ref, user_id, mission_id)
 
         try:
             self.user_service.delete_enrolled_mission(user_id=user_id, mission_id=mission_id)
             logger.info(
-                f"Successfully deleted enrollment '{enrollment_id}' for user '{user_id}' "
-                f"in mission '{mission_id}' (dual-delete from global and user subcollection)"
+                "Successfully deleted enrollment '%s' for user '%s' "
+                "in mission '%s' (dual-delete from global and user subcollection)",
+                enrollment_id,
+                user_id,
+                mission_id,
             )
         except Exception as e:
             logger.error(
-                f"Failed to delete enrolled mission from user subcollection for user '{user_id}' "
-                f"and mission '{mission_id}'. Global enrollment deleted but user subcollection failed: {str(e)}",
+                "Failed to delete enrolled mission from user subcollection for user '%s' "
+                "and mission '%s'. Global enrollment deleted but user subcollection failed: %s",
+                user_id,
+                mission_id,
+                e,
                 exc_info=True,
             )
         return {"message": f"Enrollment '{enrollment_id}' deleted successfully."}
 
-    @handle_firestore_exceptions
     def get_enrollments_by_user(self, user_id: str, limit: int = 100) -> list[Enrollment]:
         """Get all enrollments for a specific user."""
         docs = (
             self.collection.where(filter=FieldFilter("user_id", "==", user_id)).limit(limit).get()
         )
-        return [Enrollment(**doc.to_dict()) for doc in docs]
+        return _ENROLLMENT_LIST.validate_python([doc.to_dict() for doc in docs])
 
-    @handle_firestore_exceptions
     def get_enrollments_by_mission(self, mission_id: str, limit: int = 100) -> list[Enrollment]:
         """Get all enrollments for a specific mission."""
         docs = (
@@ -228,9 +299,8 @@ class EnrollmentService:
             .limit(limit)
             .get()
         )
-        return [Enrollment(**doc.to_dict()) for doc in docs]
+        return _ENROLLMENT_LIST.validate_python([doc.to_dict() for doc in docs])
 
-    @handle_firestore_exceptions
     def update_last_accessed(self, user_id: str, mission_id: str) -> Enrollment:
         """Update the last_accessed_at timestamp for an enrollment."""
         enrollment_id = self._generate_enrollment_id(user_id, mission_id)
@@ -243,23 +313,29 @@ class EnrollmentService:
                 detail=f"Enrollment not found for user '{user_id}' in mission '{mission_id}'.",
             )
 
-        update_data = {"last_accessed_at": datetime.today(), "updated_at": datetime.today()}
+        now = datetime.now(timezone.utc)
+        update_data = {"last_accessed_at": now, "updated_at": now}
 
         # Update global enrollments collection
         doc_ref.update(update_data)
 
         # Update user's enrolled_missions subcollection (denormalized)
-        user_enrolled_update = UserEnrolledMissionUpdate(last_accessed_at=datetime.today())
+        user_enrolled_update = UserEnrolledMissionUpdate(last_accessed_at=now)
 
         try:
             self.user_service.update_enrolled_mission(
                 user_id=user_id, mission_id=mission_id, data=user_enrolled_update
             )
-            logger.debug(f"Updated last_accessed_at for user '{user_id}' in mission '{mission_id}'")
+            logger.debug(
+                "Updated last_accessed_at for user '%s' in mission '%s'", user_id, mission_id
+            )
         except Exception as e:
             logger.error(
-                f"Failed to update last_accessed_at in user subcollection for user '{user_id}' "
-                f"and mission '{mission_id}': {str(e)}",
+                "Failed to update last_accessed_at in user subcollection for user '%s' "
+                "and mission '%s': %s",
+                user_id,
+                mission_id,
+                e,
                 exc_info=True,
             )
 
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
 from fastapi import HTTPException, status
 
@@ -7,7 +7,6 @@ from app.models.enrollment_session_log import (
     EnrollmentSessionLogCreate,
     EnrollmentSessionLogUpdate,
 )
-from app.utils.firestore_exception import handle_firestore_exceptions
 
 
 class EnrollmentSessionLogService:
@@ -17,7 +16,6 @@ class EnrollmentSessionLogService:
         self.db = db
         self.collection = db.collection("enrollment_session_logs")
 
-    @handle_firestore_exceptions
     def create_session_log(self, data: EnrollmentSessionLogCreate) -> EnrollmentSessionLog:
         """
         Create a new enrollment session log entry.
@@ -30,7 +28,7 @@ class EnrollmentSessionLogService:
         """
         doc_ref = self.collection.document()
 
-        now = datetime.now()
+        now = datetime.now(timezone.utc)
         session_data = {
             **data.model_dump(),
             "id": doc_ref.id,
@@ -45,7 +43,6 @@ class EnrollmentSessionLogService:
 
         return EnrollmentSessionLog(**session_data)
 
-    @handle_firestore_exceptions
     def get_session_log(self, session_log_id: str) -> EnrollmentSessionLog:
         """
         Retrieve an enrollment session log by ID.
@@ -68,7 +65,6 @@ class EnrollmentSessionLogService:
 
         return EnrollmentSessionLog(**doc.to_dict())
 
-    @handle_firestore_exceptions
     def get_session_log_by_user_and_enrollment_and_mission(
         self, user_id: str, enrollment_id: str, mission_id: str
     ) -> EnrollmentSessionLog | None:
@@ -85,20 +81,17 @@ class EnrollmentSessionLogService:
         """
         from google.cloud.firestore_v1.base_query import FieldFilter
 
-        docs = (
+        query = (
             self.collection.where(filter=FieldFilter("user_id", "==", user_id))
             .where(filter=FieldFilter("enrollment_id", "==", enrollment_id))
             .where(filter=FieldFilter("mission_id", "==", mission_id))
             .limit(1)
-            .get()
         )
+        doc = next(iter(query.stream()), None)
+        if doc is None:
+            return None
+        return EnrollmentSessionLog(**doc.to_dict())
 
-        for doc in docs:
-            return EnrollmentSessionLog(**doc.to_dict())
-
-        return None
-
-    @handle_firestore_exceptions
     def update_session_log(
         self, session_log_id: str, data: EnrollmentSessionLogUpdate
     ) -> EnrollmentSessionLog:
@@ -124,16 +117,15 @@ class EnrollmentSessionLogService:
                 detail=f"Enrollment session log with ID '{session_log_id}' not found.",
             )
 
-        update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+        update_data = data.model_dump(exclude_none=True)
 
         if update_data:
-            update_data["updated_at"] = datetime.now()
+            update_data["updated_at"] = datetime.now(timezone.utc)
             doc_ref.update(update_data)
 
         updated_doc = doc_ref.get()
         return EnrollmentSessionLog(**updated_doc.to_dict())
 
-    @handle_firestore_exceptions
     def mark_session_started(self, session_log_id: str) -> EnrollmentSessionLog:
         """
         Mark an enrollment session as started.
@@ -144,11 +136,10 @@ class EnrollmentSessionLogService:
         Returns:
             EnrollmentSessionLog: Updated session log
         """
-        now = datetime.now()
+        now = datetime.now(timezone.utc)
         update_data = EnrollmentSessionLogUpdate(status="started", started_at=now)
         return self.update_session_log(session_log_id, update_data)
 
-    @handle_firestore_exceptions
     def mark_session_completed(self, session_log_id: str) -> EnrollmentSessionLog:
         """
         Mark an enrollment session as completed.
@@ -159,6 +150,6 @@ class EnrollmentSessionLogService:
         Returns:
             EnrollmentSessionLog: Updated session log
         """
-        now = datetime.now()
+        now = datetime.now(timezone.utc)
         update_data = EnrollmentSessionLogUpdate(status="completed", completed_at=now)
         return self.update_session_log(session_log_id, update_data)
@@ -1,18 +1,81 @@
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import logging
+import threading
 
 from fastapi import HTTPException, status
+from google.api_core.exceptions import NotFound
+from google.cloud import firestore
+from google.cloud.firestore import SERVER_TIMESTAMP
 from google.cloud.firestore_v1.base_query import FieldFilter
+from pydantic import TypeAdapter
 
-from app.models.enrollment import EnrollmentCreate
+from app.models.enrollment import Enrollment
+from app.models.enrollment_session_log import EnrollmentSessionLog
 from app.models.mission import Mission, MissionCreate, MissionUpdate
 from app.models.user import UserEnrolledMissionUpdate
 from app.services.enrollment_service import EnrollmentService
-from app.utils.firestore_exception import handle_firestore_exceptions
 
 
 logger = logging.getLogger(__name__)
 
+# Validates whole result lists in one pass instead of per-document constructor calls
+_MISSION_LIST = TypeAdapter(list[Mission])
+
+# Projection for mission reads; leaves out enrolled_user_ids, which can hold up to 20k IDs
+_MISSION_FIELDS = list(Mission.model_fields)
+
+# Mission fields denormalized into users/{user_id}/enrolled_missions, mapped to their names there
+_PROPAGATED_FIELDS = {
+    "title": "mission_title",
+    "short_description": "mission_short_description",
+    "skills": "mission_skills",
+}
+# Firestore caps a WriteBatch at 500 writes; stay well below it
+_PROPAGATION_BATCH_SIZE = 400
+_PROPAGATION_MAX_WORKERS = 4
+
+# Bursts of updates to the same mission within this window are propagated once, with
+# the merged changes. 0 propagates synchronously. Anything still pending at shutdown is
+# drained by flush_pending_propagations.
+#
+# The debounce timer is a plain thread in this process. On Cloud Run with CPU allocated
+# only during requests, it can stall once the response is sent, so a propagation may be
+# delayed until the instance next serves a request or shuts down. Deployments that need
+# prompt propagation should enable always-allocated CPU or set the window to 0.
+_PROPAGATION_DEBOUNCE_SECONDS = 0.5
+_pending_propagations: dict[str, dict] = {}
+_pending_propagations_lock = threading.Lock()
+
+# A flush holds its mission's lock from taking the pending payload until it is committed,
+# so a newer payload for the same mission can't commit before an older one in flight.
+# Missions share a fixed set of striped locks to keep the set bounded.
+_propagation_flush_locks = [threading.Lock() for _ in range(64)]
+
+
+def _flush_mission_propagation(mission_id: str) -> None:
+    """Run the mission's pending propagation, if any (called from its debounce timer)."""
+    with _propagation_flush_locks[hash(mission_id) % len(_propagation_flush_locks)]:
+        with _pending_propagations_lock:
+            pending = _pending_propagations.pop(mission_id, None)
+        if pending is None:
+            return
+        pending["timer"].cancel()
+        pending["service"]._run_pending_propagation(mission_id, pending)
+
+
+def flush_pending_propagations() -> None:
+    """Run every debounced propagation now instead of waiting for its timer.
+
+    Called on application shutdown so pending updates don't die with the process.
+    """
+    with _pending_propagations_lock:
+        mission_ids = list(_pending_propagations)
+
+    for mission_id in mission_ids:
+        _flush_mission_propagation(mission_id)
+
 
 class MissionService:
     def __init__(self, db, user_service=None):
@@ -28,20 +91,26 @@ class MissionService:
         else:
             self.user_service = user_service
 
-    @handle_firestore_exceptions
     def create_mission(self, data: MissionCreate) -> Mission:
         doc_ref = self.collection.document()
         mission_data = data.model_dump()
         mission_data["id"] = doc_ref.id
-        mission_data["created_at"] = datetime.today()
-        mission_data["updated_at"] = datetime.today()
-        doc_ref.set(mission_data)
-        return Mission(**mission_data)
+        doc_ref.set(
+            {
+                **mission_data,
+                "enrolled_user_ids": [],
+                "created_at": SERVER_TIMESTAMP,
+                "updated_at": SERVER_TIMESTAMP,
+            }
+        )
+
+        # Local approximation of the server-assigned timestamps for the response
+        now = datetime.now(timezone.utc)
+        return Mission(**mission_data, created_at=now, updated_at=now)
 
-    @handle_firestore_exceptions
     def create_mission_with_enrollment(
         self, data: MissionCreate, user_id: str
-    ) -> tuple[Mission, any, any]:
+    ) -> tuple[Mission, Enrollment, EnrollmentSessionLog]:
         """
         Create a mission and automatically enroll the creator.
         Also creates an enrollment_session_log for tracking learning sessions.
@@ -54,46 +123,116 @@ class MissionService:
             Tuple of (Mission, Enrollment, EnrollmentSessionLog) objects
 
         Raises:
-            HTTPException: If mission, enrollment, or session creation fails
+            HTTPException: 404 if the creator does not exist, 500 if the transaction fails
         """
-        from app.models.enrollment_session_log import EnrollmentSessionLogCreate
-        from app.services.enrollment_session_log_service import EnrollmentSessionLogService
-
-        # Create the mission first
-        mission = self.create_mission(data)
+        # Mission, enrollment, the creator's enrolled_missions entry and the session log
+        # are committed together, so a failure leaves nothing to roll back
+        mission_ref = self.collection.document()
+        mission_id = mission_ref.id
+        enrollment_id = EnrollmentService._generate_enrollment_id(user_id, mission_id)
+        enrollment_ref = self.enrollments_collection.document(enrollment_id)
+        user_ref = self.db.collection("users").document(user_id)
+        enrolled_mission_ref = self.db.document(f"users/{user_id}/enrolled_missions/{mission_id}")
+        session_log_ref = self.db.collection("enrollment_session_logs").document()
+
+        mission_data = {**data.model_dump(), "id": mission_id}
+        enrollment_data = {
+            "id": enrollment_id,
+            "user_id": user_id,
+            "mission_id": mission_id,
+            "progress": 0.0,
+            "completed": False,
+        }
+        enrolled_mission_data = {
+            "mission_id": mission_id,
+            "mission_title": data.title,
+            "mission_short_description": data.short_description,
+            "mission_skills": data.skills or [],
+            "progress": 0.0,
+            "byte_size_checkpoints": data.byte_size_checkpoints,
+            "completed_checkpoints": [],
+            "completed": False,
+        }
+        session_log_data = {
+            "id": session_log_ref.id,
+            "enrollment_id": enrollment_id,
+            "user_id": user_id,
+            "mission_id": mission_id,
+            "status": "created",
+            "started_at": None,
+            "completed_at": None,
+        }
+
+        @firestore.transactional
+        def create_in_transaction(transaction):
+            user_doc = user_ref.get(transaction=transaction)
+            if not user_doc.exists:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"User with ID '{user_id}' not found.",
+                )
 
-        try:
-            # Auto-enroll the creator in the mission
-            enrollment_service = EnrollmentService(self.db)
-            enrollment_data = EnrollmentCreate(user_id=user_id, mission_id=mission.id, progress=0.0)
-            enrollment = enrollment_service.create_enrollment(enrollment_data)
-
-            # Create enrollment session log for tracking learning sessions
-            enrollment_session_log_service = EnrollmentSessionLogService(self.db)
-            session_log_data = EnrollmentSessionLogCreate(
-                enrollment_id=enrollment.id, user_id=user_id, mission_id=mission.id
+            transaction.set(
+                mission_ref,
+                {
+                    **mission_data,
+                    "enrolled_user_ids": [user_id],
+                    "created_at": SERVER_TIMESTAMP,
+                    "updated_at": SERVER_TIMESTAMP,
+                },
             )
-            enrollment_session_log = enrollment_session_log_service.create_session_log(
-                session_log_data
+            transaction.set(
+                enrollment_ref,
+                {
+                    **enrollment_data,
+                    "enrolled_at": SERVER_TIMESTAMP,
+                    "last_accessed_at": SERVER_TIMESTAMP,
+                    "created_at": SERVER_TIMESTAMP,
+                    "updated_at": SERVER_TIMESTAMP,
+                },
+            )
+            transaction.set(
+                enrolled_mission_ref,
+                {
+                    **enrolled_mission_data,
+                    "enrolled_at": SERVER_TIMESTAMP,
+                    "last_accessed_at": SERVER_TIMESTAMP,
+                    "updated_at": SERVER_TIMESTAMP,
+                },
+            )
+            transaction.set(
+                session_log_ref,
+                {
+                    **session_log_data,
+                    "created_at": SERVER_TIMESTAMP,
+                    "updated_at": SERVER_TIMESTAMP,
+                },
             )
 
-            return mission, enrollment, enrollment_session_log
-
-        except Exception as e:
-            # If enrollment fails, delete the created mission to maintain consistency
-            try:
-                self.delete_mission(mission.id)
-            except Exception:
-                pass  # Best effort cleanup
+        create_in_transaction(self.db.transaction())
+        logger.info(
+            "Created mission '%s' with enrollment '%s' for creator '%s'",
+            mission_id,
+            enrollment_id,
+            user_id,
+        )
 
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to create enrollment: {str(e)}",
-            ) from e
+        # Local approximation of the server-assigned timestamps for the response
+        now = datetime.now(timezone.utc)
+        return (
+            Mission(**mission_data, created_at=now, updated_at=now),
+            Enrollment(
+                **enrollment_data,
+                enrolled_at=now,
+                last_accessed_at=now,
+                created_at=now,
+                updated_at=now,
+            ),
+            EnrollmentSessionLog(**session_log_data, created_at=now, updated_at=now),
+        )
 
-    @handle_firestore_exceptions
     def get_mission(self, mission_id: str) -> Mission:
-        doc = self.collection.document(mission_id).get()
+        doc = self.collection.document(mission_id).get(field_paths=_MISSION_FIELDS)
         if not doc.exists:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -101,10 +240,10 @@ class MissionService:
             )
         return Mission(**doc.to_dict())
 
-    @handle_firestore_exceptions
     def update_mission(self, mission_id: str, data: MissionUpdate) -> Mission:
         doc_ref = self.collection.document(mission_id)
-        doc = doc_ref.get()
+        # Only what change detection and propagation need
+        doc = doc_ref.get(field_paths=[*_PROPAGATED_FIELDS, "enrolled_user_ids"])
 
         if not doc.exists:
             raise HTTPException(
@@ -112,62 +251,186 @@ class MissionService:
                 detail=f"Mission with ID '{mission_id}' not found.",
             )
 
-        update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+        update_data = data.model_dump(exclude_none=True)
         if update_data:
-            update_data["updated_at"] = datetime.today()
+            update_data["updated_at"] = SERVER_TIMESTAMP
             doc_ref.update(update_data)
 
-            if any(key in update_data for key in ["title", "short_description", "skills"]):
-                self._propagate_mission_updates(mission_id, update_data)
+            # Only fan out fields whose value actually changed
+            current_data = doc.to_dict()
+            changed_data = {
+                key: value
+                for key, value in update_data.items()
+                if key in _PROPAGATED_FIELDS and current_data.get(key) != value
+            }
+            if changed_data:
+                self._schedule_propagation(
+                    mission_id, changed_data, current_data.get("enrolled_user_ids")
+                )
 
-        updated_doc = doc_ref.get()
+        updated_doc = doc_ref.get(field_paths=_MISSION_FIELDS)
         return Mission(**updated_doc.to_dict())
 
-    def _propagate_mission_updates(self, mission_id: str, update_data: dict) -> None:
+    def _schedule_propagation(
+        self, mission_id: str, update_data: dict, enrolled_user_ids: list[str] | None
+    ) -> None:
+        """Queue a propagation for the mission, merging into one already pending."""
+        if _PROPAGATION_DEBOUNCE_SECONDS <= 0:
+            self._propagate_mission_updates(mission_id, update_data, enrolled_user_ids)
+            return
+
+        with _pending_propagations_lock:
+            pending = _pending_propagations.get(mission_id)
+            if pending is None:
+                timer = threading.Timer(
+                    _PROPAGATION_DEBOUNCE_SECONDS, _flush_mission_propagation, args=(mission_id,)
+                )
+                timer.daemon = True
+                pending = _pending_propagations[mission_id] = {
+                    "update_data": {},
+                    "service": self,
+                    "timer": timer,
+                }
+                timer.start()
+            # Later values win; the enrolled users list is the most recently read one
+            pending["update_data"].update(update_data)
+            pending["enrolled_user_ids"] = enrolled_user_ids
+
+    def _run_pending_propagation(self, mission_id: str, pending: dict) -> None:
+        """Propagate a merged pending update, logging rather than raising on failure."""
+        try:
+            self._propagate_mission_updates(
+                mission_id, pending["update_data"], pending["enrolled_user_ids"]
+            )
+        except Exception as e:
+            logger.error(
+                "Debounced propagation failed for mission '%s': %s",
+                mission_id,
+                e,
+                exc_info=True,
+            )
+
+    def _propagate_mission_updates(
+        self, mission_id: str, update_data: dict, enrolled_user_ids: list[str] | None = None
+    ) -> None:
         """Propagate mission metadata updates to all enrolled users' subcollections.
 
+        Writes are grouped into WriteBatch commits of up to _PROPAGATION_BATCH_SIZE
+        documents, and full chunks are committed on a thread pool while the
+        enrolled users are still being listed.
+
         Args:
             mission_id: The mission's ID
-            update_data: Mission fields that were updated
+            update_data: Propagated mission fields whose values changed
+            enrolled_user_ids: The mission's denormalized enrolled_user_ids, if tracked.
+                When None, enrolled users are read from the enrollments collection.
         """
-        # Get all enrollments for this mission
-        enrollments = self.enrollments_collection.where(
-            filter=FieldFilter("mission_id", "==", mission_id)
-        ).get()
+        user_update = {
+            _PROPAGATED_FIELDS[key]: value
+            for key, value in update_data.items()
+            if key in _PROPAGATED_FIELDS
+        }
+        user_update["updated_at"] = SERVER_TIMESTAMP
+
+        if enrolled_user_ids is None:
+            user_ids = self._stream_enrolled_user_ids(mission_id)
+        else:
+            user_ids = enrolled_user_ids
 
-        enrollments_list = list(enrollments)
         logger.info(
-            f"Propagating mission updates for mission '{mission_id}' to {len(enrollments_list)} enrolled users. "
-            f"Fields updated: {', '.join(update_data.keys())}"
+            "Propagating mission updates for mission '%s' to enrolled users. Fields updated: %s",
+            mission_id,
+            ", ".join(update_data),
         )
 
         success_count = 0
         error_count = 0
+        futures = []
+        chunk: list[str] = []
+
+        with ThreadPoolExecutor(max_workers=_PROPAGATION_MAX_WORKERS) as executor:
+            for user_id in user_ids:
+                if not user_id:
+                    error_count += 1
+                    continue
+
+                chunk.append(user_id)
+                if len(chunk) == _PROPAGATION_BATCH_SIZE:
+                    futures.append(
+                        executor.submit(
+                            self._commit_propagation_chunk, mission_id, chunk, user_update
+                        )
+                    )
+                    chunk = []
+
+            if chunk:
+                futures.append(
+                    executor.submit(self._commit_propagation_chunk, mission_id, chunk, user_update)
+                )
 
-        # For each enrolled user, update their denormalized mission data
-        for enrollment_doc in enrollments_list:
-            enrollment_data = enrollment_doc.to_dict()
-            user_id = enrollment_data.get("user_id")
+            for future in futures:
+                chunk_success, chunk_errors = future.result()
+                success_count += chunk_success
+                error_count += chunk_errors
 
+        logger.info(
+            "Mission update propagation completed for mission '%s'. Success: %d, Errors: %d",
+            mission_id,
+            success_count,
+            error_count,
+        )
+
+    def _stream_enrolled_user_ids(self, mission_id: str):
+        """Yield user IDs from the mission's enrollments, or None for malformed enrollments."""
+        # Stream enrollments for this mission so updates start before the query drains
+        enrollments = self.enrollments_collection.where(
+            filter=FieldFilter("mission_id", "==", mission_id)
+        ).stream()
+
+        for enrollment_doc in enrollments:
+            user_id = enrollment_doc.to_dict().get("user_id")
             if not user_id:
                 logger.warning(
-                    f"Skipping enrollment '{enrollment_doc.id}' for mission '{mission_id}': "
-                    f"missing user_id"
+                    "Skipping enrollment '%s' for mission '%s': missing user_id",
+                    enrollment_doc.id,
+                    mission_id,
                 )
-                error_count += 1
-                continue
+            yield user_id
 
-            # Construct UserEnrolledMissionUpdate with only mission metadata fields
-            user_update_data = UserEnrolledMissionUpdate()
+    def _commit_propagation_chunk(
+        self, mission_id: str, user_ids: list[str], user_update: dict
+    ) -> tuple[int, int]:
+        """Commit one chunk of enrolled-mission updates as a single WriteBatch.
 
-            if "title" in update_data:
-                user_update_data.mission_title = update_data["title"]
-            if "short_description" in update_data:
-                user_update_data.mission_short_description = update_data["short_description"]
-            if "skills" in update_data:
-                user_update_data.mission_skills = update_data["skills"]
+        A batch fails as a whole if any document is missing, so on failure the
+        chunk is retried per user to isolate the inconsistent subcollection entries.
+
+        Returns:
+            Tuple of (success_count, error_count) for the chunk
+        """
+        batch = self.db.batch()
+        for user_id in user_ids:
+            batch.update(
+                self.db.document(f"users/{user_id}/enrolled_missions/{mission_id}"), user_update
+            )
+
+        try:
+            batch.commit()
+            return len(user_ids), 0
+        except Exception as e:
+            logger.warning(
+                "Batch propagation failed for mission '%s' (%d users): %s. Retrying per user.",
+                mission_id,
+                len(user_ids),
+                e,
+            )
 
-            # Update the user's enrolled mission
+        user_update_data = UserEnrolledMissionUpdate(
+            **{key: value for key, value in user_update.items() if key != "updated_at"}
+        )
+        success_count = 0
+        error_count = 0
+        for user_id in user_ids:
             try:
                 self.user_service.update_enrolled_mission(
                     user_id=user_id, mission_id=mission_id, data=user_update_data
@@ -176,77 +439,71 @@ class MissionService:
             except HTTPException as e:
                 # If user's enrolled mission not found, skip (edge case)
                 logger.warning(
-                    f"Failed to update enrolled mission for user '{user_id}' and mission '{mission_id}': "
-                    f"{e.detail}. This may indicate data inconsistency between enrollments and user subcollections."
+                    "Failed to update enrolled mission for user '%s' and mission '%s': "
+                    "%s. This may indicate data inconsistency between enrollments and user subcollections.",
+                    user_id,
+                    mission_id,
+                    e.detail,
                 )
                 error_count += 1
             except Exception as e:
                 logger.error(
-                    f"Unexpected error updating enrolled mission for user '{user_id}' and mission '{mission_id}': "
-                    f"{str(e)}",
+                    "Unexpected error updating enrolled mission for user '%s' and mission '%s': %s",
+                    user_id,
+                    mission_id,
+                    e,
                     exc_info=True,
                 )
                 error_count += 1
+        return success_count, error_count
 
-        logger.info(
-            f"Mission update propagation completed for mission '{mission_id}'. "
-            f"Success: {success_count}, Errors: {error_count}"
-        )
-
-    @handle_firestore_exceptions
     def delete_mission(self, mission_id: str) -> dict:
         doc_ref = self.collection.document(mission_id)
-        doc = doc_ref.get()
 
-        if not doc.exists:
+        # The exists precondition makes a missing mission fail the delete itself
+        try:
+            doc_ref.delete(option=self.db.write_option(exists=True))
+        except NotFound as e:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Mission with ID '{mission_id}' not found.",
-            )
+            ) from e
 
-        # Delete all checkpoints subcollection
-        checkpoints = doc_ref.collection("checkpoints").get()
+        # Delete all checkpoints subcollection (not removed with the parent document)
+        checkpoints = self.db.collection(f"missions/{mission_id}/checkpoints").get()
         for checkpoint in checkpoints:
             checkpoint.reference.delete()
 
-        doc_ref.delete()
         return {"message": f"Mission '{mission_id}' deleted successfully."}
 
-    @handle_firestore_exceptions
-    def get_missions_by_creator(self, creator_id: str, limit: int = 100) -> list[Mission]:
-        """Get all missions created by a specific user."""
-        docs = (
-            self.collection.where(filter=FieldFilter("creator_id", "==", creator_id))
-            .limit(limit)
-            .get()
+    def get_missions_by_creator(
+        self, creator_id: str, is_public: bool | None = None, limit: int = 100
+    ) -> list[Mission]:
+        """Get missions created by a specific user, newest first, optionally by visibility."""
+        query = self.collection.where(filter=FieldFilter("creator_id", "==", creator_id))
+        if is_public is not None:
+            query = query.where(filter=FieldFilter("is_public", "==", is_public))
+        # Backed by the (creator_id[, is_public], created_at DESC) composite indexes
+        docs = query.order_by("created_at", direction=firestore.Query.DESCENDING).limit(limit)
+        return _MISSION_LIST.validate_python(
+            [doc.to_dict() for doc in docs.select(_MISSION_FIELDS).stream()]
         )
-        return [Mission(**doc.to_dict()) for doc in docs]
 
-    @handle_firestore_exceptions
     def get_public_missions(self, limit: int = 100, offset: int = 0) -> list[Mission]:
         """Get all public missions with pagination."""
         query = self.collection.where(filter=FieldFilter("is_public", "==", True)).limit(limit)
         if offset > 0:
-            docs = list(
+            # Only the last skipped snapshot is needed as the cursor
+            skipped = deque(
                 self.collection.where(filter=FieldFilter("is_public", "==", True))
                 .limit(offset)
-                .get()
+                .select([])
+                .stream(),
+                maxlen=1,
             )
-            if docs:
-                query = query.start_after(docs[-1])
-
-        docs = query.get()
-        return [Mission(**doc.to_dict()) for doc in docs]
+            if skipped:
+                query = query.start_after(skipped[0])
 
-    @handle_firestore_exceptions
-    def get_missions_by_creator_and_visibility(
-        self, creator_id: str, is_public: bool, limit: int = 100
-    ) -> list[Mission]:
-        """Get missions by creator filtered by visibility (public/private)."""
-        docs = (
-            self.collection.where(filter=FieldFilter("creator_id", "==", creator_id))
-            .where(filter=FieldFilter("is_public", "==", is_public))
-            .limit(limit)
-            .get()
+        return _MISSION_LIST.validate_python(
+            [doc.to_dict() for doc in query.select(_MISSION_FIELDS).stream()]
         )
-        return [Mission(**doc.to_dict()) for doc in docs]
@@ -1,9 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
 from fastapi import HTTPException, status
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore import SERVER_TIMESTAMP
+from pydantic import TypeAdapter
 
 from app.models.session_log import SessionLog, SessionLogCreate, SessionLogUpdate
-from app.utils.firestore_exception import handle_firestore_exceptions
+
+
+_SESSION_LOG_LIST = TypeAdapter(list[SessionLog])
 
 
 class SessionLogService:
@@ -13,7 +18,6 @@ class SessionLogService:
         self.db = db
         self.collection = db.collection("session_logs")
 
-    @handle_firestore_exceptions
     def create_session(self, data: SessionLogCreate) -> SessionLog:
         """
         Create a new session log entry.
@@ -32,22 +36,22 @@ class SessionLogService:
         doc_ref = self.collection.document()
 
         # Create session log with auto-generated ID
-        now = datetime.now()
         session_data = {
             **data.model_dump(),
             "id": doc_ref.id,
             "status": "active",
             "mission_id": None,
-            "created_at": now,
-            "updated_at": now,
             "completed_at": None,
         }
 
-        doc_ref.set(session_data)
+        doc_ref.set(
+            {**session_data, "created_at": SERVER_TIMESTAMP, "updated_at": SERVER_TIMESTAMP}
+        )
 
-        return SessionLog(**session_data)
+        # Local approximation of the server-assigned timestamps for the response
+        now = datetime.now(timezone.utc)
+        return SessionLog(**session_data, created_at=now, updated_at=now)
 
-    @handle_firestore_exceptions
     def get_session(self, session_id: str) -> SessionLog:
         """
         Retrieve a session log by session ID.
@@ -70,7 +74,6 @@ class SessionLogService:
 
         return SessionLog(**doc.to_dict())
 
-    @handle_firestore_exceptions
     def update_session(self, session_id: str, data: SessionLogUpdate) -> SessionLog:
         """
         Update an existing session log.
@@ -95,17 +98,16 @@ class SessionLogService:
             )
 
         # Build update data (only include non-None values)
-        update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+        update_data = data.model_dump(exclude_none=True)
 
         if update_data:
-            update_data["updated_at"] = datetime.now()
+            update_data["updated_at"] = SERVER_TIMESTAMP
             doc_ref.update(update_data)
 
         # Get updated document
         updated_doc = doc_ref.get()
         return SessionLog(**updated_doc.to_dict())
 
-    @handle_firestore_exceptions
     def mark_session_completed(self, session_id: str, mission_id: str | None = None) -> SessionLog:
         """
         Mark a session as completed.
@@ -118,11 +120,10 @@ class SessionLogService:
             SessionLog: Updated session log
         """
         update_data = SessionLogUpdate(
-            status="completed", mission_id=mission_id, completed_at=datetime.now()
+            status="completed", mission_id=mission_id, completed_at=datetime.now(timezone.utc)
         )
         return self.update_session(session_id, update_data)
 
-    @handle_firestore_exceptions
     def mark_session_error(self, session_id: str) -> SessionLog:
         """
         Mark a session as having encountered an error.
@@ -136,7 +137,6 @@ class SessionLogService:
         update_data = SessionLogUpdate(status="error")
         return self.update_session(session_id, update_data)
 
-    @handle_firestore_exceptions
     def mark_session_abandoned(self, session_id: str) -> SessionLog:
         """
         Mark a session as abandoned (user disconnected without completing).
@@ -150,7 +150,6 @@ class SessionLogService:
         update_data = SessionLogUpdate(status="abandoned")
         return self.update_session(session_id, update_data)
 
-    @handle_firestore_exceptions
     def get_user_sessions(self, user_id: str, limit: int = 50) -> list[SessionLog]:
         """
         Get all sessions for a specific user.
@@ -168,12 +167,11 @@ class SessionLogService:
             self.collection.where(filter=FieldFilter("user_id", "==", user_id))
             .order_by("created_at", direction="DESCENDING")
             .limit(limit)
-            .get()
+            .stream()
         )
 
-        return [SessionLog(**doc.to_dict()) for doc in docs]
+        return _SESSION_LOG_LIST.validate_python([doc.to_dict() for doc in docs])
 
-    @handle_firestore_exceptions
     def delete_session(self, session_id: str) -> dict:
         """
         Delete a session log (use sparingly, prefer marking as completed/abandoned).
@@ -188,13 +186,14 @@ class SessionLogService:
             HTTPException: 404 if session not found
         """
         doc_ref = self.collection.document(session_id)
-        doc = doc_ref.get()
 
-        if not doc.exists:
+        # The exists precondition makes a missing document fail the delete itself
+        try:
+            doc_ref.delete(option=self.db.write_option(exists=True))
+        except NotFound as e:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Session with ID '{session_id}' not found.",
-            )
+            ) from e
 
-        doc_ref.delete()
         return {"message": f"Session '{session_id}' deleted successfully."}
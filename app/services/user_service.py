@@ -1,7 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timezone
+import hashlib
+import threading
 
+from cachetools import TTLCache
 from fastapi import HTTPException, status
+from google.api_core.exceptions import AlreadyExists, NotFound
+from google.cloud import firestore
+from google.cloud.firestore import SERVER_TIMESTAMP
 from google.cloud.firestore_v1.base_query import FieldFilter
+from pydantic import AnyUrl
 
 from app.models.user import (
     User,
@@ -11,7 +18,56 @@ from app.models.user import (
     UserEnrolledMissionUpdate,
     UserUpdate,
 )
-from app.utils.firestore_exception import handle_firestore_exceptions
+
+
+# Process-wide cache for email lookups. UserService is constructed per request,
+# so the cache lives at module level to collapse duplicate sign-in lookups.
+_email_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+_email_cache_lock = threading.Lock()
+
+# Firestore caps a single commit at 500 writes
+_BATCH_WRITE_LIMIT = 500
+
+
+def _normalize_email(email: str) -> str:
+    """Canonical form of an email for cache keys and document IDs."""
+    return email.strip().lower()
+
+
+def _cache_user(user: User) -> None:
+    with _email_cache_lock:
+        _email_cache[_normalize_email(user.email)] = user
+
+
+def _invalidate_cached_email(email: str) -> None:
+    with _email_cache_lock:
+        _email_cache.pop(_normalize_email(email), None)
+
+
+def _email_doc_id(email: str) -> str:
+    """Deterministic user document ID derived from an already normalized email."""
+    return hashlib.sha256(email.encode()).hexdigest()
+
+
+def _user_from_doc(data: dict) -> User:
+    """Build a User from a stored document without re-running validation.
+
+    Documents are written from validated models, so only the picture URL (stored as a
+    string) needs converting back for clean serialization.
+    """
+    picture = data.get("picture")
+    if isinstance(picture, str):
+        data = {**data, "picture": AnyUrl(picture)}
+    return User.model_construct(**data)
+
+
+def _user_create_data(data: UserCreate) -> dict:
+    """Native-mode dump of a new user with its email normalized and picture URL as a string."""
+    user_data = data.model_dump()
+    user_data["email"] = _normalize_email(user_data["email"])
+    if user_data["picture"] is not None:
+        user_data["picture"] = str(user_data["picture"])
+    return user_data
 
 
 class UserService:
@@ -19,37 +75,59 @@ class UserService:
         self.db = db
         self.collection = db.collection("users")
 
-    @handle_firestore_exceptions
-    def create_user(self, data: UserCreate) -> User:
-        existing = None
-        try:
-            existing = self.get_user_by_email(data.email)
-        except HTTPException as e:
-            if e.status_code != status.HTTP_404_NOT_FOUND:
-                raise
+    def _enrolled_ref(self, user_id: str, mission_id: str):
+        """Reference to users/{user_id}/enrolled_missions/{mission_id}, built from its path."""
+        return self.db.document(f"users/{user_id}/enrolled_missions/{mission_id}")
 
-        if existing:
+    def create_user(self, data: UserCreate) -> User:
+        email = _normalize_email(data.email)
+        with _email_cache_lock:
+            cached = email in _email_cache
+        if cached:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="A user with this email already exists.",
             )
 
-        doc_ref = self.collection.document()
+        # Key the document by email so lookups are point reads and duplicates fail atomically
+        doc_ref = self.collection.document(_email_doc_id(email))
+        # Users created before email-keyed IDs live under auto-generated document IDs and
+        # store the email as received, so match that form rather than the normalized key
+        legacy_query = self.collection.where(filter=FieldFilter("email", "==", data.email)).limit(1)
 
         # Create User object with id and timestamps
-        now = datetime.now()
-        user_data = {
-            **data.model_dump(mode="json"),
-            "id": doc_ref.id,
-            "created_at": now,
-            "updated_at": now,
-        }
+        user_data = {**_user_create_data(data), "id": doc_ref.id}
+
+        @firestore.transactional
+        def create_in_transaction(transaction):
+            # Reads inside the transaction make a concurrent signup for the same email retry
+            # and observe the committed user instead of racing it
+            existing = doc_ref.get(transaction=transaction).exists or any(
+                True for _ in legacy_query.stream(transaction=transaction)
+            )
+            if existing:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="A user with this email already exists.",
+                )
+            transaction.create(
+                doc_ref,
+                {**user_data, "created_at": SERVER_TIMESTAMP, "updated_at": SERVER_TIMESTAMP},
+            )
 
-        doc_ref.set(user_data)
+        try:
+            create_in_transaction(self.db.transaction())
+        except AlreadyExists as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A user with this email already exists.",
+            ) from e
+        _invalidate_cached_email(email)
 
-        return User(**user_data)
+        # Local approximation of the server-assigned timestamps for the response
+        now = datetime.now(timezone.utc)
+        return User(**user_data, created_at=now, updated_at=now)
 
-    @handle_firestore_exceptions
     def get_user(self, user_id: str) -> User:
         doc = self.collection.document(user_id).get()
         if not doc.exists:
@@ -58,41 +136,84 @@ class UserService:
                 detail=f"User with ID '{user_id}' not found.",
             )
 
-        return User(**doc.to_dict())
+        return _user_from_doc(doc.to_dict())
+
+    def _try_get_user_by_email(self, email: str) -> User | None:
+        key = _normalize_email(email)
+        with _email_cache_lock:
+            cached = _email_cache.get(key)
+        if cached is not None:
+            return cached.model_copy()
+
+        doc = self.collection.document(_email_doc_id(key)).get()
+        if doc.exists:
+            user = _user_from_doc(doc.to_dict())
+            _cache_user(user)
+            return user.model_copy()
+
+        # Users created before email-keyed IDs live under auto-generated document IDs and
+        # store the email as received, so match that form rather than the normalized key
+        query = self.collection.where(filter=FieldFilter("email", "==", email)).limit(1)
+        doc = next(iter(query.stream()), None)
+        if doc is None:
+            return None
+        user = _user_from_doc(doc.to_dict())
+        _cache_user(user)
+        return user.model_copy()
+
+    def _create_user_unchecked(self, data: UserCreate) -> User:
+        """Create the email-keyed user document without looking for an existing user.
+
+        Raises AlreadyExists if the document was created in the meantime.
+        """
+        user_data = _user_create_data(data)
+        doc_ref = self.collection.document(_email_doc_id(user_data["email"]))
+        user_data["id"] = doc_ref.id
+        doc_ref.create(
+            {**user_data, "created_at": SERVER_TIMESTAMP, "updated_at": SERVER_TIMESTAMP}
+        )
+        _invalidate_cached_email(user_data["email"])
+
+        now = datetime.now(timezone.utc)
+        return User(**user_data, created_at=now, updated_at=now)
 
-    @handle_firestore_exceptions
     def get_user_by_email(self, email: str) -> User:
-        docs = self.collection.where(filter=FieldFilter("email", "==", email)).limit(1).get()
-        for doc in docs:
-            return User(**doc.to_dict())
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"User with email '{email}' not found.",
-        )
+        user = self._try_get_user_by_email(email)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User with email '{email}' not found.",
+            )
+        return user
 
-    @handle_firestore_exceptions
     def get_or_create_user(self, data: UserCreate) -> User:
+        user = self._try_get_user_by_email(data.email)
+        if user is not None:
+            return user
         try:
-            return self.get_user_by_email(data.email)
-        except HTTPException as e:
-            if e.status_code == status.HTTP_404_NOT_FOUND:
-                return self.create_user(data)
-            else:
+            return self._create_user_unchecked(data)
+        except AlreadyExists:
+            # A concurrent sign-in for the same email created the user first
+            user = self._try_get_user_by_email(data.email)
+            if user is None:
                 raise
+            return user
 
-    @handle_firestore_exceptions
-    def get_enrolled_missions(self, user_id: str, limit: int = 100) -> list[UserEnrolledMission]:
-        docs = self.collection.document(user_id).collection("enrolled_missions").limit(limit).get()
-        return [UserEnrolledMission(**doc.to_dict()) for doc in docs]
+    def get_enrolled_missions(
+        self, user_id: str, limit: int = 100, fields: list[str] | None = None
+    ) -> list[UserEnrolledMission] | list[dict]:
+        """List a user's enrolled missions.
+
+        With `fields`, only those fields are fetched and plain dicts are returned, for
+        callers that don't need full UserEnrolledMission models.
+        """
+        query = self.collection.document(user_id).collection("enrolled_missions").limit(limit)
+        if fields:
+            return [doc.to_dict() for doc in query.select(fields).stream()]
+        return [UserEnrolledMission.model_construct(**doc.to_dict()) for doc in query.stream()]
 
-    @handle_firestore_exceptions
     def get_enrolled_mission(self, user_id: str, mission_id: str) -> UserEnrolledMission:
-        doc = (
-            self.collection.document(user_id)
-            .collection("enrolled_missions")
-            .document(mission_id)
-            .get()
-        )
+        doc = self._enrolled_ref(user_id, mission_id).get()
 
         if not doc.exists:
             raise HTTPException(
@@ -100,21 +221,37 @@ class UserService:
                 detail=f"Enrolled mission '{mission_id}' not found for user '{user_id}'.",
             )
 
-        return UserEnrolledMission(**doc.to_dict())
+        return UserEnrolledMission.model_construct(**doc.to_dict())
+
+    def get_enrolled_missions_by_ids(
+        self, user_id: str, mission_ids: list[str]
+    ) -> list[UserEnrolledMission]:
+        """Fetch several enrolled missions in one BatchGetDocuments call.
+
+        Missing enrollments are skipped; results follow the order of mission_ids.
+        """
+        if not mission_ids:
+            return []
+
+        refs = [
+            self._enrolled_ref(user_id, mission_id) for mission_id in dict.fromkeys(mission_ids)
+        ]
+        # get_all streams snapshots back in arbitrary order
+        found = {snap.id: snap.to_dict() for snap in self.db.get_all(refs) if snap.exists}
+        return [
+            UserEnrolledMission.model_construct(**found[mission_id])
+            for mission_id in dict.fromkeys(mission_ids)
+            if mission_id in found
+        ]
 
-    @handle_firestore_exceptions
     def create_enrolled_mission(
         self,
         user_id: str,
         data: UserEnrolledMissionCreate,
     ) -> UserEnrolledMission:
         # Check if already exists
-        existing_doc = (
-            self.collection.document(user_id)
-            .collection("enrolled_missions")
-            .document(data.mission_id)
-            .get()
-        )
+        user_enrolled_ref = self._enrolled_ref(user_id, data.mission_id)
+        existing_doc = user_enrolled_ref.get()
 
         if existing_doc.exists:
             raise HTTPException(
@@ -124,56 +261,92 @@ class UserService:
 
         # Prepare data with timestamps
         enrolled_data = data.model_dump()
-        enrolled_data["updated_at"] = datetime.today()
 
         # Create document
-        user_enrolled_ref = (
-            self.collection.document(user_id)
-            .collection("enrolled_missions")
-            .document(data.mission_id)
-        )
-        user_enrolled_ref.set(enrolled_data)
+        user_enrolled_ref.set({**enrolled_data, "updated_at": SERVER_TIMESTAMP})
+
+        return UserEnrolledMission(**enrolled_data, updated_at=datetime.now(timezone.utc))
+
+    def create_enrolled_missions_bulk(
+        self,
+        user_id: str,
+        data_list: list[UserEnrolledMissionCreate],
+    ) -> list[UserEnrolledMission]:
+        """Create several enrolled missions for a user in batched commits.
+
+        Missions the user is already enrolled in are skipped, so their progress is kept;
+        only the newly created entries are returned. Existence is checked with one
+        BatchGetDocuments call per chunk instead of a read per mission.
 
-        return UserEnrolledMission(**enrolled_data)
+        Raises:
+            HTTPException: 400 if an entry is created concurrently between the check and
+                the commit
+        """
+        created = []
+        enrolled_data_list = [data.model_dump() for data in data_list]
+        for start in range(0, len(enrolled_data_list), _BATCH_WRITE_LIMIT):
+            chunk = {
+                enrolled_data["mission_id"]: enrolled_data
+                for enrolled_data in enrolled_data_list[start : start + _BATCH_WRITE_LIMIT]
+            }
+            refs = {mission_id: self._enrolled_ref(user_id, mission_id) for mission_id in chunk}
+            existing = {snap.id for snap in self.db.get_all(list(refs.values())) if snap.exists}
+            new_ids = [mission_id for mission_id in chunk if mission_id not in existing]
+            if not new_ids:
+                continue
+
+            batch = self.db.batch()
+            for mission_id in new_ids:
+                batch.create(
+                    refs[mission_id], {**chunk[mission_id], "updated_at": SERVER_TIMESTAMP}
+                )
+            try:
+                batch.commit()
+            except AlreadyExists as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"User '{user_id}' was enrolled in one of these missions concurrently.",
+                ) from e
+            created.extend(chunk[mission_id] for mission_id in new_ids)
+
+        now = datetime.now(timezone.utc)
+        return [UserEnrolledMission(**enrolled_data, updated_at=now) for enrolled_data in created]
 
-    @handle_firestore_exceptions
     def update_enrolled_mission(
         self,
         user_id: str,
         mission_id: str,
         data: UserEnrolledMissionUpdate,
     ) -> UserEnrolledMission:
-        user_enrolled_ref = (
-            self.collection.document(user_id).collection("enrolled_missions").document(mission_id)
+        user_enrolled_ref = self._enrolled_ref(user_id, mission_id)
+        not_found = HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Enrolled mission '{mission_id}' not found for user '{user_id}'.",
         )
 
-        doc = user_enrolled_ref.get()
-        if not doc.exists:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Enrolled mission '{mission_id}' not found for user '{user_id}'.",
-            )
-
         # Only include non-None fields
-        update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+        update_data = data.model_dump(exclude_none=True)
 
         if update_data:
-            update_data["updated_at"] = datetime.today()
-            user_enrolled_ref.update(update_data)
+            update_data["updated_at"] = SERVER_TIMESTAMP
+            # update() requires the document to exist, so it doubles as the existence check
+            try:
+                user_enrolled_ref.update(update_data)
+            except NotFound as e:
+                raise not_found from e
 
         # Fetch and return updated document
         updated_doc = user_enrolled_ref.get()
-        return UserEnrolledMission(**updated_doc.to_dict())
+        if not updated_doc.exists:
+            raise not_found
+        return UserEnrolledMission.model_construct(**updated_doc.to_dict())
 
-    @handle_firestore_exceptions
     def delete_enrolled_mission(
         self,
         user_id: str,
         mission_id: str,
     ) -> dict:
-        user_enrolled_ref = (
-            self.collection.document(user_id).collection("enrolled_missions").document(mission_id)
-        )
+        user_enrolled_ref = self._enrolled_ref(user_id, mission_id)
 
         doc = user_enrolled_ref.get()
         if not doc.exists:
@@ -188,38 +361,38 @@ class UserService:
             "message": f"Enrolled mission '{mission_id}' deleted successfully for user '{user_id}'."
         }
 
-    @handle_firestore_exceptions
     def update_user(self, user_id: str, data: UserUpdate) -> User:
         """Update user profile information."""
         user_ref = self.collection.document(user_id)
-
-        doc = user_ref.get()
-        if not doc.exists:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"User with ID '{user_id}' not found.",
-            )
+        not_found = HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID '{user_id}' not found.",
+        )
 
         # Only include non-None fields
-        update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+        update_data = data.model_dump(exclude_none=True)
 
         if update_data:
-            update_data["updated_at"] = datetime.now()
-            user_ref.update(update_data)
+            update_data["updated_at"] = SERVER_TIMESTAMP
+            try:
+                user_ref.update(update_data)
+            except NotFound as e:
+                raise not_found from e
 
         # Fetch and return updated document
         updated_doc = user_ref.get()
-        return User(**updated_doc.to_dict())
+        if not updated_doc.exists:
+            raise not_found
+        user = _user_from_doc(updated_doc.to_dict())
+        _invalidate_cached_email(user.email)
+        return user
 
-    @handle_firestore_exceptions
     def get_first_user(self) -> User | None:
         """
         TEMP: Get the first user from the database (for testing purposes only).
         This should be removed when proper authentication is implemented.
         """
-        docs = self.collection.limit(1).get()
-        for doc in docs:
-            user_data = doc.to_dict()
-            user_data["id"] = doc.id
-            return User(**user_data)
-        return None
+        doc = next(iter(self.collection.limit(1).stream()), None)
+        if doc is None:
+            return None
+        return _user_from_doc({**doc.to_dict(), "id": doc.id})
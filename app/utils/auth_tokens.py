@@ -0,0 +1,81 @@
+"""Short-lived cache of verified Firebase token claims.
+
+Verifying a session cookie or ID token costs a signature check and, with
+check_revoked=True, a revocation lookup. Requests in a burst reuse the same
+token, so verified claims are kept until shortly before the token expires,
+capped at MAX_CLAIMS_TTL_SECONDS so revocations still take effect quickly.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+
+from cachetools import TLRUCache
+
+
+MAX_CLAIMS_TTL_SECONDS = 300
+# Stop serving cached claims this long before the token's own expiry
+EXPIRY_MARGIN_SECONDS = 30
+
+
+def bearer_token(auth_header: str | None) -> str | None:
+    """Extract the token from an `Authorization: Bearer <token>` header value."""
+    scheme, sep, token = (auth_header or "").partition(" ")
+    if not sep or scheme.lower() != "bearer" or not token:
+        return None
+    return token
+
+
+def unverified_claims(token: str) -> dict | None:
+    """Decode a JWT's payload without checking its signature.
+
+    Only fit for rejecting tokens early (e.g. already expired); anything accepted must
+    still go through Firebase verification. Returns None if the token is not a JWT.
+    """
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    payload = parts[1]
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except ValueError:
+        return None
+    return claims if isinstance(claims, dict) else None
+
+
+def _claims_ttu(_key: bytes, claims: dict, now: float) -> float:
+    # `now` is the cache's monotonic clock while `exp` is epoch seconds, so convert via
+    # the remaining lifetime rather than comparing them directly
+    remaining = claims["exp"] - time.time() - EXPIRY_MARGIN_SECONDS
+    return now + min(MAX_CLAIMS_TTL_SECONDS, remaining)
+
+
+_claims_cache: TLRUCache = TLRUCache(maxsize=10_000, ttu=_claims_ttu)
+_claims_cache_lock = threading.Lock()
+
+
+def _token_key(token: str) -> bytes:
+    """Fixed-size cache key so raw tokens are never held in memory as dict keys."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def get_cached_claims(token: str) -> dict | None:
+    """Return previously verified claims for the token, if still fresh."""
+    with _claims_cache_lock:
+        return _claims_cache.get(_token_key(token))
+
+
+def cache_claims(token: str, claims: dict) -> None:
+    """Remember verified claims for the token until shortly before it expires."""
+    exp = claims.get("exp")
+    if not isinstance(exp, int | float) or exp - time.time() <= EXPIRY_MARGIN_SECONDS:
+        return
+    with _claims_cache_lock:
+        _claims_cache[_token_key(token)] = claims
+
+
+def clear_cached_claims() -> None:
+    with _claims_cache_lock:
+        _claims_cache.clear()
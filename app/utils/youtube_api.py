@@ -1,20 +1,29 @@
 """YouTube Data API v3 integration for fetching educational videos."""
 
+import copy
 import re
 from typing import Any
 
+from cachetools import TTLCache
 import httpx
 
 from app.core.config import settings
 
 
+_ISO8601_RE = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+_DURATION_UNITS = (("H", 3600), ("M", 60), ("S", 1))
+
+# Search results for the same mission keywords repeat a lot; each miss costs quota and latency
+_YT_CACHE: TTLCache = TTLCache(maxsize=2048, ttl=3600)
+
+
 class YouTubeAPIError(Exception):
     """Custom exception for YouTube API errors."""
 
     pass
 
 
-def search_youtube_videos(
+async def search_youtube_videos(
     query: str,
     max_results: int = 3,
     duration_filter: str | None = None,
@@ -49,6 +58,11 @@ def search_youtube_videos(
     if not api_key:
         raise YouTubeAPIError("YouTube API key not found. Set YOUTUBE_API_KEY in the settings.")
 
+    cache_key = (query, max_results, duration_filter, video_category_id)
+    cached = _YT_CACHE.get(cache_key)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
     # Build search parameters
     search_params = {
         "part": "snippet",
@@ -64,29 +78,30 @@ def search_youtube_videos(
         search_params["videoDuration"] = duration_filter
 
     try:
-        # Search for videos
-        search_url = "https://www.googleapis.com/youtube/v3/search"
-        with httpx.Client(timeout=10.0) as client:
-            search_response = client.get(search_url, params=search_params)
+        # One client per call: the tool runs on a fresh event loop each time, so a pooled
+        # client can't outlive it. The search and videos requests still share a connection.
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            # Search for videos
+            search_url = "https://www.googleapis.com/youtube/v3/search"
+            search_response = await client.get(search_url, params=search_params)
             search_response.raise_for_status()
             search_data = search_response.json()
 
-        if "items" not in search_data or not search_data["items"]:
-            return []
+            if "items" not in search_data or not search_data["items"]:
+                return []
 
-        # Extract video IDs
-        video_ids = [item["id"]["videoId"] for item in search_data["items"]]
+            # Extract video IDs
+            video_ids = [item["id"]["videoId"] for item in search_data["items"]]
 
-        # Get detailed video information (duration, statistics, etc.)
-        videos_params = {
-            "part": "contentDetails,snippet,statistics",
-            "id": ",".join(video_ids),
-            "key": api_key,
-        }
+            # Get detailed video information (duration, statistics, etc.)
+            videos_params = {
+                "part": "contentDetails,snippet,statistics",
+                "id": ",".join(video_ids),
+                "key": api_key,
+            }
 
-        videos_url = "https://www.googleapis.com/youtube/v3/videos"
-        with httpx.Client(timeout=10.0) as client:
-            videos_response = client.get(videos_url, params=videos_params)
+            videos_url = "https://www.googleapis.com/youtube/v3/videos"
+            videos_response = await client.get(videos_url, params=videos_params)
             videos_response.raise_for_status()
             videos_data = videos_response.json()
 
@@ -94,30 +109,9 @@ def search_youtube_videos(
             return []
 
         # Parse and format video information
-        videos = []
-        for video_item in videos_data["items"]:
-            snippet = video_item.get("snippet", {})
-            content_details = video_item.get("contentDetails", {})
-            statistics = video_item.get("statistics", {})
-
-            # Parse duration (ISO 8601 format like "PT5M30S")
-            duration_str = content_details.get("duration", "PT0S")
-            duration_seconds = _parse_iso8601_duration(duration_str)
-
-            video_info = {
-                "video_id": video_item["id"],
-                "title": snippet.get("title", ""),
-                "channel": snippet.get("channelTitle", ""),
-                "description": snippet.get("description", ""),
-                "duration_seconds": duration_seconds,
-                "duration_formatted": _format_duration(duration_seconds),
-                "published_at": snippet.get("publishedAt", ""),
-                "thumbnail_url": snippet.get("thumbnails", {}).get("medium", {}).get("url", ""),
-                "view_count": int(statistics.get("viewCount", 0)),
-                "url": f"https://www.youtube.com/watch?v={video_item['id']}",
-            }
-            videos.append(video_info)
+        videos = [_video_info(video_item) for video_item in videos_data["items"]]
 
+        _YT_CACHE[cache_key] = copy.deepcopy(videos)
         return videos
 
     except httpx.HTTPStatusError as e:
@@ -129,6 +123,35 @@ def search_youtube_videos(
         raise YouTubeAPIError(f"YouTube API error: {str(e)}") from e
 
 
+def _video_info(video_item: dict[str, Any]) -> dict[str, Any]:
+    """Flatten one /videos API item into the video dict returned by search_youtube_videos."""
+    snippet = video_item.get("snippet", {})
+    video_id = video_item["id"]
+
+    # Parse duration (ISO 8601 format like "PT5M30S")
+    duration_seconds = _parse_iso8601_duration(
+        video_item.get("contentDetails", {}).get("duration", "PT0S")
+    )
+
+    try:
+        thumbnail_url = snippet["thumbnails"]["medium"]["url"]
+    except KeyError:
+        thumbnail_url = ""
+
+    return {
+        "video_id": video_id,
+        "title": snippet.get("title", ""),
+        "channel": snippet.get("channelTitle", ""),
+        "description": snippet.get("description", ""),
+        "duration_seconds": duration_seconds,
+        "duration_formatted": _format_duration(duration_seconds),
+        "published_at": snippet.get("publishedAt", ""),
+        "thumbnail_url": thumbnail_url,
+        "view_count": int(video_item.get("statistics", {}).get("viewCount", 0)),
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+    }
+
+
 def _parse_iso8601_duration(duration: str) -> int:
     """
     Parse ISO 8601 duration string (e.g., 'PT5M30S') to seconds.
@@ -139,8 +162,22 @@ def _parse_iso8601_duration(duration: str) -> int:
     Returns:
         Duration in seconds
     """
-    pattern = r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?"
-    match = re.match(pattern, duration)
+    # Fast path for the plain "PT#H#M#S" forms YouTube returns for regular videos
+    if duration.startswith("PT"):
+        rest = duration[2:]
+        total = 0
+        for unit, multiplier in _DURATION_UNITS:
+            head, sep, tail = rest.partition(unit)
+            if sep:
+                if not head.isdecimal():
+                    break
+                total += int(head) * multiplier
+                rest = tail
+        else:
+            if not rest:
+                return total
+
+    match = _ISO8601_RE.match(duration)
 
     if not match:
         return 0
@@ -162,10 +199,6 @@ def _format_duration(seconds: int) -> str:
     Returns:
         Formatted string like "5:30" or "1:15:00"
     """
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    secs = seconds % 60
-
-    if hours > 0:
-        return f"{hours}:{minutes:02d}:{secs:02d}"
-    return f"{minutes}:{secs:02d}"
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
@@ -0,0 +1,21 @@
+"""Shared infrastructure fixtures for API endpoint tests.
+
+Test data (users, missions, sessions) stays in the individual test files.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def mock_db():
+    """Database handle for endpoint tests, shared so module-scoped apps can depend on it."""
+    return MagicMock(name="db")
+
+
+@pytest.fixture(autouse=True)
+def _reset_mock_db(mock_db):
+    """Drop return values, side effects and calls a test configured on the shared mock_db."""
+    yield
+    mock_db.reset_mock(return_value=True, side_effect=True)
@@ -1,8 +1,11 @@
+from collections import defaultdict
 from datetime import datetime
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from pydantic import ValidationError
 import pytest
+from starlette.websockets import WebSocket
 
 from app.api.v1.routes.mission_commander import (
     AgentHandoverMessage,
@@ -15,11 +18,16 @@ from app.api.v1.routes.mission_commander import (
     process_agent_flow,
     validate_session_and_authenticate,
 )
-from app.models.enrollment import Enrollment
-from app.models.mission import Mission
 from app.models.session_log import SessionLog
 
 
+# Fixed timestamp for test data; no test depends on the wall clock
+_NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+# Built without validation; these tests only check how the manager forwards a message
+_TEST_AGENT_MSG = AgentMessage.model_construct(message="Test message")
+
+
 # Mark all tests as async using anyio
 pytestmark = pytest.mark.anyio
 
@@ -29,19 +37,11 @@ pytestmark = pytest.mark.anyio
 # ============================================================================
 
 
-@pytest.fixture
-def mock_db():
-    """Mock database connection."""
-    return MagicMock()
-
-
 @pytest.fixture
 def mock_websocket():
     """Mock WebSocket connection."""
-    ws = MagicMock()
-    ws.accept = AsyncMock()
-    ws.send_json = AsyncMock()
-    ws.close = AsyncMock()
+    # spec makes accept/send_json/close AsyncMocks automatically
+    ws = MagicMock(spec=WebSocket)
     ws.app.state.db = MagicMock()
     ws.query_params = {"token": "test_token"}
     ws.cookies = {}  # Add cookies support
@@ -49,7 +49,7 @@ def mock_websocket():
     return ws
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def active_session():
     """Active session for testing."""
     return SessionLog(
@@ -57,44 +57,16 @@ def active_session():
         user_id="user123",
         status="active",
         mission_id=None,
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
+        created_at=_NOW,
+        updated_at=_NOW,
         completed_at=None,
     )
 
 
 @pytest.fixture
-def test_mission():
-    """Test mission data."""
-    return Mission(
-        id="mission123",
-        creator_id="user123",
-        title="Learn Python",
-        short_description="Master Python basics",
-        description="Comprehensive Python course",
-        level="Beginner",
-        topics_to_cover=["Variables", "Functions"],
-        learning_goal="Learn Python fundamentals",
-        byte_size_checkpoints=["Intro", "Variables", "Functions"],
-        skills=["Python", "Programming"],
-        is_public=True,
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
-    )
-
-
-@pytest.fixture
-def test_enrollment():
-    """Test enrollment data."""
-    return Enrollment(
-        id="enrollment123",
-        user_id="user123",
-        mission_id="mission123",
-        progress={},
-        status="in_progress",
-        started_at=datetime.now(),
-        updated_at=datetime.now(),
-    )
+def connection_manager():
+    """Fresh ConnectionManager with no active connections."""
+    return ConnectionManager()
 
 
 # ============================================================================
@@ -231,19 +203,7 @@ async def test_validate_session_prefers_query_param_over_cookie(mock_websocket,
 
 
 async def test_validate_session_missing_token(mock_websocket):
-    """Should close connection when token is missing from all sources."""
-    mock_websocket.query_params = {}
-    mock_websocket.cookies = {}
-    mock_websocket.headers = {}
-
-    result = await validate_session_and_authenticate(mock_websocket, "session123")
-
-    assert result is None
-    mock_websocket.close.assert_called_once()
-
-
-async def test_validate_session_token_not_present_anywhere(mock_websocket):
-    """Should close connection when token is completely absent (not in query, cookie, or header)."""
+    """Should close with a policy violation when token is missing from all sources."""
     mock_websocket.query_params = {}
     mock_websocket.cookies = {}
     mock_websocket.headers = {}
@@ -252,52 +212,39 @@ async def test_validate_session_token_not_present_anywhere(mock_websocket):
 
     assert result is None
     mock_websocket.close.assert_called_once()
-    close_call_args = mock_websocket.close.call_args
-    if close_call_args and close_call_args[1]:
-        assert "code" in close_call_args[1]
-        assert close_call_args[1]["code"] == 1008
-
-
-async def test_validate_session_inactive_session(mock_websocket):
-    """Should close connection when session is inactive."""
-    inactive_session = SessionLog(
-        id="session123",
-        user_id="user123",
-        status="completed",
-        mission_id="mission123",
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
-        completed_at=datetime.now(),
-    )
-
-    with (
-        patch("app.api.v1.routes.mission_commander.SessionLogService") as mock_service,
-        patch("app.api.v1.routes.mission_commander.auth") as mock_auth,
-        patch("app.api.v1.routes.mission_commander.UserService") as mock_user_service,
-    ):
-        mock_service.return_value.get_session.return_value = inactive_session
-        mock_auth.verify_session_cookie.return_value = {
-            "email": "test@example.com",
-            "uid": "user123",
-        }
-        mock_user = MagicMock()
-        mock_user.id = "user123"
-        mock_user_service.return_value.get_user_by_email.return_value = mock_user
-
-        result = await validate_session_and_authenticate(mock_websocket, "session123")
-
-        assert result is None
-        mock_websocket.close.assert_called_once()
-
-
-async def test_validate_session_not_found(mock_websocket):
-    """Should close connection when session not found."""
+    assert mock_websocket.close.call_args.kwargs["code"] == 1008
+
+
+@pytest.mark.parametrize(
+    "get_session_behavior",
+    [
+        pytest.param(
+            {
+                "return_value": SessionLog(
+                    id="session123",
+                    user_id="user123",
+                    status="completed",
+                    mission_id="mission123",
+                    created_at=_NOW,
+                    updated_at=_NOW,
+                    completed_at=_NOW,
+                )
+            },
+            id="inactive_session",
+        ),
+        pytest.param({"side_effect": Exception("Not found")}, id="session_not_found"),
+    ],
+)
+async def test_validate_session_rejected_session_closes_connection(
+    mock_websocket, get_session_behavior
+):
+    """Should close connection when the session is inactive or cannot be loaded."""
     with (
         patch("app.api.v1.routes.mission_commander.SessionLogService") as mock_service,
         patch("app.api.v1.routes.mission_commander.auth") as mock_auth,
         patch("app.api.v1.routes.mission_commander.UserService") as mock_user_service,
     ):
-        mock_service.return_value.get_session.side_effect = Exception("Not found")
+        mock_service.return_value.get_session.configure_mock(**get_session_behavior)
         mock_auth.verify_session_cookie.return_value = {
             "email": "test@example.com",
             "uid": "user123",
@@ -323,14 +270,13 @@ async def test_handle_disconnect_marks_incomplete_session_abandoned():
     mock_session = MagicMock()
     mock_session.state = {"creator_id": "user123"}  # No mission_create
 
-    with patch("app.api.v1.routes.mission_commander.manager") as mock_manager:
-        mock_manager.session_service.get_session = AsyncMock(return_value=mock_session)
-        mock_manager.disconnect = MagicMock()
+    mock_manager = MagicMock()
+    mock_manager.session_service.get_session = AsyncMock(return_value=mock_session)
 
-        await handle_disconnect("session123", "user123", mock_service)
+    await handle_disconnect("session123", "user123", mock_service, mock_manager)
 
-        mock_service.mark_session_abandoned.assert_called_once_with("session123")
-        mock_manager.disconnect.assert_called_once_with("session123")
+    mock_service.mark_session_abandoned.assert_called_once_with("session123")
+    mock_manager.disconnect.assert_called_once_with("session123")
 
 
 async def test_handle_disconnect_does_not_mark_completed_session():
@@ -342,37 +288,55 @@ async def test_handle_disconnect_does_not_mark_completed_session():
         "mission_create": {"title": "Test"},
     }
 
-    with patch("app.api.v1.routes.mission_commander.manager") as mock_manager:
-        mock_manager.session_service.get_session = AsyncMock(return_value=mock_session)
-        mock_manager.disconnect = MagicMock()
+    mock_manager = MagicMock()
+    mock_manager.session_service.get_session = AsyncMock(return_value=mock_session)
 
-        await handle_disconnect("session123", "user123", mock_service)
+    await handle_disconnect("session123", "user123", mock_service, mock_manager)
 
-        mock_service.mark_session_abandoned.assert_not_called()
-        mock_manager.disconnect.assert_called_once_with("session123")
+    mock_service.mark_session_abandoned.assert_not_called()
+    mock_manager.disconnect.assert_called_once_with("session123")
 
 
 # ============================================================================
 # process_agent_flow() Tests
 # ============================================================================
 
+# Runner events are read-only, so each test replays shared instances
+_POLARIS_TEXT_EVENT = SimpleNamespace(
+    actions=None,
+    author="polaris",
+    content=SimpleNamespace(parts=[SimpleNamespace(text="Hello, what would you like to learn?")]),
+)
+_TRANSFER_EVENT = SimpleNamespace(
+    actions=SimpleNamespace(transfer_to_agent="mission_curator"),
+    author="polaris",
+    content=None,
+)
+_CURATOR_EVENT = SimpleNamespace(actions=None, author="mission_curator", content=None)
+_CURATOR_TEXT_EVENT = SimpleNamespace(
+    actions=None,
+    author="mission_curator",
+    content=SimpleNamespace(parts=[SimpleNamespace(text="Internal processing text")]),
+)
+
+
+def _sent_by_type(manager) -> defaultdict:
+    """Group the messages passed to ``manager.send_message`` by their model class."""
+    by_type = defaultdict(list)
+    for call in manager.send_message.call_args_list:
+        by_type[type(call.args[1])].append(call.args[1])
+    return by_type
+
 
 async def test_process_agent_flow_sends_agent_messages():
     """Should send agent text messages to client."""
     manager = MagicMock()
     manager.send_message = AsyncMock()
 
-    # Mock agent event with text content
-    mock_event = MagicMock()
-    mock_event.actions = None
-    mock_event.author = "polaris"
-    mock_event.content.parts = [MagicMock(text="Hello, what would you like to learn?")]
-
-    manager.runner.run = MagicMock(return_value=[mock_event])
+    manager.runner.run = MagicMock(return_value=(_POLARIS_TEXT_EVENT,))
 
     # Mock session without mission_create
-    mock_session = MagicMock()
-    mock_session.state = {"creator_id": "user123"}
+    mock_session = SimpleNamespace(state={"creator_id": "user123"})
     manager.session_service.get_session = AsyncMock(return_value=mock_session)
 
     mission_service = MagicMock()
@@ -389,8 +353,7 @@ async def test_process_agent_flow_sends_agent_messages():
 
     # Should have sent the agent message
     assert manager.send_message.call_count >= 1
-    calls = manager.send_message.call_args_list
-    agent_messages = [call for call in calls if isinstance(call[0][1], AgentMessage)]
+    agent_messages = _sent_by_type(manager)[AgentMessage]
     assert len(agent_messages) > 0
 
 
@@ -399,17 +362,10 @@ async def test_process_agent_flow_detects_agent_transfer():
     manager = MagicMock()
     manager.send_message = AsyncMock()
 
-    # Mock transfer event
-    mock_transfer_event = MagicMock()
-    mock_transfer_event.actions.transfer_to_agent = "mission_curator"
-    mock_transfer_event.author = "polaris"
-    mock_transfer_event.content = None
-
-    manager.runner.run = MagicMock(return_value=[mock_transfer_event])
+    manager.runner.run = MagicMock(return_value=(_TRANSFER_EVENT,))
 
     # Mock session
-    mock_session = MagicMock()
-    mock_session.state = {"creator_id": "user123"}
+    mock_session = SimpleNamespace(state={"creator_id": "user123"})
     manager.session_service.get_session = AsyncMock(return_value=mock_session)
 
     mission_service = MagicMock()
@@ -420,10 +376,9 @@ async def test_process_agent_flow_detects_agent_transfer():
     )
 
     # Should have sent handover message
-    calls = manager.send_message.call_args_list
-    handover_messages = [call for call in calls if isinstance(call[0][1], AgentHandoverMessage)]
+    handover_messages = _sent_by_type(manager)[AgentHandoverMessage]
     assert len(handover_messages) == 1
-    assert handover_messages[0][0][1].agent == "mission_curator"
+    assert handover_messages[0].agent == "mission_curator"
 
 
 async def test_process_agent_flow_creates_mission_on_completion():
@@ -431,13 +386,7 @@ async def test_process_agent_flow_creates_mission_on_completion():
     manager = MagicMock()
     manager.send_message = AsyncMock()
 
-    # Mock event
-    mock_event = MagicMock()
-    mock_event.actions = None
-    mock_event.author = "mission_curator"
-    mock_event.content = None
-
-    manager.runner.run = MagicMock(return_value=[mock_event])
+    manager.runner.run = MagicMock(return_value=(_CURATOR_EVENT,))
 
     # Mock session with mission_create
     mission_data = {
@@ -453,8 +402,7 @@ async def test_process_agent_flow_creates_mission_on_completion():
         "is_public": True,
     }
 
-    mock_session = MagicMock()
-    mock_session.state = {"creator_id": "user123", "mission_create": mission_data}
+    mock_session = SimpleNamespace(state={"creator_id": "user123", "mission_create": mission_data})
     manager.session_service.get_session = AsyncMock(return_value=mock_session)
 
     # Mock services
@@ -494,8 +442,7 @@ async def test_process_agent_flow_creates_mission_on_completion():
     )
 
     # Should send mission_created message
-    calls = manager.send_message.call_args_list
-    mission_messages = [call for call in calls if isinstance(call[0][1], MissionCreatedMessage)]
+    mission_messages = _sent_by_type(manager)[MissionCreatedMessage]
     assert len(mission_messages) == 1
 
 
@@ -504,17 +451,10 @@ async def test_process_agent_flow_filters_mission_curator_text():
     manager = MagicMock()
     manager.send_message = AsyncMock()
 
-    # Mock mission_curator event with text
-    mock_event = MagicMock()
-    mock_event.actions = None
-    mock_event.author = "mission_curator"
-    mock_event.content.parts = [MagicMock(text="Internal processing text")]
-
-    manager.runner.run = MagicMock(return_value=[mock_event])
+    manager.runner.run = MagicMock(return_value=(_CURATOR_TEXT_EVENT,))
 
     # Mock session
-    mock_session = MagicMock()
-    mock_session.state = {"creator_id": "user123"}
+    mock_session = SimpleNamespace(state={"creator_id": "user123"})
     manager.session_service.get_session = AsyncMock(return_value=mock_session)
 
     mission_service = MagicMock()
@@ -525,8 +465,7 @@ async def test_process_agent_flow_filters_mission_curator_text():
     )
 
     # Should NOT have sent agent message from mission_curator
-    calls = manager.send_message.call_args_list
-    agent_messages = [call for call in calls if isinstance(call[0][1], AgentMessage)]
+    agent_messages = _sent_by_type(manager)[AgentMessage]
     assert len(agent_messages) == 0
 
 
@@ -549,8 +488,7 @@ async def test_process_agent_flow_handles_errors():
     session_log_service.mark_session_error.assert_called_once_with("session123")
 
     # Should send error message
-    calls = manager.send_message.call_args_list
-    error_messages = [call for call in calls if isinstance(call[0][1], ErrorMessage)]
+    error_messages = _sent_by_type(manager)[ErrorMessage]
     assert len(error_messages) == 1
 
 
@@ -559,18 +497,16 @@ async def test_process_agent_flow_handles_errors():
 # ============================================================================
 
 
-async def test_connection_manager_send_message_serializes_correctly():
+async def test_connection_manager_send_message_serializes_correctly(connection_manager):
     """Should serialize Pydantic message models correctly."""
-    manager = ConnectionManager()
     mock_ws = MagicMock()
     mock_ws.send_json = AsyncMock()
     mock_ws.client_state = MagicMock()
     mock_ws.client_state.name = "CONNECTED"
 
-    manager.active_connections["session123"] = mock_ws
+    connection_manager.active_connections["session123"] = mock_ws
 
-    msg = AgentMessage(message="Test message")
-    await manager.send_message("session123", msg)
+    await connection_manager.send_message("session123", _TEST_AGENT_MSG)
 
     mock_ws.send_json.assert_called_once()
     call_args = mock_ws.send_json.call_args[0][0]
@@ -578,9 +514,7 @@ async def test_connection_manager_send_message_serializes_correctly():
     assert call_args["message"] == "Test message"
 
 
-async def test_connection_manager_send_to_nonexistent_session():
+async def test_connection_manager_send_to_nonexistent_session(connection_manager):
     """Should gracefully handle sending to non-existent session."""
-    manager = ConnectionManager()
-
     # Should not raise error
-    await manager.send_message("nonexistent", AgentMessage(message="test"))
+    await connection_manager.send_message("nonexistent", _TEST_AGENT_MSG)
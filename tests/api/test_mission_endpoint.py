@@ -1,13 +1,14 @@
 """Unit tests for mission endpoints."""
 
 from datetime import datetime
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
 from fastapi import FastAPI, HTTPException, status
+from google.api_core.exceptions import ServiceUnavailable
+from httpx import ASGITransport, AsyncClient
 import pytest
-from starlette.testclient import TestClient
 
-from app.api.v1.routes.mission import router
+from app.core.set_exception_handlers import setup_exception_handlers
 from app.dependencies.auth import get_current_user
 from app.initializers.firestore import get_db
 from app.models.enrollment import Enrollment
@@ -15,8 +16,13 @@ from app.models.mission import Mission
 from app.models.user import User
 
 
+pytestmark = pytest.mark.anyio
+
+_NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+
 # Test Data Fixtures (Keep visible in test file per guideline)
-@pytest.fixture
+@pytest.fixture(scope="module")
 def test_mission():
     """Test mission data - visible and specific to these tests."""
     return Mission(
@@ -36,12 +42,12 @@ def test_mission():
         ],
         skills=["Python"],
         is_public=True,
-        created_at=datetime(2025, 1, 1, 12, 0, 0),
-        updated_at=datetime(2025, 1, 1, 12, 0, 0),
+        created_at=_NOW,
+        updated_at=_NOW,
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def test_user():
     """Test user data - visible and specific to these tests."""
     return User(
@@ -50,27 +56,39 @@ def test_user():
         name="Test User",
         email="test@example.com",
         picture=None,
-        created_at=datetime(2025, 1, 1, 12, 0, 0),
-        updated_at=datetime(2025, 1, 1, 12, 0, 0),
+        created_at=_NOW,
+        updated_at=_NOW,
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def test_enrollment():
     """Test enrollment data - visible and specific to these tests."""
     return Enrollment(
         id="user123_mission123",
         user_id="user123",
         mission_id="mission123",
-        enrolled_at=datetime(2025, 1, 1, 12, 0, 0),
+        enrolled_at=_NOW,
         progress=0.0,
-        last_accessed_at=datetime(2025, 1, 1, 12, 0, 0),
+        last_accessed_at=_NOW,
         completed=False,
-        created_at=datetime(2025, 1, 1, 12, 0, 0),
-        updated_at=datetime(2025, 1, 1, 12, 0, 0),
+        created_at=_NOW,
+        updated_at=_NOW,
     )
 
 
+@pytest.fixture(scope="module")
+def test_mission_json(test_mission):
+    """test_mission as the API serializes it, built once for whole-body comparisons."""
+    return test_mission.model_dump(mode="json")
+
+
+@pytest.fixture(scope="module")
+def test_enrollment_json(test_enrollment):
+    """test_enrollment as the API serializes it, built once for whole-body comparisons."""
+    return test_enrollment.model_dump(mode="json")
+
+
 @pytest.fixture
 def valid_mission_create_data():
     """Valid mission creation data - visible in test file."""
@@ -93,15 +111,59 @@ def valid_mission_create_data():
     }
 
 
+@pytest.fixture(scope="module")
+def mission_app(mock_db):
+    """Mission router app shared by the module; tests only swap its dependency overrides."""
+    app = FastAPI()
+    setup_exception_handlers(app)
+    app.dependency_overrides[get_db] = lambda: mock_db
+    # Imported here so xdist workers that never run this module skip the route import chain
+    from app.api.v1.routes.mission import router
+
+    app.include_router(router, prefix="/missions")
+    return app
+
+
+@pytest.fixture(scope="module")
+async def client(mission_app):
+    # Calls the ASGI app in-process instead of going through TestClient's thread portal
+    async with AsyncClient(
+        transport=ASGITransport(app=mission_app), base_url="http://test"
+    ) as async_client:
+        yield async_client
+
+
+@pytest.fixture(autouse=True)
+def _override_sandbox(mission_app):
+    """Restore the module's base overrides after each test, dropping whatever it added."""
+    saved = dict(mission_app.dependency_overrides)
+    yield
+    mission_app.dependency_overrides.clear()
+    mission_app.dependency_overrides.update(saved)
+
+
+@pytest.fixture
+def mock_mission_service(monkeypatch):
+    """MissionService instance handed to every route call in the test."""
+    service = MagicMock()
+    monkeypatch.setattr("app.api.v1.routes.mission.MissionService", lambda db: service)
+    return service
+
+
 # Tests for POST /profile
-def test_create_mission_with_enrollment_success(
-    test_mission, test_enrollment, test_user, valid_mission_create_data
+async def test_create_mission_with_enrollment_success(
+    test_mission,
+    test_enrollment,
+    test_mission_json,
+    test_enrollment_json,
+    test_user,
+    valid_mission_create_data,
+    mission_app,
+    client,
+    mock_mission_service,
 ):
     """Test successful mission creation with enrollment."""
-    app = FastAPI()
-    app.include_router(router, prefix="/missions")
-    app.dependency_overrides[get_db] = lambda: MagicMock()
-    app.dependency_overrides[get_current_user] = lambda: test_user
+    mission_app.dependency_overrides[get_current_user] = lambda: test_user
 
     from app.models.enrollment_session_log import EnrollmentSessionLog
 
@@ -111,74 +173,39 @@ def test_create_mission_with_enrollment_success(
         user_id="user123",
         mission_id="mission123",
         status="created",
-        created_at=datetime(2025, 1, 1, 12, 0, 0),
-        updated_at=datetime(2025, 1, 1, 12, 0, 0),
+        created_at=_NOW,
+        updated_at=_NOW,
         started_at=None,
         completed_at=None,
     )
 
-    with patch("app.api.v1.routes.mission.MissionService") as mock_service:
-        mock_service.return_value.create_mission_with_enrollment.return_value = (
-            test_mission,
-            test_enrollment,
-            test_enrollment_session_log,
-        )
+    mock_mission_service.create_mission_with_enrollment.return_value = (
+        test_mission,
+        test_enrollment,
+        test_enrollment_session_log,
+    )
 
-        client = TestClient(app)
-        response = client.post("/missions/enrollment", json=valid_mission_create_data)
+    response = await client.post("/missions/enrollment", json=valid_mission_create_data)
 
-        assert response.status_code == status.HTTP_201_CREATED
-        assert "mission" in response.json()
-        assert "enrollment" in response.json()
-        assert "enrollment_session_log" in response.json()
-        assert response.json()["mission"]["id"] == test_mission.id
-        assert response.json()["enrollment"]["id"] == test_enrollment.id
-        assert response.json()["enrollment_session_log"]["id"] == test_enrollment_session_log.id
+    assert response.status_code == status.HTTP_201_CREATED
+    data = response.json()
+    assert data["mission"] == test_mission_json
+    assert data["enrollment"] == test_enrollment_json
+    assert data["enrollment_session_log"] == test_enrollment_session_log.model_dump(mode="json")
 
 
-def test_create_mission_with_enrollment_uses_authenticated_user(
-    test_user, valid_mission_create_data
+async def test_create_mission_with_enrollment_uses_authenticated_user(
+    test_mission,
+    test_enrollment,
+    test_user,
+    valid_mission_create_data,
+    mission_app,
+    client,
+    mock_mission_service,
 ):
     """Test mission creator_id is set from authenticated user."""
-    app = FastAPI()
-    app.include_router(router, prefix="/missions")
-    app.dependency_overrides[get_db] = lambda: MagicMock()
-    app.dependency_overrides[get_current_user] = lambda: test_user
-
-    from app.models.enrollment import Enrollment
-    from app.models.mission import Mission
+    mission_app.dependency_overrides[get_current_user] = lambda: test_user
 
-    test_mission = Mission(
-        id="mission123",
-        title="Learn Python",
-        short_description="Master Python programming",
-        description="A comprehensive guide to Python fundamentals",
-        creator_id="user123",
-        level="Beginner",
-        topics_to_cover=["Variables", "Functions", "Data Types"],
-        learning_goal="Master Python fundamentals for programming",
-        byte_size_checkpoints=[
-            "Introduction",
-            "Variables and Data Types",
-            "Functions",
-            "Conclusion",
-        ],
-        skills=["Python"],
-        is_public=True,
-        created_at=datetime(2025, 1, 1, 12, 0, 0),
-        updated_at=datetime(2025, 1, 1, 12, 0, 0),
-    )
-    test_enrollment = Enrollment(
-        id="user123_mission123",
-        user_id="user123",
-        mission_id="mission123",
-        enrolled_at=datetime(2025, 1, 1, 12, 0, 0),
-        progress=0.0,
-        last_accessed_at=datetime(2025, 1, 1, 12, 0, 0),
-        completed=False,
-        created_at=datetime(2025, 1, 1, 12, 0, 0),
-        updated_at=datetime(2025, 1, 1, 12, 0, 0),
-    )
     from app.models.session_log import SessionLog
 
     test_session_log = SessionLog(
@@ -186,170 +213,159 @@ def test_create_mission_with_enrollment_uses_authenticated_user(
         user_id="user123",
         mission_id="mission123",
         status="active",
-        created_at=datetime(2025, 1, 1, 12, 0, 0),
-        updated_at=datetime(2025, 1, 1, 12, 0, 0),
+        created_at=_NOW,
+        updated_at=_NOW,
         completed_at=None,
     )
 
-    with patch("app.api.v1.routes.mission.MissionService") as mock_service:
-        mock_service.return_value.create_mission_with_enrollment.return_value = (
-            test_mission,
-            test_enrollment,
-            test_session_log,
-        )
-        client = TestClient(app)
-        client.post("/missions/enrollment", json=valid_mission_create_data)
-        mock_service.return_value.create_mission_with_enrollment.assert_called_once()
-        call_args = mock_service.return_value.create_mission_with_enrollment.call_args
-        assert call_args[0][1] == test_user.id
-
-
-def test_create_mission_with_enrollment_requires_authentication(valid_mission_create_data):
-    """Test creating mission requires authentication."""
-    app = FastAPI()
-    app.include_router(router, prefix="/missions")
-    app.dependency_overrides[get_db] = lambda: MagicMock()
-
-    client = TestClient(app)
-    response = client.post("/missions/enrollment", json=valid_mission_create_data)
-
-    assert response.status_code in [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN]
+    mock_mission_service.create_mission_with_enrollment.return_value = (
+        test_mission,
+        test_enrollment,
+        test_session_log,
+    )
+    await client.post("/missions/enrollment", json=valid_mission_create_data)
+    mock_mission_service.create_mission_with_enrollment.assert_called_once()
+    call_args = mock_mission_service.create_mission_with_enrollment.call_args
+    assert call_args[0][1] == test_user.id
 
 
-def test_create_mission_with_enrollment_validation_error():
+async def test_create_mission_with_enrollment_validation_error(test_user, mission_app, client):
     """Test invalid mission data returns 422."""
-    app = FastAPI()
-    app.include_router(router, prefix="/missions")
-    app.dependency_overrides[get_db] = lambda: MagicMock()
-    app.dependency_overrides[get_current_user] = lambda: User(
-        id="user123", firebase_uid="firebase123", name="Test", email="test@example.com"
-    )
+    mission_app.dependency_overrides[get_current_user] = lambda: test_user
 
-    client = TestClient(app)
-    response = client.post("/missions/enrollment", json={"title": "Incomplete"})
+    response = await client.post("/missions/enrollment", json={"title": "Incomplete"})
 
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
-def test_create_mission_with_enrollment_service_error(test_user, valid_mission_create_data):
+async def test_create_mission_with_enrollment_service_error(
+    test_user, valid_mission_create_data, mission_app, client, mock_mission_service
+):
     """Test service error returns 500."""
-    app = FastAPI()
-    app.include_router(router, prefix="/missions")
-    app.dependency_overrides[get_db] = lambda: MagicMock()
-    app.dependency_overrides[get_current_user] = lambda: test_user
+    mission_app.dependency_overrides[get_current_user] = lambda: test_user
 
-    with patch("app.api.v1.routes.mission.MissionService") as mock_service:
-        mock_service.return_value.create_mission_with_enrollment.side_effect = HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to create enrollment",
-        )
+    mock_mission_service.create_mission_with_enrollment.side_effect = HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail="Failed to create enrollment",
+    )
 
-        client = TestClient(app)
-        response = client.post("/missions/enrollment", json=valid_mission_create_data)
+    response = await client.post("/missions/enrollment", json=valid_mission_create_data)
 
-        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
 
 
-# Tests for GET /missions/{mission_id}
-def test_get_mission_success(test_mission):
-    """Test successful retrieval of a mission."""
-    app = FastAPI()
-    app.include_router(router, prefix="/missions")
-    app.dependency_overrides[get_db] = lambda: MagicMock()
+async def test_get_mission_firestore_error_returns_500(test_mission, client, mock_mission_service):
+    """Firestore RPC failures are turned into 500s by the registered exception handler."""
 
-    with patch("app.api.v1.routes.mission.MissionService") as mock_service:
-        mock_service.return_value.get_mission.return_value = test_mission
+    mock_mission_service.get_mission.side_effect = ServiceUnavailable("unavailable")
 
-        client = TestClient(app)
-        response = client.get("/missions/mission123")
+    response = await client.get(f"/missions/{test_mission.id}")
 
-        assert response.status_code == status.HTTP_200_OK
-        assert response.json()["id"] == test_mission.id
-        assert response.json()["title"] == test_mission.title
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    # Backend messages stay in the logs, not the response
+    assert response.json() == {"detail": "Internal server error"}
 
 
-def test_get_mission_not_found():
-    """Test retrieval of non-existent mission returns 404."""
-    app = FastAPI()
-    app.include_router(router, prefix="/missions")
-    app.dependency_overrides[get_db] = lambda: MagicMock()
+async def test_get_mission_unexpected_error_returns_500(
+    test_mission, mission_app, mock_mission_service
+):
+    """Errors no specific handler covers still get the generic 500 body."""
+
+    mock_mission_service.get_mission.side_effect = ValueError("missions/mission123 is corrupt")
+
+    # The fallback handler runs in ServerErrorMiddleware, which re-raises after responding
+    async with AsyncClient(
+        transport=ASGITransport(app=mission_app, raise_app_exceptions=False),
+        base_url="http://test",
+    ) as async_client:
+        response = await async_client.get(f"/missions/{test_mission.id}")
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert response.json() == {"detail": "Internal server error"}
+
 
-    with patch("app.api.v1.routes.mission.MissionService") as mock_service:
-        mock_service.return_value.get_mission.side_effect = HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Mission not found"
-        )
+# Tests for GET /missions/{mission_id}
+async def test_get_mission_success(test_mission, test_mission_json, client, mock_mission_service):
+    """Test successful retrieval of a mission."""
+
+    mock_mission_service.get_mission.return_value = test_mission
 
-        client = TestClient(app)
-        response = client.get("/missions/nonexistent")
+    response = await client.get("/missions/mission123")
 
-        assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == test_mission_json
 
 
 # Tests for PATCH /missions/{mission_id}
-def test_update_mission_success(test_mission, test_user):
+async def test_update_mission_success(
+    test_mission, test_user, mission_app, client, mock_mission_service
+):
     """Test successful mission update by creator."""
-    app = FastAPI()
-    app.include_router(router, prefix="/missions")
-    app.dependency_overrides[get_db] = lambda: MagicMock()
-    app.dependency_overrides[get_current_user] = lambda: test_user
+    mission_app.dependency_overrides[get_current_user] = lambda: test_user
 
-    with patch("app.api.v1.routes.mission.MissionService") as mock_service:
-        test_mission.creator_id = test_user.id
-        updated = Mission(**test_mission.model_dump())
-        updated.title = "Updated Title"
-        mock_service.return_value.get_mission.return_value = test_mission
-        mock_service.return_value.update_mission.return_value = updated
+    owned = test_mission.model_copy(update={"creator_id": test_user.id})
+    updated = owned.model_copy(update={"title": "Updated Title"})
+    mock_mission_service.get_mission.return_value = owned
+    mock_mission_service.update_mission.return_value = updated
 
-        client = TestClient(app)
-        response = client.patch("/missions/mission123", json={"title": "Updated Title"})
+    response = await client.patch("/missions/mission123", json={"title": "Updated Title"})
 
-        assert response.status_code == status.HTTP_200_OK
-        assert response.json()["title"] == "Updated Title"
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["title"] == "Updated Title"
 
 
-def test_update_mission_forbidden_not_creator(test_mission, test_user):
+async def test_update_mission_forbidden_not_creator(
+    test_mission, test_user, mission_app, client, mock_mission_service
+):
     """Test non-creator cannot update mission."""
-    app = FastAPI()
-    app.include_router(router, prefix="/missions")
-    app.dependency_overrides[get_db] = lambda: MagicMock()
-    app.dependency_overrides[get_current_user] = lambda: test_user
+    mission_app.dependency_overrides[get_current_user] = lambda: test_user
 
-    with patch("app.api.v1.routes.mission.MissionService") as mock_service:
-        test_mission.creator_id = "different-user-id"
-        mock_service.return_value.get_mission.return_value = test_mission
+    mock_mission_service.get_mission.return_value = test_mission.model_copy(
+        update={"creator_id": "different-user-id"}
+    )
 
-        client = TestClient(app)
-        response = client.patch("/missions/mission123", json={"title": "Hacked"})
+    response = await client.patch("/missions/mission123", json={"title": "Hacked"})
 
-        assert response.status_code == status.HTTP_403_FORBIDDEN
-        assert "creator" in response.json()["detail"].lower()
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert "creator" in response.json()["detail"].lower()
 
 
-def test_update_mission_not_found(test_user):
-    """Test updating non-existent mission returns 404."""
-    app = FastAPI()
-    app.include_router(router, prefix="/missions")
-    app.dependency_overrides[get_db] = lambda: MagicMock()
-    app.dependency_overrides[get_current_user] = lambda: test_user
+# Shared error paths
+@pytest.mark.parametrize(
+    "method,body",
+    [
+        ("get", None),
+        ("patch", {"title": "New"}),
+    ],
+)
+async def test_mission_not_found(
+    method, body, test_user, mission_app, client, mock_mission_service
+):
+    """Test reading or updating a non-existent mission returns 404."""
+    mission_app.dependency_overrides[get_current_user] = lambda: test_user
 
-    with patch("app.api.v1.routes.mission.MissionService") as mock_service:
-        mock_service.return_value.get_mission.side_effect = HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Mission not found"
-        )
+    mock_mission_service.get_mission.side_effect = HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail="Mission not found"
+    )
 
-        client = TestClient(app)
-        response = client.patch("/missions/nonexistent", json={"title": "New"})
+    response = await client.request(method, "/missions/nonexistent", json=body)
 
-        assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
-def test_update_mission_requires_authentication():
-    """Test updating requires authentication."""
-    app = FastAPI()
-    app.include_router(router, prefix="/missions")
-    app.dependency_overrides[get_db] = lambda: MagicMock()
+@pytest.mark.parametrize(
+    "method,path,body",
+    [
+        ("post", "/missions/enrollment", "valid"),
+        ("patch", "/missions/mission123", {"title": "New"}),
+    ],
+)
+async def test_mission_write_requires_authentication(
+    method, path, body, valid_mission_create_data, client
+):
+    """Test creating or updating a mission requires authentication."""
+    json = valid_mission_create_data if body == "valid" else body
 
-    client = TestClient(app)
-    response = client.patch("/missions/mission123", json={"title": "New"})
+    response = await client.request(method, path, json=json)
 
     assert response.status_code in [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN]
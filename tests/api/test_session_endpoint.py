@@ -1,16 +1,20 @@
 """Unit tests for session endpoints."""
 
 from datetime import datetime
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
-from fastapi import FastAPI, Request
-from starlette.testclient import TestClient
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
 
-from app.api.v1.routes.session import router
+from app.dependencies.auth import get_current_user
 from app.models.session_log import SessionLog
 from app.models.user import User
 
 
+_NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+
 # Test data fixtures (visible in test file per unit testing guide)
 def get_test_user():
     """Test user for authentication."""
@@ -22,181 +26,146 @@ def get_test_user():
     )
 
 
+# Routes only read the session, so one validated instance serves every test
+_SESSION = SessionLog(
+    id="session123",
+    user_id="user123",
+    status="active",
+    mission_id=None,
+    created_at=_NOW,
+    updated_at=_NOW,
+    completed_at=None,
+)
+
+
 def get_test_session():
     """Test session log data."""
-    return SessionLog(
-        id="session123",
-        user_id="user123",
-        status="active",
-        mission_id=None,
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
-        completed_at=None,
-    )
+    return _SESSION
 
 
-def create_test_app():
-    """Create FastAPI app with mocked database and user."""
+@pytest.fixture(scope="module")
+def client(mock_db):
+    """Client for a FastAPI app with mocked database and user, shared by the module."""
     app = FastAPI()
 
     # Initialize app state with mock database
-    app.state.db = MagicMock()
+    app.state.db = mock_db
+    app.dependency_overrides[get_current_user] = get_test_user
 
-    @app.middleware("http")
-    async def mock_user(request: Request, call_next):
-        request.state.current_user = get_test_user()
-        return await call_next(request)
+    # Imported here so xdist workers that never run this module skip the route import chain
+    from app.api.v1.routes.session import router
 
     app.include_router(router, prefix="/sessions")
-    return app
+    with TestClient(app, backend="asyncio") as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def mock_session_log_service(monkeypatch):
+    """SessionLogService instance handed to every route call in the test."""
+    service = MagicMock()
+    monkeypatch.setattr("app.api.v1.routes.session.SessionLogService", lambda db: service)
+    return service
 
 
 # Create session endpoint tests
-def test_create_session_success_returns_201():
+def test_create_session_success_returns_201(client, mock_session_log_service):
     """Should return 201 when creating a new session."""
-    app = create_test_app()
+    mock_session_log_service.create_session.return_value = get_test_session()
 
-    with patch("app.api.v1.routes.session.SessionLogService") as mock_service:
-        mock_service.return_value.create_session.return_value = get_test_session()
+    response = client.post("/sessions/")
 
-        client = TestClient(app)
-        response = client.post("/sessions/")
+    assert response.status_code == 201
 
-        assert response.status_code == 201
 
-
-def test_create_session_returns_session_id():
+def test_create_session_returns_session_id(client, mock_session_log_service):
     """Should return session_id in response."""
-    app = create_test_app()
-
-    with patch("app.api.v1.routes.session.SessionLogService") as mock_service:
-        mock_service.return_value.create_session.return_value = get_test_session()
+    mock_session_log_service.create_session.return_value = get_test_session()
 
-        client = TestClient(app)
-        response = client.post("/sessions/")
+    response = client.post("/sessions/")
 
-        assert response.json()["session_id"] == "session123"
+    assert response.json()["session_id"] == "session123"
 
 
-def test_create_session_returns_user_id():
+def test_create_session_returns_user_id(client, mock_session_log_service):
     """Should return user_id in response."""
-    app = create_test_app()
+    mock_session_log_service.create_session.return_value = get_test_session()
 
-    with patch("app.api.v1.routes.session.SessionLogService") as mock_service:
-        mock_service.return_value.create_session.return_value = get_test_session()
+    response = client.post("/sessions/")
 
-        client = TestClient(app)
-        response = client.post("/sessions/")
+    assert response.json()["user_id"] == "user123"
 
-        assert response.json()["user_id"] == "user123"
 
-
-def test_create_session_returns_active_status():
+def test_create_session_returns_active_status(client, mock_session_log_service):
     """Should return 'active' status for new session."""
-    app = create_test_app()
-
-    with patch("app.api.v1.routes.session.SessionLogService") as mock_service:
-        mock_service.return_value.create_session.return_value = get_test_session()
+    mock_session_log_service.create_session.return_value = get_test_session()
 
-        client = TestClient(app)
-        response = client.post("/sessions/")
+    response = client.post("/sessions/")
 
-        assert response.json()["status"] == "active"
+    assert response.json()["status"] == "active"
 
 
-def test_create_session_includes_created_at():
+def test_create_session_includes_created_at(client, mock_session_log_service):
     """Should include created_at timestamp."""
-    app = create_test_app()
-
-    with patch("app.api.v1.routes.session.SessionLogService") as mock_service:
-        mock_service.return_value.create_session.return_value = get_test_session()
+    mock_session_log_service.create_session.return_value = get_test_session()
 
-        client = TestClient(app)
-        response = client.post("/sessions/")
+    response = client.post("/sessions/")
 
-        assert "created_at" in response.json()
+    assert "created_at" in response.json()
 
 
-def test_create_session_uses_authenticated_user_id():
+def test_create_session_uses_authenticated_user_id(client, mock_session_log_service):
     """Should use authenticated user's ID for session."""
-    app = create_test_app()
+    mock_session_log_service.create_session.return_value = get_test_session()
 
-    with patch("app.api.v1.routes.session.SessionLogService") as mock_service:
-        mock_service.return_value.create_session.return_value = get_test_session()
+    client.post("/sessions/")
 
-        client = TestClient(app)
-        client.post("/sessions/")
-
-        # Verify service was called with correct user_id
-        call_args = mock_service.return_value.create_session.call_args[0][0]
-        assert call_args.user_id == "user123"
+    # Verify service was called with correct user_id
+    call_args = mock_session_log_service.create_session.call_args[0][0]
+    assert call_args.user_id == "user123"
 
 
 # Get session endpoint tests
-def test_get_session_success_returns_200():
+def test_get_session_success_returns_200(client, mock_session_log_service):
     """Should return 200 when getting an existing session."""
-    app = create_test_app()
-
-    with patch("app.api.v1.routes.session.SessionLogService") as mock_service:
-        mock_service.return_value.get_session.return_value = get_test_session()
+    mock_session_log_service.get_session.return_value = get_test_session()
 
-        client = TestClient(app)
-        response = client.get("/sessions/session123")
+    response = client.get("/sessions/session123")
 
-        assert response.status_code == 200
+    assert response.status_code == 200
 
 
-def test_get_session_returns_session_details():
+def test_get_session_returns_session_details(client, mock_session_log_service):
     """Should return session details."""
-    app = create_test_app()
+    mock_session_log_service.get_session.return_value = get_test_session()
 
-    with patch("app.api.v1.routes.session.SessionLogService") as mock_service:
-        mock_service.return_value.get_session.return_value = get_test_session()
+    response = client.get("/sessions/session123")
 
-        client = TestClient(app)
-        response = client.get("/sessions/session123")
+    data = response.json()
+    assert data["session_id"] == "session123"
+    assert data["user_id"] == "user123"
+    assert data["status"] == "active"
 
-        data = response.json()
-        assert data["session_id"] == "session123"
-        assert data["user_id"] == "user123"
-        assert data["status"] == "active"
 
-
-def test_get_session_forbidden_for_different_user():
+def test_get_session_forbidden_for_different_user(client, mock_session_log_service):
     """Should return 403 when accessing another user's session."""
-    app = create_test_app()
-
-    with patch("app.api.v1.routes.session.SessionLogService") as mock_service:
-        # Return session belonging to different user
-        different_user_session = SessionLog(
-            id="session123",
-            user_id="different_user",
-            status="active",
-            mission_id=None,
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
-            completed_at=None,
-        )
-        mock_service.return_value.get_session.return_value = different_user_session
+    # Return session belonging to different user
+    different_user_session = _SESSION.model_copy(update={"user_id": "different_user"})
+    mock_session_log_service.get_session.return_value = different_user_session
 
-        client = TestClient(app)
-        response = client.get("/sessions/session123")
+    response = client.get("/sessions/session123")
 
-        assert response.status_code == 403
+    assert response.status_code == 403
 
 
-def test_get_session_not_found_returns_404():
+def test_get_session_not_found_returns_404(client, mock_session_log_service):
     """Should return 404 when session doesn't exist."""
     from fastapi import HTTPException
 
-    app = create_test_app()
-
-    with patch("app.api.v1.routes.session.SessionLogService") as mock_service:
-        mock_service.return_value.get_session.side_effect = HTTPException(
-            status_code=404, detail="Session not found"
-        )
+    mock_session_log_service.get_session.side_effect = HTTPException(
+        status_code=404, detail="Session not found"
+    )
 
-        client = TestClient(app)
-        response = client.get("/sessions/missing")
+    response = client.get("/sessions/missing")
 
-        assert response.status_code == 404
+    assert response.status_code == 404
@@ -1,11 +1,11 @@
 """Unit tests for user endpoints."""
 
 from datetime import datetime
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
 import pytest
-from starlette.testclient import TestClient
 
 from app.api.v1.routes.user import router
 from app.dependencies.auth import get_current_user
@@ -13,166 +13,118 @@ from app.initializers.firestore import get_db
 from app.models.user import User, UserEnrolledMission
 
 
-@pytest.fixture
-def test_app():
-    app = FastAPI()
-    app.state.db = MagicMock()
-    app.dependency_overrides[get_db] = lambda: MagicMock()
-    return app
-
-
-@pytest.fixture
-def test_user():
-    return User(
-        id="user123",
-        firebase_uid="firebase_uid_123",
-        name="Test User",
-        email="test@example.com",
-    )
-
+pytestmark = pytest.mark.anyio
 
-def test_get_profile_success_returns_200(test_app, test_user):
-    """Should return 200 with user profile data."""
+_EXPECTED_PROFILE = {"id": "user123", "email": "test@example.com", "name": "Test User"}
 
-    @test_app.middleware("http")
-    async def mock_user(request: Request, call_next):
-        request.state.current_user = test_user
-        return await call_next(request)
+_ENROLLED_AT = datetime(2025, 1, 1)
+_LAST_ACCESSED_AT = datetime(2025, 1, 5)
 
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.get_user.return_value = test_user
-        client = TestClient(test_app)
-        response = client.get("/user/profile")
-        assert response.status_code == 200
-
-
-def test_get_profile_returns_user_id(test_app, test_user):
-    """Should return user ID in response."""
-
-    @test_app.middleware("http")
-    async def mock_user(request: Request, call_next):
-        request.state.current_user = test_user
-        return await call_next(request)
-
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.get_user.return_value = test_user
-        client = TestClient(test_app)
-        response = client.get("/user/profile")
-        assert response.json()["id"] == "user123"
+# Read-only, so validated once at import instead of in every test that returns it
+_ENROLLED_MISSIONS = [
+    UserEnrolledMission(
+        mission_id="mission1",
+        mission_title="Learn Python",
+        mission_short_description="Master Python programming",
+        mission_skills=["Python"],
+        progress=50.0,
+        byte_size_checkpoints=["intro", "basics", "advanced", "conclusion"],
+        completed_checkpoints=["intro", "basics"],
+        enrolled_at=_ENROLLED_AT,
+        last_accessed_at=_LAST_ACCESSED_AT,
+        completed=False,
+        updated_at=_LAST_ACCESSED_AT,
+    )
+]
 
 
-def test_get_profile_returns_user_email(test_app, test_user):
-    """Should return user email in response."""
+@pytest.fixture(scope="module")
+def test_app(mock_db):
+    """User router app shared by the module; tests only swap its dependency overrides."""
+    app = FastAPI()
+    app.state.db = mock_db
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.include_router(router, prefix="/user")
+    return app
 
-    @test_app.middleware("http")
-    async def mock_user(request: Request, call_next):
-        request.state.current_user = test_user
-        return await call_next(request)
 
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.get_user.return_value = test_user
-        client = TestClient(test_app)
-        response = client.get("/user/profile")
-        assert response.json()["email"] == "test@example.com"
+@pytest.fixture(scope="module")
+async def client(test_app):
+    # Calls the ASGI app in-process instead of going through TestClient's thread portal
+    async with AsyncClient(
+        transport=ASGITransport(app=test_app), base_url="http://test"
+    ) as async_client:
+        yield async_client
 
 
-def test_get_profile_returns_user_name(test_app, test_user):
-    """Should return user name in response."""
+@pytest.fixture(autouse=True)
+def _override_sandbox(test_app):
+    """Restore the module's base overrides after each test, dropping whatever it added."""
+    saved = dict(test_app.dependency_overrides)
+    yield
+    test_app.dependency_overrides.clear()
+    test_app.dependency_overrides.update(saved)
 
-    @test_app.middleware("http")
-    async def mock_user(request: Request, call_next):
-        request.state.current_user = test_user
-        return await call_next(request)
 
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.get_user.return_value = test_user
-        client = TestClient(test_app)
-        response = client.get("/user/profile")
-        assert response.json()["name"] == "Test User"
+@pytest.fixture
+def mock_user_service(monkeypatch):
+    """UserService instance handed to every route call in the test."""
+    service = MagicMock()
+    monkeypatch.setattr("app.api.v1.routes.user.UserService", lambda db: service)
+    return service
 
 
-def test_get_profile_includes_picture_field(test_app, test_user):
-    """Should include picture field in response."""
+@pytest.fixture(scope="module")
+def test_user():
+    return User(
+        id="user123",
+        firebase_uid="firebase_uid_123",
+        name="Test User",
+        email="test@example.com",
+    )
 
-    @test_app.middleware("http")
-    async def mock_user(request: Request, call_next):
-        request.state.current_user = test_user
-        return await call_next(request)
 
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.get_user.return_value = test_user
-        client = TestClient(test_app)
-        assert "picture" in client.get("/user/profile").json()
+async def test_get_profile_returns_user_fields(test_app, client, test_user, mock_user_service):
+    """Should return 200 with the user's id, email, name and picture field."""
+    test_app.dependency_overrides[get_current_user] = lambda: test_user
+    mock_user_service.get_user.return_value = test_user
+    response = await client.get("/user/profile")
+    assert response.status_code == 200
+    body = response.json()
+    assert {key: body[key] for key in _EXPECTED_PROFILE} == _EXPECTED_PROFILE
+    assert "picture" in body
 
 
-def test_get_enrolled_missions_success(test_app, test_user):
+async def test_get_enrolled_missions_success(test_app, client, test_user, mock_user_service):
     """Should return list of enrolled missions."""
-    enrolled_missions = [
-        UserEnrolledMission(
-            mission_id="mission1",
-            mission_title="Learn Python",
-            mission_short_description="Master Python programming",
-            mission_skills=["Python"],
-            progress=50.0,
-            byte_size_checkpoints=["intro", "basics", "advanced", "conclusion"],
-            completed_checkpoints=["intro", "basics"],
-            enrolled_at=datetime(2025, 1, 1),
-            last_accessed_at=datetime(2025, 1, 5),
-            completed=False,
-            updated_at=datetime(2025, 1, 5),
-        )
-    ]
     test_app.dependency_overrides[get_current_user] = lambda: test_user
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.get_enrolled_missions.return_value = enrolled_missions
-        client = TestClient(test_app)
-        resp = client.get("/user/enrolled-missions")
-        assert resp.status_code == 200
-        assert len(resp.json()) == 1
-        assert resp.json()[0]["mission_id"] == "mission1"
-        assert resp.json()[0]["progress"] == 50.0
-
-
-def test_get_enrolled_missions_empty(test_app, test_user):
-    """Should return empty list when no enrollments."""
-    test_app.dependency_overrides[get_current_user] = lambda: test_user
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.get_enrolled_missions.return_value = []
-        client = TestClient(test_app)
-        resp = client.get("/user/enrolled-missions")
-        assert resp.status_code == 200
-        assert resp.json() == []
+    mock_user_service.get_enrolled_missions.return_value = _ENROLLED_MISSIONS
+    resp = await client.get("/user/enrolled-missions")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert len(body) == 1
+    assert body[0]["mission_id"] == "mission1"
+    assert body[0]["progress"] == 50.0
 
 
-def test_get_enrolled_missions_requires_authentication(test_app):
-    """Should require authentication."""
-    test_app.include_router(router, prefix="/user")
-    client = TestClient(test_app)
-    resp = client.get("/user/enrolled-missions")
-    assert resp.status_code in [401, 403]
+async def test_get_enrolled_missions_empty(test_app, client, test_user, mock_user_service):
+    """Should return empty list when no enrollments."""
+    test_app.dependency_overrides[get_current_user] = lambda: test_user
+    mock_user_service.get_enrolled_missions.return_value = []
+    resp = await client.get("/user/enrolled-missions")
+    assert resp.status_code == 200
+    assert resp.json() == []
 
 
-def test_get_enrolled_missions_respects_limit(test_app, test_user):
+async def test_get_enrolled_missions_respects_limit(test_app, client, test_user, mock_user_service):
     """Should respect limit parameter."""
     test_app.dependency_overrides[get_current_user] = lambda: test_user
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.get_enrolled_missions.return_value = []
-        client = TestClient(test_app)
-        client.get("/user/enrolled-missions?limit=50")
-        mock_service.return_value.get_enrolled_missions.assert_called_once_with(
-            test_user.id, limit=50
-        )
+    mock_user_service.get_enrolled_missions.return_value = []
+    await client.get("/user/enrolled-missions?limit=50")
+    mock_user_service.get_enrolled_missions.assert_called_once_with(test_user.id, limit=50)
 
 
-def test_update_user_name_success(test_app, test_user):
+async def test_update_user_name_success(test_app, client, test_user, mock_user_service):
     """Should successfully update user name."""
     updated_user = User(
         id="user123",
@@ -182,20 +134,17 @@ def test_update_user_name_success(test_app, test_user):
         learning_style=["examples", "step-by-step"],
     )
     test_app.dependency_overrides[get_current_user] = lambda: test_user
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.update_user.return_value = updated_user
-        client = TestClient(test_app)
-        response = client.put(
-            "/user/update",
-            json={"name": "Updated Name"},
-        )
-        assert response.status_code == 200
-        assert response.json()["name"] == "Updated Name"
-        mock_service.return_value.update_user.assert_called_once()
-
-
-def test_update_user_learning_style_success(test_app, test_user):
+    mock_user_service.update_user.return_value = updated_user
+    response = await client.put(
+        "/user/update",
+        json={"name": "Updated Name"},
+    )
+    assert response.status_code == 200
+    assert response.json()["name"] == "Updated Name"
+    mock_user_service.update_user.assert_called_once()
+
+
+async def test_update_user_learning_style_success(test_app, client, test_user, mock_user_service):
     """Should successfully update user learning style."""
     updated_user = User(
         id="user123",
@@ -205,20 +154,19 @@ def test_update_user_learning_style_success(test_app, test_user):
         learning_style=["metaphors", "analogies"],
     )
     test_app.dependency_overrides[get_current_user] = lambda: test_user
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.update_user.return_value = updated_user
-        client = TestClient(test_app)
-        response = client.put(
-            "/user/update",
-            json={"learning_style": ["metaphors", "analogies"]},
-        )
-        assert response.status_code == 200
-        assert response.json()["learning_style"] == ["metaphors", "analogies"]
-        mock_service.return_value.update_user.assert_called_once()
-
-
-def test_update_user_name_and_learning_style_success(test_app, test_user):
+    mock_user_service.update_user.return_value = updated_user
+    response = await client.put(
+        "/user/update",
+        json={"learning_style": ["metaphors", "analogies"]},
+    )
+    assert response.status_code == 200
+    assert response.json()["learning_style"] == ["metaphors", "analogies"]
+    mock_user_service.update_user.assert_called_once()
+
+
+async def test_update_user_name_and_learning_style_success(
+    test_app, client, test_user, mock_user_service
+):
     """Should successfully update both name and learning style."""
     updated_user = User(
         id="user123",
@@ -228,86 +176,65 @@ def test_update_user_name_and_learning_style_success(test_app, test_user):
         learning_style=["step-by-step", "examples"],
     )
     test_app.dependency_overrides[get_current_user] = lambda: test_user
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.update_user.return_value = updated_user
-        client = TestClient(test_app)
-        response = client.put(
-            "/user/update",
-            json={"name": "Updated Name", "learning_style": ["step-by-step", "examples"]},
-        )
-        assert response.status_code == 200
-        assert response.json()["name"] == "Updated Name"
-        assert response.json()["learning_style"] == ["step-by-step", "examples"]
-        mock_service.return_value.update_user.assert_called_once()
-
-
-def test_update_user_empty_body_success(test_app, test_user):
-    """Should handle empty update body (no fields to update)."""
-    test_app.dependency_overrides[get_current_user] = lambda: test_user
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.update_user.return_value = test_user
-        client = TestClient(test_app)
-        response = client.put("/user/update", json={})
-        assert response.status_code == 200
-        mock_service.return_value.update_user.assert_called_once()
+    mock_user_service.update_user.return_value = updated_user
+    response = await client.put(
+        "/user/update",
+        json={"name": "Updated Name", "learning_style": ["step-by-step", "examples"]},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["name"] == "Updated Name"
+    assert body["learning_style"] == ["step-by-step", "examples"]
+    mock_user_service.update_user.assert_called_once()
 
 
-def test_update_user_requires_authentication(test_app):
+async def test_update_user_empty_body_success(test_app, client, test_user, mock_user_service):
+    """Should handle empty update body (no fields to update)."""
+    test_app.dependency_overrides[get_current_user] = lambda: test_user
+    mock_user_service.update_user.return_value = test_user
+    response = await client.put("/user/update", json={})
+    assert response.status_code == 200
+    mock_user_service.update_user.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "method,path,body",
+    [
+        ("get", "/user/enrolled-missions", None),
+        ("put", "/user/update", {"name": "New Name"}),
+    ],
+)
+async def test_user_routes_require_authentication(method, path, body, client):
     """Should require authentication."""
-    test_app.include_router(router, prefix="/user")
-    client = TestClient(test_app)
-    response = client.put("/user/update", json={"name": "New Name"})
+    response = await client.request(method, path, json=body)
     assert response.status_code in [401, 403]
 
 
-def test_update_user_rejects_email_field(test_app, test_user):
-    """Should ignore email field in update request (extra fields are ignored)."""
+@pytest.mark.parametrize(
+    "extra",
+    [
+        {"email": "new@example.com"},
+        {"picture": "https://example.com/pic.jpg"},
+    ],
+    ids=["email", "picture"],
+)
+async def test_update_user_rejects_read_only_field(
+    extra, test_app, client, test_user, mock_user_service
+):
+    """Should ignore email/picture fields in update request (extra fields are ignored)."""
     updated_user = User(
         id="user123",
         firebase_uid="firebase_uid_123",
         name="New Name",
         email="test@example.com",  # Email should remain unchanged
-        learning_style=[],
-    )
-    test_app.dependency_overrides[get_current_user] = lambda: test_user
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.update_user.return_value = updated_user
-        client = TestClient(test_app)
-        response = client.put(
-            "/user/update",
-            json={"name": "New Name", "email": "new@example.com"},
-        )
-        # Extra fields (email) should be ignored, request should succeed
-        assert response.status_code == 200
-        assert response.json()["name"] == "New Name"
-        # Verify that update_user was called (email field was ignored by Pydantic)
-        mock_service.return_value.update_user.assert_called_once()
-
-
-def test_update_user_rejects_picture_field(test_app, test_user):
-    """Should ignore picture field in update request (extra fields are ignored)."""
-    updated_user = User(
-        id="user123",
-        firebase_uid="firebase_uid_123",
-        name="New Name",
-        email="test@example.com",
         picture=None,  # Picture should remain unchanged
         learning_style=[],
     )
     test_app.dependency_overrides[get_current_user] = lambda: test_user
-    test_app.include_router(router, prefix="/user")
-    with patch("app.api.v1.routes.user.UserService") as mock_service:
-        mock_service.return_value.update_user.return_value = updated_user
-        client = TestClient(test_app)
-        response = client.put(
-            "/user/update",
-            json={"name": "New Name", "picture": "https://example.com/pic.jpg"},
-        )
-        # Extra fields (picture) should be ignored, request should succeed
-        assert response.status_code == 200
-        assert response.json()["name"] == "New Name"
-        # Verify that update_user was called (picture field was ignored by Pydantic)
-        mock_service.return_value.update_user.assert_called_once()
+    mock_user_service.update_user.return_value = updated_user
+    response = await client.put("/user/update", json={"name": "New Name", **extra})
+    # Extra fields should be ignored, request should succeed
+    assert response.status_code == 200
+    assert response.json()["name"] == "New Name"
+    # Verify that update_user was called (extra field was ignored by Pydantic)
+    mock_user_service.update_user.assert_called_once()
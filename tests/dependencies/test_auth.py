@@ -1,15 +1,15 @@
 """Unit tests for auth dependencies"""
 
-from unittest.mock import MagicMock
+from types import SimpleNamespace
 
-from fastapi import HTTPException, Request
+from fastapi import HTTPException
 import pytest
 
 from app.dependencies.auth import get_current_user, get_current_user_optional
 from app.models.user import User
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_user():
     """Test user data"""
     return User(
@@ -21,21 +21,17 @@ def mock_user():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_request_with_user(mock_user):
     """Request with authenticated user"""
-    request = MagicMock(spec=Request)
-    request.state.current_user = mock_user
-    return request
+    # The dependencies only read request.state.current_user
+    return SimpleNamespace(state=SimpleNamespace(current_user=mock_user))
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_request_without_user():
     """Request without authenticated user"""
-    request = MagicMock(spec=Request)
-    request.state = MagicMock()
-    del request.state.current_user
-    return request
+    return SimpleNamespace(state=SimpleNamespace())
 
 
 def test_get_current_user_success(mock_request_with_user, mock_user):
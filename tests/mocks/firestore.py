@@ -15,15 +15,18 @@ class FirestoreMocks:
         doc = MagicMock()
         doc.id = "auto_generated_id"
         doc.set = MagicMock()
-        doc.get = MagicMock(return_value=MagicMock(exists=False))
+        doc.get = MagicMock(return_value=FirestoreMocks.document_not_found())
         collection.document.return_value = doc
 
         # Mock where queries returning no results
         where_mock = MagicMock()
         where_mock.get.return_value = []
+        where_mock.stream.return_value = []
         where_mock.limit.return_value.get.return_value = []
+        where_mock.limit.return_value.stream.return_value = []
         collection.where.return_value = where_mock
         collection.order_by.return_value.get.return_value = []
+        collection.limit.return_value.stream.return_value = []
 
         return collection
 
@@ -39,13 +42,18 @@ class FirestoreMocks:
         # Mock where queries returning the item
         collection.where.return_value.limit.return_value.get.return_value = [doc]
         collection.where.return_value.where.return_value.limit.return_value.get.return_value = [doc]
+        collection.where.return_value.limit.return_value.stream.return_value = [doc]
 
         return collection
 
     @staticmethod
     def collection_with_user(user_data):
-        """Collection with existing user for query operations."""
-        return FirestoreMocks.collection_with_item(user_data)
+        """Collection with existing user for point reads and query operations."""
+        collection = FirestoreMocks.collection_with_item(user_data)
+        collection.document.return_value.get.return_value = FirestoreMocks.document_exists(
+            user_data.get("id"), user_data
+        )
+        return collection
 
     @staticmethod
     def collection_with_items(items_data):
@@ -57,8 +65,20 @@ class FirestoreMocks:
 
         # Mock queries returning the items
         collection.where.return_value.limit.return_value.get.return_value = docs
+        collection.where.return_value.limit.return_value.stream.return_value = docs
+        collection.where.return_value.order_by.return_value.limit.return_value.stream.return_value = (
+            docs
+        )
+        # Projected variants of the same queries
+        collection.where.return_value.limit.return_value.select.return_value.stream.return_value = (
+            docs
+        )
+        collection.where.return_value.order_by.return_value.limit.return_value.select.return_value.stream.return_value = (
+            docs
+        )
         collection.order_by.return_value.get.return_value = docs
         collection.limit.return_value.get.return_value = docs
+        collection.limit.return_value.stream.return_value = docs
         collection.get.return_value = docs
 
         return collection
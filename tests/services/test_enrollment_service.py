@@ -3,10 +3,11 @@
 Tests enrollment CRUD operations, dual-write pattern, and edge cases.
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
 from fastapi import HTTPException
+from google.cloud.firestore import DELETE_FIELD, ArrayRemove, ArrayUnion
 import pytest
 
 from app.models.enrollment import EnrollmentCreate, EnrollmentUpdate
@@ -132,7 +133,7 @@ class TestCreateEnrollment:
         service = EnrollmentService(mock_db, mock_user_service)
 
         with patch("app.services.enrollment_service.datetime") as mock_datetime:
-            mock_datetime.today.return_value = datetime(2025, 1, 15)
+            mock_datetime.now.return_value = datetime(2025, 1, 15, tzinfo=timezone.utc)
 
             enrollment = service.create_enrollment(valid_enrollment_create)
 
@@ -153,6 +154,8 @@ class TestCreateEnrollment:
                 "checkpoint3",
             ]
             assert user_enrolled_data.completed_checkpoints == []
+            # Legacy mission without enrolled_user_ids is left untouched
+            mock_db.transaction.return_value.update.assert_not_called()
 
     def test_create_enrollment_user_not_found_raises_404(
         self, mock_db, mock_user_service, valid_enrollment_create
@@ -240,6 +243,54 @@ class TestCreateEnrollment:
         assert exc.value.status_code == 400
         assert "already enrolled" in exc.value.detail
 
+    @pytest.mark.parametrize(
+        "enrolled_user_ids, expected",
+        [
+            (["user999"], ArrayUnion(["user123"])),
+            (["user999"] * 20_000, DELETE_FIELD),
+        ],
+    )
+    def test_create_enrollment_tracks_enrolled_user_ids(
+        self,
+        mock_db,
+        mock_user_service,
+        valid_enrollment_create,
+        existing_user_data,
+        existing_mission_data,
+        enrolled_user_ids,
+        expected,
+    ):
+        """Enrollment adds the user to the mission's enrolled_user_ids, or drops it at the cap."""
+        users_collection = MagicMock()
+        users_collection.document.return_value.get.return_value = FirestoreMocks.document_exists(
+            "user123", existing_user_data
+        )
+        missions_collection = MagicMock()
+        mission_ref = missions_collection.document.return_value
+        mission_ref.get.return_value = FirestoreMocks.document_exists(
+            "mission456", {**existing_mission_data, "enrolled_user_ids": enrolled_user_ids}
+        )
+        enrollments_collection = MagicMock()
+        enrollments_collection.document.return_value.get.return_value = (
+            FirestoreMocks.document_not_found()
+        )
+
+        collections = {
+            "users": users_collection,
+            "missions": missions_collection,
+            "enrollments": enrollments_collection,
+        }
+        mock_db.collection.side_effect = collections.get
+        service = EnrollmentService(mock_db, mock_user_service)
+
+        service.create_enrollment(valid_enrollment_create)
+
+        # The mission is read and updated in the same transaction as the enrollment write
+        transaction = mock_db.transaction.return_value
+        mission_ref.get.assert_called_once_with(transaction=transaction)
+        transaction.set.assert_called_once()
+        transaction.update.assert_called_once_with(mission_ref, {"enrolled_user_ids": expected})
+
     def test_create_enrollment_rollback_on_user_service_failure(
         self,
         mock_db,
@@ -284,7 +335,7 @@ class TestCreateEnrollment:
 
         assert exc.value.status_code == 500
         # Verify rollback (delete was called)
-        enrollments_ref.delete.assert_called_once()
+        mock_db.transaction.return_value.delete.assert_called_once_with(enrollments_ref)
 
 
 # ============================================================================
@@ -313,7 +364,7 @@ class TestUpdateEnrollment:
         update_data = EnrollmentUpdate(progress=50.0, completed=False)
 
         with patch("app.services.enrollment_service.datetime") as mock_datetime:
-            mock_datetime.today.return_value = datetime(2025, 1, 15)
+            mock_datetime.now.return_value = datetime(2025, 1, 15, tzinfo=timezone.utc)
 
             enrollment = service.update_enrollment("user123", "mission456", update_data)
 
@@ -423,9 +474,40 @@ class TestDeleteEnrollment:
         result = service.delete_enrollment("user123", "mission456")
 
         assert "deleted successfully" in result["message"]
-        doc_ref.delete.assert_called_once()
+        transaction = mock_db.transaction.return_value
+        transaction.delete.assert_called_once_with(doc_ref)
+        # Without a tracked enrolled_user_ids field, nothing is written to the mission
+        transaction.update.assert_not_called()
         mock_user_service.delete_enrolled_mission.assert_called_once()
 
+    def test_delete_enrollment_untracks_enrolled_user_id(
+        self, mock_db, mock_user_service, existing_enrollment_data, existing_mission_data
+    ):
+        """Deleting an enrollment removes the user from the mission's enrolled_user_ids."""
+        enrollments_collection = MagicMock()
+        enrollments_collection.document.return_value.get.return_value = (
+            FirestoreMocks.document_exists("user123_mission456", existing_enrollment_data)
+        )
+        missions_collection = MagicMock()
+        mission_ref = missions_collection.document.return_value
+        mission_ref.get.return_value = FirestoreMocks.document_exists(
+            "mission456", {**existing_mission_data, "enrolled_user_ids": ["user123"]}
+        )
+
+        collections = {"enrollments": enrollments_collection, "missions": missions_collection}
+        mock_db.collection.side_effect = lambda name: collections.get(name, MagicMock())
+        service = EnrollmentService(mock_db, mock_user_service)
+
+        service.delete_enrollment("user123", "mission456")
+
+        transaction = mock_db.transaction.return_value
+        mission_ref.get.assert_called_once_with(
+            field_paths=["enrolled_user_ids"], transaction=transaction
+        )
+        transaction.update.assert_called_once_with(
+            mission_ref, {"enrolled_user_ids": ArrayRemove(["user123"])}
+        )
+
     def test_delete_enrollment_not_found_raises_404(self, mock_db, mock_user_service):
         """Delete non-existent enrollment raises 404."""
         enrollments_collection = MagicMock()
@@ -545,8 +627,8 @@ class TestUpdateLastAccessed:
         service = EnrollmentService(mock_db, mock_user_service)
 
         with patch("app.services.enrollment_service.datetime") as mock_datetime:
-            now = datetime(2025, 1, 20, 15, 30, 0)
-            mock_datetime.today.return_value = now
+            now = datetime(2025, 1, 20, 15, 30, 0, tzinfo=timezone.utc)
+            mock_datetime.now.return_value = now
 
             service.update_last_accessed("user123", "mission456")
 
@@ -163,7 +163,7 @@ def test_get_session_log_by_user_and_enrollment_and_mission_found_returns_sessio
 
     doc = MagicMock()
     doc.to_dict.return_value = existing_session_log
-    mock_query.get.return_value = [doc]
+    mock_query.stream.return_value = [doc]
 
     mock_query_1 = MagicMock()
     mock_query_2 = MagicMock()
@@ -171,7 +171,7 @@ def test_get_session_log_by_user_and_enrollment_and_mission_found_returns_sessio
     mock_query_1.where.return_value = mock_query_2
     mock_query_2.where.return_value = mock_query_3
     mock_query_3.limit.return_value = mock_query_3
-    mock_query_3.get.return_value = [doc]
+    mock_query_3.stream.return_value = [doc]
     collection.where.return_value = mock_query_1
     db = FirestoreMocks.mock_db_with_collection(collection)
     service = EnrollmentSessionLogService(db)
@@ -192,7 +192,7 @@ def test_get_session_log_by_user_and_enrollment_and_mission_not_found_returns_no
     collection = FirestoreMocks.collection_empty()
     mock_query = MagicMock()
     mock_query.limit.return_value = mock_query
-    mock_query.get.return_value = []
+    mock_query.stream.return_value = []
 
     mock_query_1 = MagicMock()
     mock_query_2 = MagicMock()
@@ -200,7 +200,7 @@ def test_get_session_log_by_user_and_enrollment_and_mission_not_found_returns_no
     mock_query_1.where.return_value = mock_query_2
     mock_query_2.where.return_value = mock_query_3
     mock_query_3.limit.return_value = mock_query_3
-    mock_query_3.get.return_value = []
+    mock_query_3.stream.return_value = []
     collection.where.return_value = mock_query_1
     db = FirestoreMocks.mock_db_with_collection(collection)
     service = EnrollmentSessionLogService(db)
@@ -441,7 +441,7 @@ def test_get_session_log_by_user_and_enrollment_and_mission_uses_correct_filter(
 
     doc = MagicMock()
     doc.to_dict.return_value = existing_session_log
-    mock_query.get.return_value = [doc]
+    mock_query.stream.return_value = [doc]
 
     mock_query_1 = MagicMock()
     mock_query_2 = MagicMock()
@@ -449,7 +449,7 @@ def test_get_session_log_by_user_and_enrollment_and_mission_uses_correct_filter(
     mock_query_1.where.return_value = mock_query_2
     mock_query_2.where.return_value = mock_query_3
     mock_query_3.limit.return_value = mock_query_3
-    mock_query_3.get.return_value = [doc]
+    mock_query_3.stream.return_value = [doc]
     collection.where.return_value = mock_query_1
     db = FirestoreMocks.mock_db_with_collection(collection)
     service = EnrollmentSessionLogService(db)
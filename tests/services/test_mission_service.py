@@ -4,13 +4,17 @@ Tests mission CRUD operations, update propagation, and edge cases.
 """
 
 from datetime import datetime
+import threading
 from unittest.mock import MagicMock, patch
 
 from fastapi import HTTPException
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore import SERVER_TIMESTAMP
 import pytest
 
 from app.models.mission import MissionCreate, MissionUpdate
-from app.services.mission_service import MissionService
+from app.services import mission_service as mission_service_module
+from app.services.mission_service import MissionService, flush_pending_propagations
 from tests.mocks.firestore import FirestoreMocks
 
 
@@ -19,6 +23,13 @@ from tests.mocks.firestore import FirestoreMocks
 # ============================================================================
 
 
+@pytest.fixture(autouse=True)
+def propagate_synchronously():
+    """Disable propagation debouncing so updates fan out before assertions run."""
+    with patch("app.services.mission_service._PROPAGATION_DEBOUNCE_SECONDS", 0):
+        yield
+
+
 @pytest.fixture
 def mock_db():
     """Generic database mock."""
@@ -103,7 +114,7 @@ class TestCreateMission:
         service = MissionService(mock_db, mock_user_service)
 
         with patch("app.services.mission_service.datetime") as mock_datetime:
-            mock_datetime.today.return_value = datetime(2025, 1, 15)
+            mock_datetime.now.return_value = datetime(2025, 1, 15)
 
             mission = service.create_mission(valid_mission_create)
 
@@ -111,7 +122,12 @@ class TestCreateMission:
             assert mission.id == "auto_generated_id"
             assert mission.creator_id == "creator123"
             assert len(mission.skills) == 2
+            assert mission.created_at == datetime(2025, 1, 15)
             doc_ref.set.assert_called_once()
+            # Stored timestamps are assigned by the server
+            written = doc_ref.set.call_args.args[0]
+            assert written["created_at"] is SERVER_TIMESTAMP
+            assert written["updated_at"] is SERVER_TIMESTAMP
 
     def test_create_mission_without_optional_fields(self, mock_db, mock_user_service):
         """Create mission with minimal required fields."""
@@ -161,6 +177,10 @@ class TestGetMission:
 
         assert mission.id == "mission123"
         assert mission.title == "Existing Mission"
+        # The projection leaves out the potentially large enrolled_user_ids list
+        field_paths = missions_collection.document.return_value.get.call_args.kwargs["field_paths"]
+        assert "title" in field_paths
+        assert "enrolled_user_ids" not in field_paths
 
     def test_get_mission_not_found_raises_404(self, mock_db, mock_user_service):
         """Get non-existent mission raises 404."""
@@ -203,7 +223,7 @@ class TestUpdateMission:
         update_data = MissionUpdate(is_public=False)
 
         with patch("app.services.mission_service.datetime") as mock_datetime:
-            mock_datetime.today.return_value = datetime(2025, 1, 20)
+            mock_datetime.now.return_value = datetime(2025, 1, 20)
 
             mission = service.update_mission("mission123", update_data)
 
@@ -222,14 +242,14 @@ class TestUpdateMission:
         doc_ref.get.side_effect = [existing_doc, existing_doc]
         missions_collection.document.return_value = doc_ref
 
-        # Mock enrollments collection with proper where().get() chain
+        # Mock enrollments collection with proper where().stream() chain
         enrollments_collection = MagicMock()
         enrollment_doc = MagicMock()
         enrollment_doc.id = "user123_mission123"
         enrollment_doc.to_dict.return_value = enrollment_data
 
         where_mock = MagicMock()
-        where_mock.get.return_value = [enrollment_doc]
+        where_mock.stream.return_value = [enrollment_doc]
         enrollments_collection.where.return_value = where_mock
 
         def collection_side_effect(name):
@@ -248,13 +268,23 @@ class TestUpdateMission:
         )
 
         with patch("app.services.mission_service.datetime") as mock_datetime:
-            mock_datetime.today.return_value = datetime(2025, 1, 20)
+            mock_datetime.now.return_value = datetime(2025, 1, 20)
             with patch("app.services.mission_service.logger"):
                 mission = service.update_mission("mission123", update_data)
 
                 assert mission.id == "mission123"
-                # Should call user service to propagate updates
-                mock_user_service.update_enrolled_mission.assert_called_once()
+                # Should propagate updates through a single batched write
+                batch = mock_db.batch.return_value
+                batch.update.assert_called_once()
+                enrolled_ref, payload = batch.update.call_args.args
+                assert payload["mission_title"] == "Updated Mission Title"
+                assert payload["mission_short_description"] == "Updated description"
+                assert "mission_skills" not in payload
+                mock_db.document.assert_called_once_with(
+                    "users/user123/enrolled_missions/mission123"
+                )
+                batch.commit.assert_called_once()
+                mock_user_service.update_enrolled_mission.assert_not_called()
 
     def test_update_mission_not_found_raises_404(self, mock_db, mock_user_service):
         """Update non-existent mission raises 404."""
@@ -293,16 +323,23 @@ class TestDeleteMission:
         # Mock checkpoints subcollection
         checkpoint1 = MagicMock()
         checkpoint2 = MagicMock()
-        doc_ref.collection.return_value.get.return_value = [checkpoint1, checkpoint2]
+        checkpoints_collection = MagicMock()
+        checkpoints_collection.get.return_value = [checkpoint1, checkpoint2]
 
         missions_collection.document.return_value = doc_ref
-        mock_db.collection.return_value = missions_collection
+        collections = {
+            "missions": missions_collection,
+            "missions/mission123/checkpoints": checkpoints_collection,
+        }
+        mock_db.collection.side_effect = lambda path: collections.get(path, MagicMock())
         service = MissionService(mock_db, mock_user_service)
 
         result = service.delete_mission("mission123")
 
         assert "deleted successfully" in result["message"]
-        doc_ref.delete.assert_called_once()
+        doc_ref.delete.assert_called_once_with(option=mock_db.write_option.return_value)
+        mock_db.write_option.assert_called_once_with(exists=True)
+        doc_ref.get.assert_not_called()
         # Verify checkpoints were deleted
         checkpoint1.reference.delete.assert_called_once()
         checkpoint2.reference.delete.assert_called_once()
@@ -311,8 +348,7 @@ class TestDeleteMission:
         """Delete non-existent mission raises 404."""
         missions_collection = MagicMock()
         doc_ref = MagicMock()
-        not_found = FirestoreMocks.document_not_found()
-        doc_ref.get.return_value = not_found
+        doc_ref.delete.side_effect = NotFound("No document to delete")
         missions_collection.document.return_value = doc_ref
 
         mock_db.collection.return_value = missions_collection
@@ -322,6 +358,8 @@ class TestDeleteMission:
             service.delete_mission("nonexistent")
 
         assert exc.value.status_code == 404
+        # Checkpoints are left alone when the mission doesn't exist
+        missions_collection.get.assert_not_called()
 
 
 # ============================================================================
@@ -361,6 +399,28 @@ class TestGetMissionsByCreator:
 
         assert len(missions) == 3
         assert missions[0].creator_id == "creator123"
+        missions_collection.where.return_value.where.assert_not_called()
+        missions_collection.where.return_value.order_by.assert_called_once_with(
+            "created_at", direction="DESCENDING"
+        )
+
+    def test_get_missions_by_creator_filters_visibility(self, mock_db, mock_user_service):
+        """Passing is_public adds the visibility filter to the creator query."""
+        missions_collection = MagicMock()
+        creator_query = missions_collection.where.return_value
+        creator_query.where.return_value.order_by.return_value.limit.return_value.select.return_value.stream.return_value = (
+            []
+        )
+        mock_db.collection.return_value = missions_collection
+        service = MissionService(mock_db, mock_user_service)
+
+        missions = service.get_missions_by_creator("creator123", is_public=False, limit=10)
+
+        assert missions == []
+        visibility_filter = creator_query.where.call_args.kwargs["filter"]
+        assert visibility_filter.field_path == "is_public"
+        assert visibility_filter.value is False
+        creator_query.where.return_value.order_by.return_value.limit.assert_called_once_with(10)
 
     def test_get_missions_by_creator_empty(self, mock_db, mock_user_service):
         """Get missions for creator with no missions returns empty list."""
@@ -464,14 +524,14 @@ class TestPropagationEdgeCases:
             "progress": 50.0,
         }
 
-        # Mock enrollments collection with proper where().get() chain
+        # Mock enrollments collection with proper where().stream() chain
         enrollments_collection = MagicMock()
         enrollment_doc = MagicMock()
         enrollment_doc.id = "mission123_missing"
         enrollment_doc.to_dict.return_value = bad_enrollment
 
         where_mock = MagicMock()
-        where_mock.get.return_value = [enrollment_doc]
+        where_mock.stream.return_value = [enrollment_doc]
         enrollments_collection.where.return_value = where_mock
 
         def collection_side_effect(name):
@@ -506,7 +566,7 @@ class TestPropagationEdgeCases:
         enrollment2 = enrollment_data.copy()
         enrollment2["user_id"] = "user456"
 
-        # Mock enrollments collection with proper where().get() chain
+        # Mock enrollments collection with proper where().stream() chain
         enrollments_collection = MagicMock()
 
         enrollment_doc1 = MagicMock()
@@ -518,7 +578,7 @@ class TestPropagationEdgeCases:
         enrollment_doc2.to_dict.return_value = enrollment2
 
         where_mock = MagicMock()
-        where_mock.get.return_value = [enrollment_doc1, enrollment_doc2]
+        where_mock.stream.return_value = [enrollment_doc1, enrollment_doc2]
         enrollments_collection.where.return_value = where_mock
 
         def collection_side_effect(name):
@@ -526,8 +586,12 @@ class TestPropagationEdgeCases:
                 return missions_collection
             elif name == "enrollments":
                 return enrollments_collection
+            elif name == "users":
+                return MagicMock()
 
         mock_db.collection.side_effect = collection_side_effect
+        # Batch fails as a whole (e.g. one enrolled mission doc is missing)
+        mock_db.batch.return_value.commit.side_effect = NotFound("No document to update")
 
         # First user update fails, second succeeds
         call_count = [0]
@@ -551,22 +615,67 @@ class TestPropagationEdgeCases:
             # Should have logged warnings
             assert mock_logger.warning.called
 
+    def test_propagation_uses_enrolled_user_ids(
+        self, mock_db, mock_user_service, existing_mission_data
+    ):
+        """Propagation reads enrolled users from the mission doc instead of querying."""
+        missions_collection = MagicMock()
+        doc_ref = MagicMock()
+        existing_doc = FirestoreMocks.document_exists(
+            "mission123", {**existing_mission_data, "enrolled_user_ids": ["user123", "user456"]}
+        )
+        doc_ref.get.side_effect = [existing_doc, existing_doc]
+        missions_collection.document.return_value = doc_ref
+        enrollments_collection = MagicMock()
 
-# ============================================================================
-# EDGE CASES
-# ============================================================================
+        collections = {"missions": missions_collection, "enrollments": enrollments_collection}
+        mock_db.collection.side_effect = collections.get
+        service = MissionService(mock_db, mock_user_service)
 
+        with patch("app.services.mission_service.logger"):
+            service.update_mission("mission123", MissionUpdate(title="Updated Title"))
 
-class TestEdgeCases:
-    """Test edge cases and special scenarios."""
+        enrollments_collection.where.assert_not_called()
+        assert mock_db.batch.return_value.update.call_count == 2
+        assert [c.args[0] for c in mock_db.document.call_args_list] == [
+            "users/user123/enrolled_missions/mission123",
+            "users/user456/enrolled_missions/mission123",
+        ]
 
-    def test_create_mission_with_enrollment_success(
-        self, mock_db, mock_user_service, valid_mission_create
+    def test_propagation_skipped_when_values_unchanged(
+        self, mock_db, mock_user_service, existing_mission_data
     ):
-        """Create mission with auto-enrollment for creator and session_log."""
+        """Re-sending the current title does not fan out to enrolled users."""
         missions_collection = MagicMock()
         doc_ref = MagicMock()
-        doc_ref.id = "new_mission_id"
+        existing_doc = FirestoreMocks.document_exists("mission123", existing_mission_data)
+        doc_ref.get.side_effect = [existing_doc, existing_doc]
+        missions_collection.document.return_value = doc_ref
+        enrollments_collection = MagicMock()
+
+        collections = {"missions": missions_collection, "enrollments": enrollments_collection}
+        mock_db.collection.side_effect = collections.get
+        service = MissionService(mock_db, mock_user_service)
+
+        service.update_mission(
+            "mission123",
+            MissionUpdate(title=existing_mission_data["title"], is_public=False),
+        )
+
+        doc_ref.update.assert_called_once()
+        enrollments_collection.where.assert_not_called()
+        mock_db.batch.assert_not_called()
+
+    def test_propagation_only_sends_changed_fields(
+        self, mock_db, mock_user_service, existing_mission_data
+    ):
+        """Only propagated fields whose values differ are written to enrolled users."""
+        missions_collection = MagicMock()
+        doc_ref = MagicMock()
+        existing_doc = FirestoreMocks.document_exists(
+            "mission123", {**existing_mission_data, "enrolled_user_ids": ["user123"]}
+        )
+        doc_ref.get.side_effect = [existing_doc, existing_doc]
         missions_collection.document.return_value = doc_ref
 
         def collection_side_effect(name):
@@ -575,103 +684,246 @@ class TestEdgeCases:
             return MagicMock()
 
         mock_db.collection.side_effect = collection_side_effect
+        service = MissionService(mock_db, mock_user_service)
 
-        # Mock enrollment service
-        from app.services.enrollment_service import EnrollmentService
-
-        with patch.object(EnrollmentService, "create_enrollment") as mock_create_enrollment:
-            from app.models.enrollment import Enrollment
-
-            mock_create_enrollment.return_value = Enrollment(
-                id="creator123_new_mission_id",
-                user_id="creator123",
-                mission_id="new_mission_id",
-                progress=0.0,
-                enrolled_at=datetime(2025, 1, 15),
-                last_accessed_at=datetime(2025, 1, 15),
-                completed=False,
-                created_at=datetime(2025, 1, 15),
-                updated_at=datetime(2025, 1, 15),
+        with patch("app.services.mission_service.logger"):
+            service.update_mission(
+                "mission123",
+                MissionUpdate(title=existing_mission_data["title"], skills=["Python", "Go"]),
             )
 
-            # Mock enrollment session log service
-            from app.models.enrollment_session_log import EnrollmentSessionLog
-            from app.services.enrollment_session_log_service import EnrollmentSessionLogService
-
-            with patch.object(
-                EnrollmentSessionLogService, "create_session_log"
-            ) as mock_create_session_log:
-                mock_create_session_log.return_value = EnrollmentSessionLog(
-                    id="enrollment_session_log123",
-                    enrollment_id="creator123_new_mission_id",
-                    user_id="creator123",
-                    mission_id="new_mission_id",
-                    status="created",
-                    created_at=datetime(2025, 1, 15),
-                    updated_at=datetime(2025, 1, 15),
-                    started_at=None,
-                    completed_at=None,
-                )
+        payload = mock_db.batch.return_value.update.call_args.args[1]
+        assert payload["mission_skills"] == ["Python", "Go"]
+        assert "mission_title" not in payload
 
-                service = MissionService(mock_db, mock_user_service)
+    def test_propagation_coalesces_rapid_updates(
+        self, mock_db, mock_user_service, existing_mission_data
+    ):
+        """Updates within the debounce window are merged into one propagation."""
+        missions_collection = MagicMock()
+        doc_ref = MagicMock()
+        doc_ref.get.return_value = FirestoreMocks.document_exists(
+            "mission123", {**existing_mission_data, "enrolled_user_ids": ["user123"]}
+        )
+        missions_collection.document.return_value = doc_ref
 
-                mission, enrollment, enrollment_session_log = (
-                    service.create_mission_with_enrollment(
-                        valid_mission_create, user_id="creator123"
-                    )
-                )
+        def collection_side_effect(name):
+            if name == "missions":
+                return missions_collection
+            return MagicMock()
 
-                assert mission.id == "new_mission_id"
-                assert enrollment.user_id == "creator123"
-                assert enrollment.mission_id == "new_mission_id"
-                assert enrollment_session_log.id == "enrollment_session_log123"
-                assert enrollment_session_log.mission_id == "new_mission_id"
-                assert enrollment_session_log.user_id == "creator123"
-                assert enrollment_session_log.enrollment_id == "creator123_new_mission_id"
-
-                # Verify enrollment_session_log was created with correct data
-                mock_create_session_log.assert_called_once()
-                call_args = mock_create_session_log.call_args[0][0]
-                assert call_args.mission_id == "new_mission_id"
-                assert call_args.user_id == "creator123"
-                assert call_args.enrollment_id == "creator123_new_mission_id"
-
-                # Verify enrollment was created
-                mock_create_enrollment.assert_called_once()
-                enrollment_call = mock_create_enrollment.call_args[0][0]
-                assert enrollment_call.user_id == "creator123"
-                assert enrollment_call.mission_id == "new_mission_id"
-
-    def test_create_mission_with_enrollment_rollback_on_failure(
-        self, mock_db, mock_user_service, valid_mission_create
+        mock_db.collection.side_effect = collection_side_effect
+        service = MissionService(mock_db, mock_user_service)
+
+        with (
+            patch("app.services.mission_service._PROPAGATION_DEBOUNCE_SECONDS", 0.5),
+            patch("app.services.mission_service.threading.Timer") as mock_timer,
+            patch("app.services.mission_service.logger"),
+        ):
+            service.update_mission("mission123", MissionUpdate(title="First Title"))
+            service.update_mission("mission123", MissionUpdate(title="Second Title"))
+            service.update_mission("mission123", MissionUpdate(skills=["Go"]))
+
+            # One timer for the burst, nothing written yet
+            mock_timer.assert_called_once()
+            mock_db.batch.assert_not_called()
+
+            # Fire the timer
+            _, flush = mock_timer.call_args.args
+            flush(*mock_timer.call_args.kwargs["args"])
+
+        batch = mock_db.batch.return_value
+        batch.update.assert_called_once()
+        payload = batch.update.call_args.args[1]
+        assert payload["mission_title"] == "Second Title"
+        assert payload["mission_skills"] == ["Go"]
+
+    def test_flush_pending_propagations_drains_queue(
+        self, mock_db, mock_user_service, existing_mission_data
     ):
-        """Mission is deleted if enrollment creation fails."""
+        """Shutdown flush writes pending propagations without waiting for their timers."""
         missions_collection = MagicMock()
         doc_ref = MagicMock()
-        doc_ref.id = "new_mission_id"
+        doc_ref.get.return_value = FirestoreMocks.document_exists(
+            "mission123", {**existing_mission_data, "enrolled_user_ids": ["user123"]}
+        )
         missions_collection.document.return_value = doc_ref
+        mock_db.collection.side_effect = lambda name: (
+            missions_collection if name == "missions" else MagicMock()
+        )
+        service = MissionService(mock_db, mock_user_service)
+
+        with (
+            patch("app.services.mission_service._PROPAGATION_DEBOUNCE_SECONDS", 0.5),
+            patch("app.services.mission_service.threading.Timer") as mock_timer,
+            patch("app.services.mission_service.logger"),
+        ):
+            service.update_mission("mission123", MissionUpdate(title="Updated Title"))
+            mock_db.batch.assert_not_called()
+
+            flush_pending_propagations()
+
+        mock_timer.return_value.cancel.assert_called_once()
+        payload = mock_db.batch.return_value.update.call_args.args[1]
+        assert payload["mission_title"] == "Updated Title"
+        assert not mission_service_module._pending_propagations
+
+    def test_flushes_for_one_mission_commit_in_order(self, mock_db, mock_user_service):
+        """A newer payload waits for the mission's in-flight flush instead of overtaking it."""
+        service = MissionService(mock_db, mock_user_service)
+        committed = []
+        newer_flush = None
+
+        def propagate(mission_id, update_data, enrolled_user_ids):
+            nonlocal newer_flush
+            if newer_flush is None:
+                # A newer update lands and its timer fires while this flush is in flight
+                service._schedule_propagation(mission_id, {"title": "Newer"}, None)
+                newer_flush = threading.Thread(
+                    target=mission_service_module._flush_mission_propagation, args=(mission_id,)
+                )
+                newer_flush.start()
+                newer_flush.join(timeout=0.2)
+            committed.append(update_data["title"])
+
+        with (
+            patch("app.services.mission_service._PROPAGATION_DEBOUNCE_SECONDS", 0.5),
+            patch("app.services.mission_service.threading.Timer"),
+            patch.object(service, "_propagate_mission_updates", side_effect=propagate),
+        ):
+            service._schedule_propagation("mission123", {"title": "Older"}, None)
+            flush_pending_propagations()
+            newer_flush.join()
+
+        assert committed == ["Older", "Newer"]
+        assert not mission_service_module._pending_propagations
+
+    def test_propagation_commits_in_chunks(
+        self, mock_db, mock_user_service, existing_mission_data, enrollment_data
+    ):
+        """Propagation splits enrolled users across multiple batch commits."""
+        missions_collection = MagicMock()
+        doc_ref = MagicMock()
+        existing_doc = FirestoreMocks.document_exists("mission123", existing_mission_data)
+        doc_ref.get.side_effect = [existing_doc, existing_doc]
+        missions_collection.document.return_value = doc_ref
+
+        enrollment_docs = []
+        for i in range(5):
+            enrollment_doc = MagicMock()
+            enrollment_doc.id = f"user{i}_mission123"
+            enrollment_doc.to_dict.return_value = {**enrollment_data, "user_id": f"user{i}"}
+            enrollment_docs.append(enrollment_doc)
+
+        enrollments_collection = MagicMock()
+        enrollments_collection.where.return_value.stream.return_value = enrollment_docs
 
         def collection_side_effect(name):
             if name == "missions":
                 return missions_collection
-            return MagicMock()
+            elif name == "enrollments":
+                return enrollments_collection
+            elif name == "users":
+                return MagicMock()
 
         mock_db.collection.side_effect = collection_side_effect
+        service = MissionService(mock_db, mock_user_service)
 
-        from app.services.enrollment_service import EnrollmentService
+        with (
+            patch("app.services.mission_service._PROPAGATION_BATCH_SIZE", 2),
+            patch("app.services.mission_service.logger"),
+        ):
+            service.update_mission("mission123", MissionUpdate(title="Updated Title"))
+
+        # 5 users in chunks of 2 -> 3 batches
+        assert mock_db.batch.call_count == 3
+        assert mock_db.batch.return_value.update.call_count == 5
+        assert mock_db.batch.return_value.commit.call_count == 3
+        mock_user_service.update_enrolled_mission.assert_not_called()
 
-        with patch.object(EnrollmentService, "create_enrollment") as mock_create_enrollment:
-            mock_create_enrollment.side_effect = HTTPException(
-                status_code=500, detail="Enrollment failed"
-            )
 
-            service = MissionService(mock_db, mock_user_service)
+# ============================================================================
+# EDGE CASES
+# ============================================================================
+
+
+class TestEdgeCases:
+    """Test edge cases and special scenarios."""
+
+    def test_create_mission_with_enrollment_success(
+        self, mock_db, mock_user_service, valid_mission_create
+    ):
+        """Create mission, creator enrollment and session_log in one transaction."""
+        missions_collection = MagicMock()
+        missions_collection.document.return_value.id = "new_mission_id"
+        enrollments_collection = MagicMock()
+        users_collection = MagicMock()
+        user_ref = users_collection.document.return_value
+        user_ref.get.return_value = FirestoreMocks.document_exists("creator123", {})
+        session_logs_collection = MagicMock()
+        session_logs_collection.document.return_value.id = "enrollment_session_log123"
+
+        collections = {
+            "missions": missions_collection,
+            "enrollments": enrollments_collection,
+            "users": users_collection,
+            "enrollment_session_logs": session_logs_collection,
+        }
+        mock_db.collection.side_effect = collections.get
+        service = MissionService(mock_db, mock_user_service)
+
+        mission, enrollment, enrollment_session_log = service.create_mission_with_enrollment(
+            valid_mission_create, user_id="creator123"
+        )
+
+        assert mission.id == "new_mission_id"
+        assert enrollment.id == "creator123_new_mission_id"
+        assert enrollment.user_id == "creator123"
+        assert enrollment.mission_id == "new_mission_id"
+        assert enrollment_session_log.id == "enrollment_session_log123"
+        assert enrollment_session_log.mission_id == "new_mission_id"
+        assert enrollment_session_log.user_id == "creator123"
+        assert enrollment_session_log.enrollment_id == "creator123_new_mission_id"
+
+        # All four documents are written through the transaction
+        transaction = mock_db.transaction.return_value
+        user_ref.get.assert_called_once_with(transaction=transaction)
+        assert transaction.set.call_count == 4
+        enrollments_collection.document.assert_called_once_with("creator123_new_mission_id")
+        mock_db.document.assert_called_once_with(
+            "users/creator123/enrolled_missions/new_mission_id"
+        )
+        enrolled_mission = transaction.set.call_args_list[2].args[1]
+        assert enrolled_mission["mission_title"] == "Test Mission"
+        assert enrolled_mission["byte_size_checkpoints"] == (
+            valid_mission_create.byte_size_checkpoints
+        )
+        # No separate writes outside the transaction
+        missions_collection.document.return_value.set.assert_not_called()
+        mock_user_service.create_enrolled_mission.assert_not_called()
+
+    def test_create_mission_with_enrollment_user_not_found(
+        self, mock_db, mock_user_service, valid_mission_create
+    ):
+        """Nothing is written if the creator does not exist."""
+        users_collection = MagicMock()
+        users_collection.document.return_value.get.return_value = (
+            FirestoreMocks.document_not_found()
+        )
+
+        def collection_side_effect(name):
+            if name == "users":
+                return users_collection
+            return MagicMock()
+
+        mock_db.collection.side_effect = collection_side_effect
+        service = MissionService(mock_db, mock_user_service)
 
-            with pytest.raises(HTTPException):
-                service.create_mission_with_enrollment(valid_mission_create, user_id="creator123")
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_mission_with_enrollment(valid_mission_create, user_id="creator123")
 
-            # Verify mission deletion was attempted
-            doc_ref.delete.assert_called_once()
+        assert exc_info.value.status_code == 404
+        mock_db.transaction.return_value.set.assert_not_called()
 
     def test_partial_mission_update(self, mock_db, mock_user_service, existing_mission_data):
         """Partial update only changes specified fields."""
@@ -3,6 +3,7 @@
 from datetime import datetime
 
 from fastapi import HTTPException, status
+from google.api_core.exceptions import NotFound
 import pytest
 
 from app.models.session_log import SessionLogCreate, SessionLogUpdate
@@ -270,7 +271,7 @@ def test_get_user_sessions_returns_list(existing_session, completed_session):
     doc1.to_dict.return_value = existing_session
     doc2 = MagicMock()
     doc2.to_dict.return_value = completed_session
-    mock_query.get.return_value = [doc1, doc2]
+    mock_query.stream.return_value = [doc1, doc2]
 
     collection.where.return_value = mock_query
     db = FirestoreMocks.mock_db_with_collection(collection)
@@ -289,7 +290,7 @@ def test_get_user_sessions_respects_limit():
     mock_query = MagicMock()
     mock_query.order_by.return_value = mock_query
     mock_query.limit.return_value = mock_query
-    mock_query.get.return_value = []
+    mock_query.stream.return_value = []
 
     collection.where.return_value = mock_query
     db = FirestoreMocks.mock_db_with_collection(collection)
@@ -312,14 +313,17 @@ def test_delete_session_success(existing_session):
     result = service.delete_session("session123")
 
     assert "deleted successfully" in result["message"]
-    collection.document.return_value.delete.assert_called_once()
+    collection.document.return_value.delete.assert_called_once_with(
+        option=db.write_option.return_value
+    )
+    db.write_option.assert_called_once_with(exists=True)
+    collection.document.return_value.get.assert_not_called()
 
 
 def test_delete_session_not_found_raises_404():
     """Should raise 404 when deleting non-existent session."""
     collection = FirestoreMocks.collection_empty()
-    doc = FirestoreMocks.document_not_found()
-    collection.document.return_value.get.return_value = doc
+    collection.document.return_value.delete.side_effect = NotFound("No document to delete")
     db = FirestoreMocks.mock_db_with_collection(collection)
     service = SessionLogService(db)
 
@@ -3,13 +3,15 @@
 Tests all CRUD operations, enrolled missions management, and edge cases.
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
 from fastapi import HTTPException
+from google.api_core.exceptions import AlreadyExists, NotFound
 import pytest
 
 from app.models.user import UserCreate, UserEnrolledMissionCreate, UserEnrolledMissionUpdate
+from app.services import user_service as user_service_module
 from app.services.user_service import UserService
 from tests.mocks.firestore import FirestoreMocks
 
@@ -19,6 +21,14 @@ from tests.mocks.firestore import FirestoreMocks
 # ============================================================================
 
 
+@pytest.fixture(autouse=True)
+def clear_email_cache():
+    """Keep the process-wide email cache from leaking between tests."""
+    user_service_module._email_cache.clear()
+    yield
+    user_service_module._email_cache.clear()
+
+
 @pytest.fixture
 def mock_db():
     """Generic database mock (infrastructure)."""
@@ -93,7 +103,64 @@ class TestCreateUser:
             assert user.name == "Test User"
             assert user.id == "auto_generated_id"
             assert user.created_at == datetime(2025, 1, 15, 10, 30, 0)
-            collection.document.assert_called_once()
+            collection.document.assert_called_with(
+                user_service_module._email_doc_id("test@example.com")
+            )
+            # Existence checks and the write go through one transaction
+            transaction = mock_db.transaction.return_value
+            collection.document.return_value.get.assert_called_once_with(transaction=transaction)
+            collection.where.return_value.limit.return_value.stream.assert_called_once_with(
+                transaction=transaction
+            )
+            transaction.create.assert_called_once()
+            assert transaction.create.call_args.args[0] is collection.document.return_value
+            assert transaction.create.call_args.args[1]["picture"] == "https://example.com/pic.jpg"
+
+    def test_create_user_stores_normalized_email(self, mock_db, valid_user_create_data):
+        """The stored email, document ID and legacy query all use the normalized email."""
+        collection = FirestoreMocks.collection_empty()
+        mock_db.collection.return_value = collection
+        service = UserService(mock_db)
+
+        user = service.create_user(
+            UserCreate(**{**valid_user_create_data.model_dump(), "email": "Test@Example.com"})
+        )
+
+        assert user.email == "test@example.com"
+        collection.document.assert_called_with(
+            user_service_module._email_doc_id("test@example.com")
+        )
+        # Legacy users were stored with the email as received, so the query keeps that form
+        assert collection.where.call_args.kwargs["filter"].value == "Test@example.com"
+        created = mock_db.transaction.return_value.create.call_args.args[1]
+        assert created["email"] == "test@example.com"
+
+    def test_create_user_legacy_duplicate_raises_400(self, mock_db, valid_user_create_data):
+        """A user stored under a legacy auto-generated ID blocks the create with 400."""
+        collection = FirestoreMocks.collection_empty()
+        collection.where.return_value.limit.return_value.stream.return_value = [MagicMock()]
+        mock_db.collection.return_value = collection
+        service = UserService(mock_db)
+
+        with pytest.raises(HTTPException) as exc:
+            service.create_user(valid_user_create_data)
+
+        assert exc.value.status_code == 400
+        mock_db.transaction.return_value.create.assert_not_called()
+
+    def test_create_user_concurrent_duplicate_raises_400(self, mock_db, valid_user_create_data):
+        """A concurrent create for the same email fails atomically with 400."""
+        from google.api_core.exceptions import AlreadyExists
+
+        collection = FirestoreMocks.collection_empty()
+        mock_db.collection.return_value = collection
+        mock_db.transaction.return_value.create.side_effect = AlreadyExists("exists")
+        service = UserService(mock_db)
+
+        with pytest.raises(HTTPException) as exc:
+            service.create_user(valid_user_create_data)
+
+        assert exc.value.status_code == 400
 
     def test_create_user_duplicate_email_raises_400(self, mock_db, existing_user_data):
         """Creating user with existing email raises 400."""
@@ -165,6 +232,21 @@ class TestGetUser:
         assert user.learning_style == ["examples", "step-by-step"]
         collection.document.assert_called_once_with("user123")
 
+    def test_get_user_restores_picture_url(self, mock_db, existing_user_data):
+        """Users are built from stored data without validation; picture is converted back."""
+        from pydantic import AnyUrl
+
+        collection = MagicMock()
+        doc = FirestoreMocks.document_exists("user123", existing_user_data)
+        collection.document.return_value.get.return_value = doc
+        mock_db.collection.return_value = collection
+        service = UserService(mock_db)
+
+        user = service.get_user("user123")
+
+        assert isinstance(user.picture, AnyUrl)
+        assert str(user.picture) == existing_user_data["picture"]
+
     def test_get_user_not_found_raises_404(self, mock_db):
         """Get non-existent user raises 404."""
         collection = MagicMock()
@@ -190,6 +272,49 @@ class TestGetUser:
         assert user.email == existing_user_data["email"]
         assert user.id == "user123"
 
+    def test_get_user_by_email_uses_cache_on_repeat_lookup(self, mock_db, existing_user_data):
+        """Repeated email lookups within the TTL issue a single query."""
+        collection = FirestoreMocks.collection_with_user(existing_user_data)
+        mock_db.collection.return_value = collection
+        service = UserService(mock_db)
+
+        first = service.get_user_by_email(existing_user_data["email"])
+        second = UserService(mock_db).get_user_by_email(existing_user_data["email"])
+
+        assert first == second
+        assert collection.document.return_value.get.call_count == 1
+
+    def test_get_user_by_email_falls_back_to_legacy_query(self, mock_db, existing_user_data):
+        """Users stored under auto-generated IDs are still found by email."""
+        collection = FirestoreMocks.collection_with_item(existing_user_data)
+        collection.document.return_value.get.return_value = FirestoreMocks.document_not_found()
+        mock_db.collection.return_value = collection
+        service = UserService(mock_db)
+
+        user = service.get_user_by_email(existing_user_data["email"])
+
+        assert user.id == "user123"
+        collection.document.assert_called_with(
+            user_service_module._email_doc_id(existing_user_data["email"])
+        )
+
+    def test_get_user_by_email_normalizes_case_and_whitespace(self, mock_db, existing_user_data):
+        """Emails differing only in case or surrounding whitespace share one lookup."""
+        collection = FirestoreMocks.collection_with_item(existing_user_data)
+        collection.document.return_value.get.return_value = FirestoreMocks.document_not_found()
+        mock_db.collection.return_value = collection
+        service = UserService(mock_db)
+
+        first = service.get_user_by_email("  Existing@Example.COM ")
+        second = service.get_user_by_email(existing_user_data["email"])
+
+        assert first == second
+        collection.document.assert_called_once_with(
+            user_service_module._email_doc_id(existing_user_data["email"])
+        )
+        # The second lookup is a cache hit, so the legacy query ran once
+        collection.where.assert_called_once()
+
     def test_get_user_by_email_not_found_raises_404(self, mock_db):
         """Get non-existent email raises 404."""
         collection = FirestoreMocks.collection_empty()
@@ -223,6 +348,29 @@ class TestGetOrCreateUser:
         assert user.id == "user123"
         assert user.email == existing_user_data["email"]
 
+    def test_get_or_create_finds_legacy_user_with_mixed_case_email(self, mock_db):
+        """A legacy user stored with a mixed-case local part is found, not duplicated."""
+        legacy_user_data = {
+            "id": "legacy_user_id",
+            "firebase_uid": "uid123",
+            "name": "Jane Doe",
+            "email": "Jane.Doe@example.com",
+            "created_at": datetime(2024, 1, 1),
+            "updated_at": datetime(2024, 1, 1),
+        }
+        collection = FirestoreMocks.collection_with_item(legacy_user_data)
+        collection.document.return_value.get.return_value = FirestoreMocks.document_not_found()
+        mock_db.collection.return_value = collection
+        service = UserService(mock_db)
+
+        user = service.get_or_create_user(
+            UserCreate(firebase_uid="uid123", name="Jane Doe", email="Jane.Doe@Example.com")
+        )
+
+        assert user.id == "legacy_user_id"
+        assert collection.where.call_args.kwargs["filter"].value == "Jane.Doe@example.com"
+        collection.document.return_value.create.assert_not_called()
+
     def test_get_or_create_new_user_creates_user(self, mock_db):
         """Get or create with new email creates user."""
         collection = FirestoreMocks.collection_empty()
@@ -239,6 +387,32 @@ class TestGetOrCreateUser:
 
         assert user.email == "new@example.com"
         assert user.id == "auto_generated_id"
+        collection.document.return_value.create.assert_called_once()
+        mock_db.transaction.assert_not_called()
+
+    def test_get_or_create_returns_user_created_concurrently(self, mock_db, existing_user_data):
+        """Losing a signup race returns the user created by the other request."""
+        from google.api_core.exceptions import AlreadyExists
+
+        collection = FirestoreMocks.collection_empty()
+        doc = collection.document.return_value
+        doc.get.side_effect = [
+            MagicMock(exists=False),
+            FirestoreMocks.document_exists(existing_user_data["id"], existing_user_data),
+        ]
+        doc.create.side_effect = AlreadyExists("exists")
+        mock_db.collection.return_value = collection
+        service = UserService(mock_db)
+
+        user_data = UserCreate(
+            firebase_uid="uid123",
+            name="Test",
+            email=existing_user_data["email"],
+        )
+
+        user = service.get_or_create_user(user_data)
+
+        assert user.id == "user123"
 
 
 # ============================================================================
@@ -256,13 +430,11 @@ class TestUpdateUser:
         collection = MagicMock()
         doc_ref = MagicMock()
 
-        # Mock existing user
-        existing_doc = FirestoreMocks.document_exists("user123", existing_user_data)
         updated_data = existing_user_data.copy()
         updated_data["name"] = "Updated Name"
         updated_data["updated_at"] = datetime(2025, 1, 15, 10, 30, 0)
         updated_doc = FirestoreMocks.document_exists("user123", updated_data)
-        doc_ref.get.side_effect = [existing_doc, updated_doc]
+        doc_ref.get.return_value = updated_doc
 
         collection.document.return_value = doc_ref
         mock_db.collection.return_value = collection
@@ -284,13 +456,11 @@ class TestUpdateUser:
         collection = MagicMock()
         doc_ref = MagicMock()
 
-        # Mock existing user
-        existing_doc = FirestoreMocks.document_exists("user123", existing_user_data)
         updated_data = existing_user_data.copy()
         updated_data["learning_style"] = ["metaphors", "analogies", "examples"]
         updated_data["updated_at"] = datetime(2025, 1, 15, 10, 30, 0)
         updated_doc = FirestoreMocks.document_exists("user123", updated_data)
-        doc_ref.get.side_effect = [existing_doc, updated_doc]
+        doc_ref.get.return_value = updated_doc
 
         collection.document.return_value = doc_ref
         mock_db.collection.return_value = collection
@@ -312,12 +482,11 @@ class TestUpdateUser:
         collection = MagicMock()
         doc_ref = MagicMock()
 
-        existing_doc = FirestoreMocks.document_exists("user123", existing_user_data)
         updated_data = existing_user_data.copy()
         updated_data["learning_style"] = []
         updated_data["updated_at"] = datetime(2025, 1, 15, 10, 30, 0)
         updated_doc = FirestoreMocks.document_exists("user123", updated_data)
-        doc_ref.get.side_effect = [existing_doc, updated_doc]
+        doc_ref.get.return_value = updated_doc
 
         collection.document.return_value = doc_ref
         mock_db.collection.return_value = collection
@@ -338,13 +507,12 @@ class TestUpdateUser:
         collection = MagicMock()
         doc_ref = MagicMock()
 
-        existing_doc = FirestoreMocks.document_exists("user123", existing_user_data)
         updated_data = existing_user_data.copy()
         updated_data["name"] = "Updated Name"
         updated_data["learning_style"] = ["step-by-step"]
         updated_data["updated_at"] = datetime(2025, 1, 15, 10, 30, 0)
         updated_doc = FirestoreMocks.document_exists("user123", updated_data)
-        doc_ref.get.side_effect = [existing_doc, updated_doc]
+        doc_ref.get.return_value = updated_doc
 
         collection.document.return_value = doc_ref
         mock_db.collection.return_value = collection
@@ -362,14 +530,30 @@ class TestUpdateUser:
             assert updated_user.learning_style == ["step-by-step"]
             doc_ref.update.assert_called_once()
 
+    def test_update_user_invalidates_email_cache(self, mock_db, existing_user_data):
+        """Updating a user drops its cached email lookup."""
+        from app.models.user import User, UserUpdate
+
+        collection = MagicMock()
+        doc_ref = MagicMock()
+        existing_doc = FirestoreMocks.document_exists("user123", existing_user_data)
+        doc_ref.get.return_value = existing_doc
+        collection.document.return_value = doc_ref
+        mock_db.collection.return_value = collection
+        user_service_module._cache_user(User(**existing_user_data))
+        service = UserService(mock_db)
+
+        service.update_user("user123", UserUpdate(name="Updated Name"))
+
+        assert existing_user_data["email"] not in user_service_module._email_cache
+
     def test_update_user_not_found_raises_404(self, mock_db):
         """Update non-existent user raises 404."""
         from app.models.user import UserUpdate
 
         collection = MagicMock()
         doc_ref = MagicMock()
-        doc = FirestoreMocks.document_not_found()
-        doc_ref.get.return_value = doc
+        doc_ref.update.side_effect = NotFound("missing")
 
         collection.document.return_value = doc_ref
         mock_db.collection.return_value = collection
@@ -382,6 +566,7 @@ class TestUpdateUser:
 
         assert exc.value.status_code == 404
         assert "not found" in exc.value.detail
+        doc_ref.get.assert_not_called()
 
     def test_update_user_with_empty_update_data(self, mock_db, existing_user_data):
         """Update with all None fields doesn't update database."""
@@ -391,7 +576,7 @@ class TestUpdateUser:
         doc_ref = MagicMock()
 
         existing_doc = FirestoreMocks.document_exists("user123", existing_user_data)
-        doc_ref.get.side_effect = [existing_doc, existing_doc]
+        doc_ref.get.return_value = existing_doc
 
         collection.document.return_value = doc_ref
         mock_db.collection.return_value = collection
@@ -447,7 +632,7 @@ class TestGetEnrolledMissions:
         parent_collection = MagicMock()
         parent_doc = MagicMock()
         subcollection = MagicMock()
-        subcollection.limit.return_value.get.return_value = [
+        subcollection.limit.return_value.stream.return_value = [
             MagicMock(to_dict=MagicMock(return_value=enrolled_mission_data))
         ]
         parent_doc.collection.return_value = subcollection
@@ -457,36 +642,73 @@ class TestGetEnrolledMissions:
         missions = service.get_enrolled_missions("user123", limit=10)
         assert missions[0].byte_size_checkpoints == ["cp1", "cp2"]
 
+    def test_get_enrolled_missions_projects_fields(self, mock_db):
+        """Requested fields are projected server-side and returned as dicts."""
+        parent_collection = MagicMock()
+        subcollection = MagicMock()
+        projected = {"mission_id": "mission123", "progress": 50.0}
+        query = subcollection.limit.return_value
+        query.select.return_value.stream.return_value = [
+            MagicMock(to_dict=MagicMock(return_value=projected))
+        ]
+        parent_collection.document.return_value.collection.return_value = subcollection
+        mock_db.collection.return_value = parent_collection
+        service = UserService(mock_db)
+
+        missions = service.get_enrolled_missions("user123", fields=["mission_id", "progress"])
+
+        assert missions == [projected]
+        query.select.assert_called_once_with(["mission_id", "progress"])
+        query.stream.assert_not_called()
+
+
+class TestGetEnrolledMissionsByIds:
+    """Test batch retrieval of enrolled missions."""
+
+    def test_get_enrolled_missions_by_ids_single_batch_read(self, mock_db, enrolled_mission_data):
+        """Fetches all requested missions with one get_all, in request order."""
+        second = {**enrolled_mission_data, "mission_id": "mission456"}
+        mock_db.get_all.return_value = [
+            FirestoreMocks.document_exists("mission456", second),
+            FirestoreMocks.document_not_found(),
+            FirestoreMocks.document_exists("mission123", enrolled_mission_data),
+        ]
+        service = UserService(mock_db)
+
+        missions = service.get_enrolled_missions_by_ids(
+            "user123", ["mission123", "missing", "mission456"]
+        )
+
+        assert [m.mission_id for m in missions] == ["mission123", "mission456"]
+        mock_db.get_all.assert_called_once()
+        assert len(mock_db.get_all.call_args.args[0]) == 3
+        mock_db.document.assert_any_call("users/user123/enrolled_missions/missing")
+
+    def test_get_enrolled_missions_by_ids_empty(self, mock_db):
+        """No ids means no RPC."""
+        service = UserService(mock_db)
+
+        assert service.get_enrolled_missions_by_ids("user123", []) == []
+        mock_db.get_all.assert_not_called()
+
 
 class TestGetEnrolledMission:
     """Test retrieving single enrolled mission."""
 
     def test_get_enrolled_mission_success(self, mock_db, enrolled_mission_data):
         """Successfully retrieve a single enrolled mission."""
-        parent_collection = MagicMock()
-        parent_doc = MagicMock()
-        subcollection = MagicMock()
         doc = FirestoreMocks.document_exists("mission123", enrolled_mission_data)
-        subcollection.document.return_value.get.return_value = doc
-        parent_doc.collection.return_value = subcollection
-        parent_collection.document.return_value = parent_doc
-        mock_db.collection.return_value = parent_collection
+        mock_db.document.return_value.get.return_value = doc
         service = UserService(mock_db)
         mission = service.get_enrolled_mission("user123", "mission123")
         assert mission.byte_size_checkpoints == ["cp1", "cp2"]
+        mock_db.document.assert_called_once_with("users/user123/enrolled_missions/mission123")
 
     def test_get_enrolled_mission_not_found_raises_404(self, mock_db):
         """Get non-existent enrolled mission raises 404."""
-        parent_collection = MagicMock()
-        parent_doc = MagicMock()
-        subcollection = MagicMock()
-
         doc = FirestoreMocks.document_not_found()
-        subcollection.document.return_value.get.return_value = doc
-        parent_doc.collection.return_value = subcollection
-        parent_collection.document.return_value = parent_doc
+        mock_db.document.return_value.get.return_value = doc
 
-        mock_db.collection.return_value = parent_collection
         service = UserService(mock_db)
 
         with pytest.raises(HTTPException) as exc:
@@ -501,16 +723,10 @@ class TestCreateEnrolledMission:
 
     def test_create_enrolled_mission_success(self, mock_db):
         """Successfully create enrolled mission."""
-        parent_collection = MagicMock()
-        parent_doc = MagicMock()
-        subcollection = MagicMock()
         doc_not_found = FirestoreMocks.document_not_found()
         enrollment_doc = MagicMock()
         enrollment_doc.get.return_value = doc_not_found
-        subcollection.document.return_value = enrollment_doc
-        parent_doc.collection.return_value = subcollection
-        parent_collection.document.return_value = parent_doc
-        mock_db.collection.return_value = parent_collection
+        mock_db.document.return_value = enrollment_doc
         service = UserService(mock_db)
         create_data = UserEnrolledMissionCreate(
             mission_id="mission123",
@@ -521,20 +737,14 @@ class TestCreateEnrolledMission:
             byte_size_checkpoints=["cp1", "cp2"],
         )
         with patch("app.services.user_service.datetime") as mock_datetime:
-            mock_datetime.today.return_value = datetime(2025, 1, 15)
+            mock_datetime.now.return_value = datetime(2025, 1, 15, tzinfo=timezone.utc)
             mission = service.create_enrolled_mission("user123", create_data)
             assert mission.byte_size_checkpoints == ["cp1", "cp2"]
 
     def test_create_enrolled_mission_duplicate_raises_400(self, mock_db, enrolled_mission_data):
         """Creating duplicate enrolled mission raises 400."""
-        parent_collection = MagicMock()
-        parent_doc = MagicMock()
-        subcollection = MagicMock()
         doc = FirestoreMocks.document_exists("mission123", enrolled_mission_data)
-        subcollection.document.return_value.get.return_value = doc
-        parent_doc.collection.return_value = subcollection
-        parent_collection.document.return_value = parent_doc
-        mock_db.collection.return_value = parent_collection
+        mock_db.document.return_value.get.return_value = doc
         service = UserService(mock_db)
         create_data = UserEnrolledMissionCreate(
             mission_id="mission123",
@@ -547,21 +757,83 @@ class TestCreateEnrolledMission:
         assert exc.value.status_code == 400
 
 
+class TestCreateEnrolledMissionsBulk:
+    """Test batched creation of enrolled missions."""
+
+    @staticmethod
+    def _create_data(mission_id):
+        return UserEnrolledMissionCreate(
+            mission_id=mission_id,
+            mission_title="Test Mission",
+            mission_short_description="Test description",
+            mission_skills=["Python"],
+            progress=0.0,
+            byte_size_checkpoints=["cp1"],
+        )
+
+    def test_create_enrolled_missions_bulk_chunks_commits(self, mock_db):
+        """Creates are split into commits of at most 500, with one existence read per chunk."""
+        mock_db.get_all.return_value = []
+        service = UserService(mock_db)
+        data_list = [self._create_data(f"mission{i}") for i in range(501)]
+
+        missions = service.create_enrolled_missions_bulk("user123", data_list)
+
+        batch = mock_db.batch.return_value
+        assert batch.create.call_count == 501
+        batch.set.assert_not_called()
+        assert batch.commit.call_count == 2
+        assert mock_db.get_all.call_count == 2
+        mock_db.document.return_value.get.assert_not_called()
+        mock_db.document.assert_any_call("users/user123/enrolled_missions/mission500")
+        assert [m.mission_id for m in missions] == [f"mission{i}" for i in range(501)]
+
+    def test_create_enrolled_missions_bulk_skips_existing(self, mock_db):
+        """Existing enrolled missions are left untouched instead of being reset."""
+        mock_db.get_all.return_value = [
+            FirestoreMocks.document_exists("mission1", {"progress": 80.0}),
+            FirestoreMocks.document_not_found(),
+        ]
+        service = UserService(mock_db)
+
+        missions = service.create_enrolled_missions_bulk(
+            "user123", [self._create_data("mission1"), self._create_data("mission2")]
+        )
+
+        batch = mock_db.batch.return_value
+        batch.create.assert_called_once()
+        assert batch.create.call_args.args[1]["mission_id"] == "mission2"
+        batch.set.assert_not_called()
+        assert [m.mission_id for m in missions] == ["mission2"]
+
+    def test_create_enrolled_missions_bulk_concurrent_create_raises_400(self, mock_db):
+        """An entry created between the existence read and the commit fails with 400."""
+        mock_db.get_all.return_value = []
+        mock_db.batch.return_value.commit.side_effect = AlreadyExists("exists")
+        service = UserService(mock_db)
+
+        with pytest.raises(HTTPException) as exc:
+            service.create_enrolled_missions_bulk("user123", [self._create_data("mission1")])
+
+        assert exc.value.status_code == 400
+
+    def test_create_enrolled_missions_bulk_empty_list(self, mock_db):
+        """No missions means no commits."""
+        service = UserService(mock_db)
+
+        assert service.create_enrolled_missions_bulk("user123", []) == []
+        mock_db.batch.assert_not_called()
+
+
 class TestUpdateEnrolledMission:
     """Test updating enrolled missions."""
 
     def test_update_enrolled_mission_success(self, mock_db, enrolled_mission_data):
         """Successfully update enrolled mission."""
-        parent_collection = MagicMock()
-        parent_doc = MagicMock()
-        subcollection = MagicMock()
         doc_get = FirestoreMocks.document_exists("mission123", enrolled_mission_data)
         ref = MagicMock()
-        ref.get.side_effect = [doc_get, doc_get]
-        subcollection.document.return_value = ref
-        parent_doc.collection.return_value = subcollection
-        parent_collection.document.return_value = parent_doc
-        mock_db.collection.return_value = parent_collection
+        ref.get.return_value = doc_get
+        mock_db.document.return_value = ref
         service = UserService(mock_db)
         update_data = UserEnrolledMissionUpdate(progress=75.0, completed=True)
         mission = service.update_enrolled_mission("user123", "mission123", update_data)
@@ -569,18 +841,10 @@ class TestUpdateEnrolledMission:
 
     def test_update_enrolled_mission_not_found_raises_404(self, mock_db):
         """Update non-existent enrolled mission raises 404."""
-        parent_collection = MagicMock()
-        parent_doc = MagicMock()
-        subcollection = MagicMock()
-
-        doc = FirestoreMocks.document_not_found()
         ref = MagicMock()
-        ref.get.return_value = doc
-        subcollection.document.return_value = ref
-        parent_doc.collection.return_value = subcollection
-        parent_collection.document.return_value = parent_doc
+        ref.update.side_effect = NotFound("missing")
+        mock_db.document.return_value = ref
 
-        mock_db.collection.return_value = parent_collection
         service = UserService(mock_db)
 
         update_data = UserEnrolledMissionUpdate(progress=75.0)
@@ -589,19 +853,14 @@ class TestUpdateEnrolledMission:
             service.update_enrolled_mission("user123", "nonexistent", update_data)
 
         assert exc.value.status_code == 404
+        ref.get.assert_not_called()
 
     def test_update_enrolled_mission_partial_update(self, mock_db, enrolled_mission_data):
         """Partial update only updates specified fields."""
-        parent_collection = MagicMock()
-        parent_doc = MagicMock()
-        subcollection = MagicMock()
         doc = FirestoreMocks.document_exists("mission123", enrolled_mission_data)
         ref = MagicMock()
-        ref.get.side_effect = [doc, doc]
-        subcollection.document.return_value = ref
-        parent_doc.collection.return_value = subcollection
-        parent_collection.document.return_value = parent_doc
-        mock_db.collection.return_value = parent_collection
+        ref.get.return_value = doc
+        mock_db.document.return_value = ref
         service = UserService(mock_db)
         update_data = UserEnrolledMissionUpdate(progress=80.0)
         mission = service.update_enrolled_mission("user123", "mission123", update_data)
@@ -613,18 +872,11 @@ class TestDeleteEnrolledMission:
 
     def test_delete_enrolled_mission_success(self, mock_db, enrolled_mission_data):
         """Successfully delete enrolled mission."""
-        parent_collection = MagicMock()
-        parent_doc = MagicMock()
-        subcollection = MagicMock()
-
         doc = FirestoreMocks.document_exists("mission123", enrolled_mission_data)
         ref = MagicMock()
         ref.get.return_value = doc
-        subcollection.document.return_value = ref
-        parent_doc.collection.return_value = subcollection
-        parent_collection.document.return_value = parent_doc
+        mock_db.document.return_value = ref
 
-        mock_db.collection.return_value = parent_collection
         service = UserService(mock_db)
 
         result = service.delete_enrolled_mission("user123", "mission123")
@@ -634,18 +886,11 @@ class TestDeleteEnrolledMission:
 
     def test_delete_enrolled_mission_not_found_raises_404(self, mock_db):
         """Delete non-existent enrolled mission raises 404."""
-        parent_collection = MagicMock()
-        parent_doc = MagicMock()
-        subcollection = MagicMock()
-
         doc = FirestoreMocks.document_not_found()
         ref = MagicMock()
         ref.get.return_value = doc
-        subcollection.document.return_value = ref
-        parent_doc.collection.return_value = subcollection
-        parent_collection.document.return_value = parent_doc
+        mock_db.document.return_value = ref
 
-        mock_db.collection.return_value = parent_collection
         service = UserService(mock_db)
 
         with pytest.raises(HTTPException) as exc:
@@ -0,0 +1,144 @@
+"""Unit tests for the YouTube Data API helpers."""
+
+import re
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.utils import youtube_api
+from app.utils.youtube_api import _parse_iso8601_duration, search_youtube_videos
+
+
+pytestmark = pytest.mark.anyio
+
+_SEARCH_RESPONSE = {"items": [{"id": {"videoId": "vid1"}}]}
+_VIDEOS_RESPONSE = {
+    "items": [
+        {
+            "id": "vid1",
+            "snippet": {
+                "title": "Python Basics",
+                "channelTitle": "Learn Channel",
+                "description": "Intro to Python",
+                "publishedAt": "2024-01-01T00:00:00Z",
+                "thumbnails": {"medium": {"url": "https://i.ytimg.com/vi/vid1/mqdefault.jpg"}},
+            },
+            "contentDetails": {"duration": "PT5M30S"},
+            "statistics": {"viewCount": "1000"},
+        }
+    ]
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_youtube_cache(monkeypatch):
+    """Give each test an empty result cache and a configured API key."""
+    monkeypatch.setattr(settings, "YOUTUBE_API_KEY", "test-key")
+    youtube_api._YT_CACHE.clear()
+    yield
+    youtube_api._YT_CACHE.clear()
+
+
+@pytest.fixture
+def youtube_requests(monkeypatch):
+    """Serve canned API responses in-process and record every upstream request."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/search"):
+            return httpx.Response(200, json=_SEARCH_RESPONSE)
+        return httpx.Response(200, json=_VIDEOS_RESPONSE)
+
+    real_async_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        youtube_api.httpx,
+        "AsyncClient",
+        lambda **kwargs: real_async_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    return requests
+
+
+def _search_calls(requests):
+    return [request for request in requests if request.url.path.endswith("/search")]
+
+
+async def test_search_youtube_videos_serves_repeat_search_from_cache(youtube_requests):
+    """Two identical searches hit the API once."""
+    first = await search_youtube_videos("python basics", max_results=3)
+    second = await search_youtube_videos("python basics", max_results=3)
+
+    assert first == second
+    assert first[0]["video_id"] == "vid1"
+    assert first[0]["duration_seconds"] == 330
+    assert len(_search_calls(youtube_requests)) == 1
+    assert len(youtube_requests) == 2  # one /search and one /videos
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"query": "python advanced"},
+        {"max_results": 5},
+        {"duration_filter": "medium"},
+        {"video_category_id": "28"},
+    ],
+)
+async def test_search_youtube_videos_cache_key_includes_arguments(youtube_requests, kwargs):
+    """Searches differing in any argument are fetched separately."""
+    await search_youtube_videos("python basics", max_results=3)
+    await search_youtube_videos(**{"query": "python basics", "max_results": 3, **kwargs})
+
+    assert len(_search_calls(youtube_requests)) == 2
+
+
+async def test_search_youtube_videos_cached_results_survive_caller_mutation(youtube_requests):
+    """Mutating returned results doesn't change what later cache hits return."""
+    first = await search_youtube_videos("python basics")
+    first[0]["title"] = "Changed"
+    first.append({"video_id": "extra"})
+
+    second = await search_youtube_videos("python basics")
+
+    assert len(second) == 1
+    assert second[0]["title"] == "Python Basics"
+    assert len(_search_calls(youtube_requests)) == 1
+
+
+def _regex_duration(duration):
+    """The regex-only parse that the fast path must agree with."""
+    match = re.match(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?", duration)
+    if not match:
+        return 0
+    hours, minutes, seconds = (int(group or 0) for group in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+@pytest.mark.parametrize(
+    ("duration", "expected"),
+    [
+        ("PT", 0),
+        ("PT0S", 0),
+        ("PT45S", 45),
+        ("PT5M", 300),
+        ("PT5M30S", 330),
+        ("PT1H", 3600),
+        ("PT2H5S", 7205),
+        ("PT1H2M3S", 3723),
+        ("PT10H0M0S", 36000),
+        ("P1DT2H", 0),  # day components aren't supported
+        ("P1D", 0),
+        ("PT1H2M3SX", 3723),  # trailing garbage falls back to the prefix match
+        ("PT5S3M", 5),  # out-of-order units
+        ("PTH", 0),
+        ("PTxM", 0),
+        ("5M", 0),
+        ("abc", 0),
+        ("", 0),
+    ],
+)
+def test_parse_iso8601_duration_matches_regex_parse(duration, expected):
+    """The fast path returns what the regex parse returned, including for odd input."""
+    assert _parse_iso8601_duration(duration) == expected
+    assert _parse_iso8601_duration(duration) == _regex_duration(duration)